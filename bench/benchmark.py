@@ -0,0 +1,297 @@
+#!/usr/bin/python3
+"""
+Time dev-pipeline's configuration and resolution hot paths on synthetic
+projects.
+
+Every project is generated from a seed, so results are comparable between
+runs and releases.  A project has a random dependency graph, a profile, and
+an override tree covering some of its components.  Results are written as
+JSON (one object per measurement) so they can be tracked over time.
+
+Usage:
+    python3 bench/benchmark.py [--sizes 100,1000,10000] [--repeat 3]
+                               [--seed 1] [--output FILE]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "{}/../lib".format(os.path.dirname(
+    os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import devpipeline.build.cmake
+import devpipeline.config.config
+import devpipeline.config.modifier
+import devpipeline.config.parser
+import devpipeline.exec.bootstrap
+import devpipeline.executor
+import devpipeline.resolve
+import devpipeline.version
+
+_PROFILE = "bench"
+_OVERRIDE = "tuned"
+
+# Each component depends on up to this many earlier components
+_MAX_DEPENDENCIES = 4
+
+
+def _component_name(index):
+    return "component-{:05d}".format(index)
+
+
+def _write_build_config(path, size, rng):
+    with open(path, "w") as output_file:
+        output_file.write("[DEFAULT]\n"
+                          "build = cmake\n"
+                          "scm = nothing\n"
+                          "cmake.build_type = Debug\n"
+                          "cmake.args = -DBENCH=1\n\n")
+        for index in range(size):
+            name = _component_name(index)
+            output_file.write("[{}]\n".format(name))
+            if index:
+                dependencies = rng.sample(
+                    range(index), min(index, rng.randint(0, _MAX_DEPENDENCIES)))
+                if dependencies:
+                    output_file.write("depends = {}\n".format(", ".join(
+                        _component_name(dep) for dep in sorted(dependencies))))
+            output_file.write("cmake.cflags = -O{}\n".format(index % 3))
+            output_file.write(
+                "cmake.prefix = ${{dp.build_root}}/install/{}\n\n".format(name))
+
+
+def _write_modifiers(config_dir, size, rng):
+    with open(os.path.join(config_dir, "profiles.conf"), "w") as output_file:
+        output_file.write("[{}]\n"
+                          "cmake.build_type = Release\n"
+                          "cmake.cflags.append = -Wall\n".format(_PROFILE))
+    override_dir = os.path.join(config_dir, "overrides.d", _OVERRIDE)
+    os.makedirs(override_dir)
+    # override about a tenth of the components
+    for index in rng.sample(range(size), max(1, size // 10)):
+        with open(os.path.join(override_dir, "{}.conf".format(
+                _component_name(index))), "w") as output_file:
+            output_file.write("[append]\n"
+                              "cmake.cflags = -march=native\n"
+                              "cmake.args = -DTUNED=1\n")
+
+
+class _Project:
+
+    """A generated project, along with its configuration directory."""
+
+    def __init__(self, root, size, seed):
+        rng = random.Random(seed)
+        self.root = root
+        self.size = size
+        self.config_dir = os.path.join(root, "dp-config")
+        os.makedirs(self.config_dir)
+        self.build_config = os.path.join(root, "build.config")
+        self.build_dir = os.path.join(root, "build")
+        self.cache_path = os.path.join(self.build_dir, "build.cache")
+        _write_build_config(self.build_config, size, rng)
+        _write_modifiers(self.config_dir, size, rng)
+
+    def configure(self):
+        """Create (or recreate) the build cache."""
+        return devpipeline.config.config.process_config(
+            self.build_config, self.build_dir, "build.cache",
+            profiles=_PROFILE, overrides=_OVERRIDE)
+
+
+def _time(function, repeat):
+    """Get the fastest of repeat calls to function, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best
+
+
+def _current_target(components, name, executor):
+    component = components[name]
+    return {
+        "executor": executor,
+        "current_target": name,
+        "current_config": component,
+        "env": {}
+    }
+
+
+def _bench_process_config(project, repeat):
+    def _process():
+        # don't let the file cache hide parsing costs
+        devpipeline.config.parser.invalidate_cache()
+        project.configure()
+    return _time(_process, repeat)
+
+
+def _bench_update_cache_cold(project, repeat):
+    def _update():
+        devpipeline.config.parser.invalidate_cache()
+        devpipeline.config.config.update_cache(force=True,
+                                               cache_file=project.cache_path)
+    return _time(_update, repeat)
+
+
+def _bench_update_cache_warm(project, repeat):
+    devpipeline.config.config.update_cache(cache_file=project.cache_path)
+    return _time(lambda: devpipeline.config.config.update_cache(
+        cache_file=project.cache_path), repeat)
+
+
+def _bench_order_dependencies(project, repeat):
+    components = devpipeline.config.config.update_cache(
+        cache_file=project.cache_path)
+    targets = components.sections()
+    return _time(lambda: devpipeline.resolve.order_dependencies(
+        targets, components), repeat)
+
+
+def _per_target(project, repeat, target_fn):
+    components = devpipeline.config.config.update_cache(
+        cache_file=project.cache_path)
+    executor = devpipeline.executor.QuietExecutor()
+    current_targets = [_current_target(components, name, executor)
+                       for name in components.sections()]
+
+    def _run():
+        for current_target in current_targets:
+            target_fn(current_target)
+    return _time(_run, repeat)
+
+
+def _bench_modify_everything(project, repeat):
+    return _per_target(
+        project, repeat,
+        lambda current_target: devpipeline.config.modifier.modify_everything(
+            current_target["current_config"].get("cmake.cflags"),
+            current_target, "cmake.cflags", " "))
+
+
+def _bench_make_cmake(project, repeat):
+    return _per_target(
+        project, repeat,
+        lambda current_target: devpipeline.build.cmake.make_cmake(
+            current_target, lambda builder: builder))
+
+
+def _bench_bootstrap(project, repeat):
+    def _bootstrap():
+        with contextlib.redirect_stdout(io.StringIO()):
+            devpipeline.exec.bootstrap.main(["--executor", "dry-run"])
+
+    old_dir = os.getcwd()
+    os.chdir(project.build_dir)
+    try:
+        return _time(_bootstrap, repeat)
+    finally:
+        os.chdir(old_dir)
+
+
+# (name, function, whether the result is also reported per target)
+_BENCHMARKS = [
+    ("process_config", _bench_process_config, False),
+    ("update_cache.cold", _bench_update_cache_cold, False),
+    ("update_cache.warm", _bench_update_cache_warm, False),
+    ("order_dependencies", _bench_order_dependencies, False),
+    ("modify_everything", _bench_modify_everything, True),
+    ("make_cmake", _bench_make_cmake, True),
+    ("bootstrap.dry-run", _bench_bootstrap, True)
+]
+
+
+def run(sizes, repeat, seed, only=None):
+    """
+    Run every benchmark against a project of each size.
+
+    Returns a list of result dictionaries.
+
+    Arguments
+    sizes -- the number of components in each generated project
+    repeat -- how many times each measurement is repeated (the fastest is
+              kept)
+    seed -- the seed used to generate projects
+    only -- if set, a collection of benchmark names to run
+    """
+    results = []
+    old_config = os.environ.get("DEV_PIPELINE_CONFIG")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = _Project(tmp_dir, size, seed)
+            os.environ["DEV_PIPELINE_CONFIG"] = project.config_dir
+            try:
+                project.configure()
+                for name, bench_fn, per_target in _BENCHMARKS:
+                    if only and (name not in only):
+                        continue
+                    seconds = bench_fn(project, repeat)
+                    result = {
+                        "benchmark": name,
+                        "components": size,
+                        "seconds": seconds
+                    }
+                    if per_target:
+                        result["seconds_per_target"] = seconds / size
+                    results.append(result)
+                    print("{:>20} {:>6} {:10.4f}s".format(name, size, seconds),
+                          file=sys.stderr)
+            finally:
+                if old_config is None:
+                    os.environ.pop("DEV_PIPELINE_CONFIG", None)
+                else:
+                    os.environ["DEV_PIPELINE_CONFIG"] = old_config
+                devpipeline.config.parser.invalidate_cache()
+    return results
+
+
+def main(args=None):
+    # pylint: disable=missing-docstring
+    parser = argparse.ArgumentParser(
+        description="Benchmark dev-pipeline on synthetic projects.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="Comma-separated project sizes (in components)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per measurement; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Seed for generating projects")
+    parser.add_argument("--only",
+                        help="Comma-separated benchmarks to run")
+    parser.add_argument("--output",
+                        help="Write results to this file instead of stdout")
+    arguments = parser.parse_args(args)
+
+    results = run([int(size) for size in arguments.sizes.split(",")],
+                  arguments.repeat, arguments.seed,
+                  arguments.only.split(",") if arguments.only else None)
+    report = {
+        "dev-pipeline": devpipeline.version.STRING,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": arguments.seed,
+        "repeat": arguments.repeat,
+        "results": results
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Time how long dev-pipeline takes to start.
+
+Each command runs in a fresh interpreter, the same way a wrapper script or
+CI job would invoke dev-pipeline, so the measurement includes interpreter
+startup and every import.  Results are written as JSON in the same format as
+benchmark.py.
+
+Usage:
+    python3 bench/startup.py [--repeat 20] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+_LIB_DIR = "{}/../lib".format(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, arguments to the driver)
+_COMMANDS = [
+    ("python", None),
+    ("driver.list", ["--list"]),
+    ("driver.help", ["--help"]),
+    ("build.help", ["build", "--help"]),
+    ("bootstrap.help", ["bootstrap", "--help"]),
+    ("configure.help", ["configure", "--help"])
+]
+
+
+def _command(args):
+    if args is None:
+        # baseline: an interpreter that does nothing
+        return [sys.executable, "-c", "pass"]
+    return [sys.executable, "-m", "devpipeline.exec.driver"] + args
+
+
+def _time(cmd, env, repeat):
+    """Get the fastest of repeat runs of cmd, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        if (best is None) or (elapsed < best):
+            best = elapsed
+    return best
+
+
+def run(repeat):
+    """Time every command, returning a list of result dictionaries."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(
+        [_LIB_DIR] + [path for path in [env.get("PYTHONPATH")] if path])
+    results = []
+    for name, args in _COMMANDS:
+        seconds = _time(_command(args), env, repeat)
+        results.append({
+            "benchmark": "startup.{}".format(name),
+            "seconds": seconds
+        })
+        print("{:>24} {:10.4f}s".format(name, seconds), file=sys.stderr)
+    return results
+
+
+def main(args=None):
+    # pylint: disable=missing-docstring
+    parser = argparse.ArgumentParser(
+        description="Benchmark dev-pipeline startup time.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Runs per command; the fastest is reported")
+    parser.add_argument("--output",
+                        help="Write results to this file instead of stdout")
+    arguments = parser.parse_args(args)
+
+    sys.path.insert(0, _LIB_DIR)
+    # pylint: disable=import-outside-toplevel
+    import devpipeline.version
+
+    report = {
+        "dev-pipeline": devpipeline.version.STRING,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": arguments.repeat,
+        "results": run(arguments.repeat)
+    }
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,29 @@
-import devpipeline.executor
-
-EXECUTOR_TYPES = {
-    "dry-run": executor.DryRunExecutor,
-    "quiet": executor.QuietExecutor,
-    "silent": executor.SilentExecutor,
-    "verbose": executor.VerboseExecutor
-}
+"""
+dev-pipeline manages projects spread across multiple repositories.
+
+EXECUTOR_TYPES maps executor names to their classes.  It's created the first
+time it's used, since loading executors isn't free and many commands (e.g.,
+listing tools) never need one.
+"""
+
+
+def _make_executor_types():
+    # pylint: disable=import-outside-toplevel
+    import devpipeline.executor as executor
+
+    return {
+        "dry-run": executor.DryRunExecutor,
+        "log": executor.LogExecutor,
+        "quiet": executor.QuietExecutor,
+        "silent": executor.SilentExecutor,
+        "verbose": executor.VerboseExecutor
+    }
+
+
+def __getattr__(name):
+    if name == "EXECUTOR_TYPES":
+        global EXECUTOR_TYPES  # pylint: disable=global-variable-undefined
+        EXECUTOR_TYPES = _make_executor_types()
+        return EXECUTOR_TYPES
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+"""
+Run coroutines from synchronous code.
+
+Tasks that spend most of their time waiting on short commands (e.g.,
+fetching sources) can run as coroutines on a single event loop instead of
+occupying a thread each, so many more of them can be in flight at once.
+"""
+
+import asyncio
+import threading
+
+
+class CoroutinePool:
+
+    """
+    Run coroutine functions on an event loop in a background thread, with a
+    limited number running at once.
+
+    This provides the parts of concurrent.futures.Executor that dev-pipeline
+    uses (submit and shutdown), so it can be used in place of a thread pool.
+    """
+
+    def __init__(self, limit):
+        """
+        Arguments
+        limit -- the maximum number of coroutines running at once
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.run_coroutine_threadsafe(
+            self._make_semaphore(limit), self._loop).result()
+        self._futures = []
+        self._cancelled = False
+
+    @staticmethod
+    async def _make_semaphore(limit):
+        # created on the loop that uses it
+        return asyncio.Semaphore(limit)
+
+    async def _run(self, coroutine_fn, args):
+        async with self._semaphore:
+            if self._cancelled:
+                raise asyncio.CancelledError()
+            return await coroutine_fn(*args)
+
+    def submit(self, coroutine_fn, *args):
+        """
+        Schedule coroutine_fn(*args) to run.  Returns a
+        concurrent.futures.Future holding the result.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(coroutine_fn, args), self._loop)
+        self._futures.append(future)
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        """
+        Wait for running coroutines to finish, then stop the event loop.
+
+        Arguments
+        cancel_futures -- if True, coroutines that haven't started yet are
+                          cancelled instead of run
+        """
+        self._cancelled = cancel_futures
+        for future in self._futures:
+            try:
+                future.result()
+            except BaseException:  # pylint: disable=broad-except
+                # reported to whoever waits on the future
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -21,6 +21,18 @@ class Builder:
         """
         pass
 
+    def configured(self, src_dir, build_dir):
+        """
+        Called after a package's configure step succeeds.  Builders can use
+        this to remember what was applied so later configure steps can be
+        skipped.
+
+        Arguments
+        src_dir - The absolute path to a package's source directory.
+        build_dir - The absolute path to a package's build directory.
+        """
+        pass
+
     def build(self, build_dir):
         """
         Build a package.
@@ -4,17 +4,19 @@
 import os.path
 import os
 
-import devpipeline.build.cmake
+import devpipeline.build.stamp
+import devpipeline.plugins
 import devpipeline.toolsupport
 
 
-# Every builder supported should have an entry in this dictionary.  The key
-# needs to match whatever value the "build" key is set to in build.conf, and
-# the value should be a function that takes a component and returns a Builder.
-_BUILDER_LOOKUP = {
-    "cmake": devpipeline.build.cmake.make_cmake,
-    "nothing": lambda c, uc, cw: cw(devpipeline.build.Builder())
-}
+# Every builder supported should be available here.  The key needs to match
+# whatever value the "build" key is set to in build.conf, and the value should
+# be a function that takes a component and returns a Builder.  Builders from
+# other packages are found through the devpipeline.builders entry point group.
+_BUILDER_LOOKUP = devpipeline.plugins.PluginRegistry("devpipeline.builders", {
+    "cmake": "devpipeline.build.cmake:make_cmake",
+    "nothing": lambda c, cw: cw(devpipeline.build.Builder())
+})
 
 
 def _make_builder(current_target, common_wrapper):
@@ -31,15 +33,60 @@ def _make_builder(current_target, common_wrapper):
 
 class SimpleBuild(devpipeline.toolsupport.SimpleTool):
 
-    """This class does a simple build - configure, build, and install."""
+    """
+    This class does a simple build - configure, build, and install.
+
+    If stamps are provided, a step is skipped when its fingerprint matches the
+    last time it completed successfully.  If the current target has a
+    jobserver, every command joins its pool.
+    """
 
-    def __init__(self, real, current_target):
+    def __init__(self, real, current_target, stamps=None):
         super().__init__(current_target, real)
+        self._stamps = stamps
+        # step -> the commands to fingerprint in place of the ones a helper
+        # returned
+        self._stamp_commands = {}
+        self._jobserver = current_target.get("jobserver")
+        if self._jobserver:
+            self.env = self._jobserver.environment(self.env)
+
+    def _execute_commands(self, cmds):
+        if cmds and self._jobserver:
+            with self._jobserver.slot():
+                return super()._execute_commands(
+                    [self._jobserver.command(cmd) for cmd in cmds])
+        return super()._execute_commands(cmds)
+
+    def _run_step(self, step, cmds):
+        if self._stamps is None:
+            return self._execute_commands(cmds)
+
+        fingerprint = self._stamps.fingerprint(
+            step, self._stamp_commands.pop(step, cmds))
+        if self._stamps.is_current(step, fingerprint):
+            self.executor.message("\t(Up to date)")
+            return True
+        result = self._execute_commands(cmds)
+        if result:
+            self._stamps.record(step, fingerprint)
+        return result
 
     def configure(self, src_dir, build_dir):
         # pylint: disable=missing-docstring
-        self._call_helper("Configuring", self.real.configure,
-                          src_dir, build_dir)
+        # Builders can skip configuring a directory that's already
+        # configured.  Fingerprint the commands they'd run either way, so a
+        # skip doesn't look like a change to every later step.
+        commands_fn = getattr(self.real, "configure_commands", None)
+        if commands_fn and (self._stamps is not None):
+            self._stamp_commands["Configuring"] = commands_fn(src_dir,
+                                                              build_dir)
+        if self._call_helper("Configuring", self.real.configure,
+                             src_dir, build_dir):
+            # builders don't have to inherit from Builder
+            configured_fn = getattr(self.real, "configured", None)
+            if configured_fn:
+                configured_fn(src_dir, build_dir)
 
     def build(self, build_dir):
         # pylint: disable=missing-docstring
@@ -64,11 +111,37 @@ def build_task(current_target):
     build_path = target.get("dp.build_dir")
     if not os.path.exists(build_path):
         os.makedirs(build_path)
+    stamps = devpipeline.build.stamp.target_stamps(current_target)
     builder = _make_builder(
         current_target,
-        lambda r: SimpleBuild(r, current_target))
+        lambda r: SimpleBuild(r, current_target, stamps))
     builder.configure(target.get("dp.src_dir"), build_path)
     builder.build(build_path)
     if "no_install" not in target:
         builder.install(build_path, path=target.get("install_path",
                                                     "install"))
+
+
+def build_plan(current_target):
+    """
+    Get the commands build_task would run for a target, without running
+    anything or checking whether steps are up to date.
+
+    Returns a list of (step, commands) pairs, in the order they run.
+    commands may be None or empty if a step has nothing to do.
+
+    Arguments
+    current_target - The target to plan.
+    """
+    target = current_target["current_config"]
+    build_path = target.get("dp.build_dir")
+    builder = _make_builder(current_target, lambda r: r)
+    ret = [
+        ("configure", builder.configure(target.get("dp.src_dir"),
+                                        build_path)),
+        ("build", builder.build(build_path))
+    ]
+    if "no_install" not in target:
+        ret.append(("install", builder.install(
+            build_path, path=target.get("install_path", "install"))))
+    return ret
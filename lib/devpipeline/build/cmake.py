@@ -1,52 +1,102 @@
 #!/usr/bin/python3
 """This modules supports building CMake projects."""
 
+import json
+import os.path
 import re
 
 import devpipeline.toolsupport
 
+# Records the arguments of the last successful configure in a build directory
+_CONFIGURE_ARGS_FILE = ".dp-cmake-args"
+
+
+def _read_configure_args(build_dir):
+    try:
+        with open(os.path.join(build_dir, _CONFIGURE_ARGS_FILE)) as args_file:
+            return json.load(args_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_configured(build_dir, configure_args):
+    """Determine if build_dir was already configured with configure_args."""
+    if not os.path.isfile(os.path.join(build_dir, "CMakeCache.txt")):
+        return False
+    return _read_configure_args(build_dir) == configure_args
+
 
 class CMake:
 
     """This class manages the details of building using CMake."""
 
-    def __init__(self, ex_args, config_args):
+    def __init__(self, ex_args, config_args, force=False):
         self.ex_args = ex_args
         self._config_args = config_args
+        self._force = force
 
-    def configure(self, src_dir, build_dir):
-        """This function builds the cmake configure command."""
+    def _configure_args(self, src_dir):
         ex_path = self.ex_args.get("project_path")
         if ex_path:
             src_dir += "/{}".format(ex_path)
+        return [
+            'cmake',
+            src_dir,
+        ] + self._config_args
 
+    def configure(self, src_dir, build_dir):
+        """
+        This function builds the cmake configure command.  Nothing is done
+        if build_dir already has a CMakeCache.txt that was created with the
+        same arguments (unless forced); cmake --build regenerates the build
+        system itself if the project's CMake files change.
+        """
+        if not self._force and _is_configured(build_dir,
+                                              self._configure_args(src_dir)):
+            return None
+        # The recorded arguments are only valid until cmake runs again; if
+        # this configure fails, the next one can't be skipped
+        try:
+            os.remove(os.path.join(build_dir, _CONFIGURE_ARGS_FILE))
+        except OSError:
+            pass
+        return self.configure_commands(src_dir, build_dir)
+
+    def configure_commands(self, src_dir, build_dir):
+        """This function builds the cmake configure command, even if
+        configure would skip it."""
         return [{
-            "args": [
-                'cmake',
-                src_dir,
-            ] + self._config_args,
+            "args": self._configure_args(src_dir),
             "cwd": build_dir
         }]
 
+    def configured(self, src_dir, build_dir):
+        """This function records the arguments used to configure build_dir."""
+        with open(os.path.join(build_dir, _CONFIGURE_ARGS_FILE),
+                  "w") as args_file:
+            json.dump(self._configure_args(src_dir), args_file)
+
+    def _build_args(self, build_dir):
+        ret = [
+            'cmake',
+            '--build',
+            build_dir
+        ]
+        parallel = self.ex_args.get("parallel")
+        if parallel:
+            ret.extend(['--parallel', parallel])
+        return ret
+
     def build(self, build_dir):
         """This function builds the cmake build command."""
-        # pylint: disable=no-self-use
         return [{
-            "args": [
-                'cmake',
-                '--build',
-                build_dir
-            ]
+            "args": self._build_args(build_dir)
         }]
 
     def install(self, build_dir, path=None):
         """This function builds the cmake install command."""
-        # pylint: disable=no-self-use
-        install_args = ['cmake',
-                        '--build',
-                        build_dir,
-                        '--target',
-                        'install']
+        install_args = self._build_args(build_dir) + ['--target',
+                                                      'install']
         if path:
             install_args.extend(['--',
                                  "DESTDIR={}".format(path)])
@@ -182,11 +232,13 @@ def _make_all_options():
 
 
 _EX_ARGS = {
-    "project_path": None
+    "project_path": None,
+    "parallel": None
 }
 
 _EX_ARG_FNS = {
-    "project_path": lambda v: ("project_path", v)
+    "project_path": lambda v: ("project_path", v),
+    "parallel": lambda v: ("parallel", v)
 }
 
 
@@ -207,4 +259,8 @@ def make_cmake(current_target, common_wrapper):
         configure_args.extend(option_fns[key](v)))
     devpipeline.toolsupport.args_builder("cmake", current_target, _EX_ARGS,
                                          add_value)
-    return common_wrapper(CMake(cmake_args, configure_args))
+    if current_target.get("jobserver"):
+        # an explicit job count would take the build out of the shared pool
+        cmake_args.pop("parallel", None)
+    return common_wrapper(CMake(cmake_args, configure_args,
+                                current_target.get("force", False)))
@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+
+"""
+Skip build steps whose inputs haven't changed.
+
+Every target keeps a stamp file in its build directory recording a
+fingerprint of each step that last completed successfully.  A step's
+fingerprint covers the target's source tree, the stamps of the target's
+dependencies, the environment options it builds with, the commands the step
+runs, and the fingerprint of the step before it, so a change anywhere
+upstream reruns every step after it.
+"""
+
+import hashlib
+import json
+import os
+
+import devpipeline.config.inputs
+
+STAMP_FILE = ".dp-stamp"
+
+# Version control metadata changes on every fetch without affecting a build.
+_IGNORED_DIRECTORIES = frozenset([".git", ".hg", ".svn"])
+
+_ENV_PREFIXES = ("env.", "env_")
+
+
+def stamp_path(build_dir):
+    """Get the path of the stamp file in a build directory."""
+    return os.path.join(build_dir, STAMP_FILE)
+
+
+def _file_entry(entry, content):
+    if content and entry.is_file(follow_symlinks=False):
+        return devpipeline.config.inputs.content_hash(entry.path)
+    if entry.is_symlink():
+        return os.readlink(entry.path)
+    info = entry.stat(follow_symlinks=False)
+    return "{}:{}".format(info.st_mtime_ns, info.st_size)
+
+
+def _scan_tree(path, skip, content, digest):
+    try:
+        entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if (entry.name not in _IGNORED_DIRECTORIES) and \
+                    (entry.path not in skip):
+                digest.update("d\0{}\0".format(entry.path).encode(
+                    "utf-8", errors="surrogateescape"))
+                _scan_tree(entry.path, skip, content, digest)
+        else:
+            try:
+                value = _file_entry(entry, content)
+            except OSError:
+                value = None
+            digest.update("f\0{}\0{}\0".format(entry.path, value).encode(
+                "utf-8", errors="surrogateescape"))
+
+
+def source_fingerprint(src_dir, skip=None, content=False):
+    """
+    Get a fingerprint of every file in a source tree.
+
+    Arguments
+    src_dir -- the top of the source tree
+    skip -- paths of directories that shouldn't be scanned (e.g., a build
+            directory inside the source tree)
+    content -- if True, hash file contents instead of using their
+               modification time and size.  This is slower, but touching a
+               file won't cause a rebuild.
+    """
+    digest = hashlib.sha1()
+    _scan_tree(os.path.normpath(src_dir),
+               {os.path.normpath(path) for path in (skip or [])},
+               content, digest)
+    return digest.hexdigest()
+
+
+def _read_stamps(path):
+    try:
+        with open(path) as input_file:
+            ret = json.load(input_file)
+    except (OSError, ValueError):
+        return {}
+    if isinstance(ret, dict):
+        return ret
+    return {}
+
+
+class Stamps:
+
+    """The recorded fingerprints of a target's build steps."""
+
+    def __init__(self, build_dir, inputs, force=False):
+        """
+        Arguments
+        build_dir -- the build directory of the target
+        inputs -- a hash of everything (other than commands) the target's
+                  steps depend on
+        force -- if True, no step is considered up to date
+        """
+        self._path = stamp_path(build_dir)
+        self._recorded = _read_stamps(self._path)
+        self._previous = inputs
+        self._force = force
+
+    def fingerprint(self, step, cmds):
+        """
+        Get the fingerprint of a step.  Steps must be fingerprinted in the
+        order they run.
+
+        Arguments
+        step -- the name of the step
+        cmds -- the commands the step will run
+        """
+        self._previous = hashlib.sha1(json.dumps(
+            [self._previous, step, cmds],
+            sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return self._previous
+
+    def is_current(self, step, fingerprint):
+        """Determine if step last completed with the same fingerprint."""
+        return (not self._force) and \
+            (self._recorded.get(step) == fingerprint)
+
+    def record(self, step, fingerprint):
+        """Record that step completed successfully."""
+        self._recorded[step] = fingerprint
+        tmp_path = "{}.{}.tmp".format(self._path, os.getpid())
+        with open(tmp_path, "w") as output_file:
+            json.dump(self._recorded, output_file, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+
+_FINGERPRINT_MODES = {
+    "mtime": False,
+    "content": True
+}
+
+
+def _dependency_items(current_target):
+    components = current_target.get("components")
+    if components is None:
+        return []
+    return [("dep.{}".format(dependency),
+             devpipeline.config.inputs.content_hash(stamp_path(
+                 components[dependency].get("dp.build_dir"))))
+            for dependency in current_target.get("dependencies", [])]
+
+
+def target_stamps(current_target):
+    """
+    Create the Stamps for the target being processed.
+
+    Arguments
+    current_target -- information about the current target
+    """
+    target = current_target["current_config"]
+    build_dir = target.get("dp.build_dir")
+    mode = target.get("build_fingerprint", "mtime")
+    if mode not in _FINGERPRINT_MODES:
+        raise Exception("Unknown build_fingerprint '{}' for {}".format(
+            mode, current_target["current_target"]))
+
+    items = [("src", source_fingerprint(target.get("dp.src_dir"),
+                                        skip=[build_dir],
+                                        content=_FINGERPRINT_MODES[mode]))]
+    items.extend(_dependency_items(current_target))
+    items.extend(sorted((key, value) for key, value in target.items()
+                        if key.startswith(_ENV_PREFIXES)))
+    return Stamps(build_dir, devpipeline.config.inputs.hash_items(items),
+                  current_target.get("force", False))
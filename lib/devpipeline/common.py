@@ -4,14 +4,19 @@
 the dev-pipeline utility"""
 
 import argparse
+import collections.abc
 import errno
 import os
-import re
 import sys
 
 import devpipeline.config.config
 import devpipeline.executor
+import devpipeline.history
+import devpipeline.jobserver
 import devpipeline.resolve
+import devpipeline.resources
+import devpipeline.scheduler
+import devpipeline.trace
 import devpipeline.version
 
 
@@ -51,19 +56,17 @@ class GenericTool(object):
 
 
 def _set_env(env, key, value):
-    real_key = key.upper()
     if value:
-        env[real_key] = value
+        env[key] = value
     else:
-        del env[real_key]
+        env.pop(key, None)
 
 
 def _append_env(env, key, value):
-    real_key = key.upper()
-    if real_key in env:
-        env[real_key] += "{}{}".format(os.pathsep, value)
+    if key in env:
+        env[key] += "{}{}".format(os.pathsep, value)
     else:
-        env[real_key] = value
+        env[key] = value
 
 
 _ENV_SUFFIXES = {
@@ -71,28 +74,124 @@ _ENV_SUFFIXES = {
     "append": _append_env
 }
 
-
-def create_target_environment(target):
-    ret = os.environ.copy()
-    pattern = re.compile(R"^env(?:_(\w+))?\.(\w+)")
-    for key, value in target.items():
-        matches = pattern.match(key)
-        if matches:
-            helper_fn = _ENV_SUFFIXES.get(matches.group(1))
-            if helper_fn:
-                helper_fn(ret, matches.group(2), value)
+# marks a variable removed from the base environment
+_REMOVED = object()
+
+
+class TargetEnvironment(collections.abc.MutableMapping):
+
+    """
+    A target's environment, stored as changes layered over a base
+    environment shared by every target.
+
+    The complete environment is only built when something needs all of it
+    (e.g., to start a process), and it's reused until the environment is
+    modified.  A target that doesn't change anything shares the base
+    environment itself, so the base must not be modified while it's in use.
+    """
+
+    __slots__ = ("_base", "_layer", "_materialized")
+
+    def __init__(self, base, layer=None):
+        """
+        Arguments
+        base -- the environment being modified (e.g., os.environ)
+        layer -- a dictionary of variables changed from base
+        """
+        self._base = base
+        self._layer = {} if layer is None else layer
+        self._materialized = None
+
+    def __getitem__(self, key):
+        value = self._layer.get(key)
+        if value is None:
+            return self._base[key]
+        if value is _REMOVED:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        value = self._layer.get(key)
+        if value is None:
+            return key in self._base
+        return value is not _REMOVED
+
+    def __setitem__(self, key, value):
+        self._layer[key] = value
+        self._materialized = None
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._layer[key] = _REMOVED
+        self._materialized = None
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def items(self):
+        return self.materialize().items()
+
+    def copy(self):
+        """Get an independent copy that shares the base environment."""
+        return TargetEnvironment(self._base, dict(self._layer))
+
+    def materialize(self):
+        """Get the complete environment as a dictionary.  The result is
+        shared, so it must not be modified."""
+        if self._materialized is None:
+            if not self._layer and isinstance(self._base, dict):
+                self._materialized = self._base
+            else:
+                ret = dict(self._base)
+                for key, value in self._layer.items():
+                    if value is _REMOVED:
+                        ret.pop(key, None)
+                    else:
+                        ret[key] = value
+                self._materialized = ret
+        return self._materialized
+
+
+def create_target_environment(target, base=None):
+    """
+    Create the environment commands for a target run in.
+
+    Arguments
+    target -- the target's component
+    base -- the environment to start from.  If None, os.environ is used.
+    """
+    ret = TargetEnvironment(os.environ if base is None else base)
+    for suffix, variable, option in target.environment:
+        helper_fn = _ENV_SUFFIXES.get(suffix)
+        if helper_fn:
+            helper_fn(ret, variable, target[option])
     return ret
 
 
 class TargetTool(GenericTool):
 
-    """A devpipeline tool that executes a list of tasks against a list of targets"""
+    """
+    A devpipeline tool that executes a list of tasks against a list of targets
 
-    def __init__(self, tasks=None, executors=True, *args, **kwargs):
+    Tasks in scm_tasks don't depend on the order targets are processed in, so
+    they can run from their own pool (see --scm-jobs) ahead of the remaining
+    tasks.  A target's tasks only start once its scm_tasks have finished.  If
+    every scm task has an asynchronous attribute (a coroutine function taking
+    the same argument), the pool runs those coroutines on a single event loop
+    instead of using a thread per target.
+    """
+
+    def __init__(self, tasks=None, executors=True, *args, scm_tasks=None,
+                 **kwargs):
         super().__init__(*args, **kwargs)
         self.add_argument("targets", nargs="*",
                           help="The targets to operate on")
-        self.tasks = tasks
+        self.tasks = tasks or []
+        self.scm_tasks = scm_tasks or []
         if executors:
             self.add_argument("--executor",
                               help="The amount of verbosity to use.  Options "
@@ -100,21 +199,85 @@ class TargetTool(GenericTool):
                                    "information), \"verbose\" (print "
                                    "additional information), \"dry-run\" "
                                    "(print commands to execute, but don't run"
-                                   " them), and \"silent\" (print nothing).  "
+                                   " them), \"log\" (write everything to a "
+                                   "log file per target under the build root"
+                                   " and only print the end of a failed "
+                                   "command's output), and \"silent\" (print"
+                                   " nothing).  "
                                    "Regardless of this option, errors are "
                                    "always printed.",
                               default="quiet")
+            self.add_argument("--jobs", type=int,
+                              help="The maximum number of targets to process "
+                                   "at the same time.  A target is only "
+                                   "started once all of its dependencies "
+                                   "have finished.",
+                              default=1)
+            if self.scm_tasks:
+                self.add_argument("--scm-jobs", type=int,
+                                  help="The maximum number of repositories to "
+                                       "check out or update at the same time. "
+                                       " This is independent of --jobs.",
+                                  default=1)
+            if self.tasks:
+                self.add_argument("--load-jobs", type=int,
+                                  help="The maximum number of jobs (e.g., "
+                                       "compiler processes) to run across "
+                                       "every target being built.  Build "
+                                       "tools that support a GNU make "
+                                       "jobserver share a single pool of "
+                                       "this size.  If unset, each build "
+                                       "tool decides for itself.")
+                self.add_argument("--cpu-budget", type=float,
+                                  help="The number of cores targets can use "
+                                       "at the same time, based on each "
+                                       "target's dp.cpu_weight (1 by "
+                                       "default).  Targets wait until there's"
+                                       " room for them, up to --jobs at "
+                                       "once.  Requires --jobs.")
+                self.add_argument("--mem-budget", type=float, metavar="GIB",
+                                  help="The memory (in GiB) targets can use "
+                                       "at the same time, based on each "
+                                       "target's dp.mem_weight (0 by "
+                                       "default).  Requires --jobs.")
+                self.add_argument("--watch-host", action="store_true",
+                                  help="Hold targets back while the host's "
+                                       "load average or available memory "
+                                       "(from /proc) leaves no room for "
+                                       "them.  Without --cpu-budget, the "
+                                       "number of available cores is used.  "
+                                       "Requires --jobs.")
+            self.add_argument("--trace", metavar="FILE",
+                              help="Record how long each step takes and "
+                                   "write it to FILE in the Chrome "
+                                   "trace-event format.")
+            self.add_argument("--force", action="store_true",
+                              help="Run every step, even those dev-pipeline "
+                                   "believes are already up to date.")
             self.verbosity = True
             self.executor = None
-            self.components = None
-            self.targets = None
+            self.jobs = 1
+            self.scm_jobs = 1
+            self.force = False
+            self.load_jobs = None
+            self.budget = None
         else:
             self.verbosity = False
+        self.components = None
+        self.targets = None
+        self.dependency_graph = None
+        self.jobserver = None
+        self.tracer = devpipeline.trace.NULL_TRACER
+        self.history = None
+        self.weights = None
+        self.environment = None
 
     def execute(self, *args, **kwargs):
         parsed_args = self.parser.parse_args(*args, **kwargs)
 
         self.components = devpipeline.config.config.update_cache()
+        # every target's environment is layered over this
+        self.environment = dict(os.environ)
         if parsed_args.targets:
             self.targets = parsed_args.targets
         else:
@@ -127,30 +290,203 @@ class TargetTool(GenericTool):
                     "{} isn't a valid executor".format(parsed_args.executor))
             else:
                 self.executor = helper_fn()
-        self.process()
+            self.jobs = _get_job_count(parsed_args.jobs)
+            if self.scm_tasks:
+                self.scm_jobs = _get_job_count(parsed_args.scm_jobs)
+            self.force = parsed_args.force
+            if self.tasks and parsed_args.load_jobs is not None:
+                self.load_jobs = _get_job_count(parsed_args.load_jobs)
+            if self.tasks:
+                self.budget = _make_budget(parsed_args)
+                if self.budget and (self.jobs == 1):
+                    # targets already run one at a time
+                    self.executor.warning(
+                        "--cpu-budget, --mem-budget, and --watch-host have "
+                        "no effect without --jobs")
+                    self.budget = None
+            if self.components.invalidated:
+                self.executor.message("Configuration changed for: {}".format(
+                    ", ".join(sorted(self.components.invalidated))))
+                devpipeline.config.config.clear_invalidated(
+                    devpipeline.config.config.find_config(),
+                    self.components.invalidated)
+        if self.verbosity and self.load_jobs:
+            self.jobserver = devpipeline.jobserver.JobServer(self.load_jobs)
+        if self.verbosity and parsed_args.trace:
+            self.tracer = devpipeline.trace.Tracer()
+        if self.verbosity:
+            self.history = devpipeline.history.load_history(self.components)
+        try:
+            self.process()
+        finally:
+            if self.history:
+                error = self.history.save()
+                if error:
+                    self.executor.warning(
+                        "Unable to save build history: {}".format(error))
+            if self.jobserver:
+                self.jobserver.close()
+                self.jobserver = None
+            if self.verbosity and parsed_args.trace:
+                self.tracer.write(parsed_args.trace)
+
+    def get_dependency_graph(self):
+        """Get the dependency graph for the requested targets, building it
+        the first time it's needed."""
+        if self.dependency_graph is None:
+            self.dependency_graph = devpipeline.resolve.build_graph(
+                self.targets, self.components)
+        return self.dependency_graph
 
     def process(self):
-        build_order = devpipeline.resolve.order_dependencies(
-            self.targets, self.components)
+        build_order = self.get_dependency_graph().order()
         self.process_targets(build_order)
 
     def process_targets(self, build_order):
         """Calls the tasks with the appropriate options for each of the targets"""
-        config_info = {
-            "executor": self.executor
+        with self.tracer.span(devpipeline.trace.TOOL_TRACK, "process_targets",
+                              category="tool",
+                              args={"targets": len(build_order)}):
+            if self.scm_jobs > 1:
+                self._process_with_scm_pool(build_order)
+            else:
+                tasks = self.scm_tasks + self.tasks
+                self._process_all(
+                    build_order,
+                    lambda target: self._run_tasks(target, tasks,
+                                                   self.executor))
+
+    def get_weights(self):
+        """Get a dictionary of the expected cost of every target in the
+        dependency graph, based on dp.cost options and recorded history."""
+        if self.weights is None:
+            history = self.history or devpipeline.history.load_history(
+                self.components)
+            self.weights = devpipeline.history.target_weights(
+                self.get_dependency_graph().targets(), self.components,
+                history.estimates() if history else {})
+        return self.weights
+
+    def _get_priorities(self):
+        # Start the targets holding up the most work first
+        return self.get_dependency_graph().critical_paths(
+            self.get_weights().get)
+
+    def _process_all(self, build_order, target_fn):
+        # A failed target only stops its dependents, whether or not targets
+        # run concurrently.  Priorities don't matter one target at a time, so
+        # a serial run follows build_order.
+        priorities = None
+        requirements = None
+        if self.jobs > 1:
+            priorities = self._get_priorities()
+            if self.budget:
+                requirements = devpipeline.resources.target_requirements(
+                    build_order, self.components)
+        scheduler = devpipeline.scheduler.Scheduler(
+            build_order, self.get_dependency_graph(), priorities)
+        if not scheduler.run(target_fn, self.jobs, self.budget,
+                             requirements):
+            raise Exception(devpipeline.scheduler.describe_failures(scheduler))
+
+    def _make_scm_pool(self):
+        # pylint: disable=import-outside-toplevel
+        if all(getattr(task, "asynchronous", None)
+               for task in self.scm_tasks):
+            import devpipeline.aio
+
+            return (devpipeline.aio.CoroutinePool(self.scm_jobs),
+                    self._run_buffered_async)
+
+        import concurrent.futures
+
+        return (concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.scm_jobs), self._run_buffered)
+
+    def _process_with_scm_pool(self, build_order):
+        pool, run_fn = self._make_scm_pool()
+        try:
+            scm_futures = {
+                target: pool.submit(run_fn, target, self.scm_tasks)
+                for target in build_order
+            }
+
+            def _run_remaining(target):
+                # raises if the scm tasks failed
+                scm_futures[target].result()
+                if self.tasks:
+                    self._run_tasks(target, self.tasks, self.executor)
+
+            self._process_all(build_order, _run_remaining)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _run_buffered(self, target, tasks):
+        executor = self.executor.buffered()
+        try:
+            self._run_tasks(target, tasks, executor)
+        finally:
+            executor.flush()
+
+    async def _run_buffered_async(self, target, tasks):
+        executor = self.executor.buffered()
+        try:
+            config_info = self._start_target(target, executor)
+            with self.tracer.span(target, target, category="target"):
+                for task in tasks:
+                    await task.asynchronous(config_info)
+            config_info["executor"].message("")
+        finally:
+            executor.flush()
+
+    def _start_target(self, target, executor):
+        """Announce a target and get the information its tasks are called
+        with."""
+        current = self.components[target]
+        executor = executor.for_target(target, current)
+        executor.message("  {}".format(target))
+        executor.message("-" * (4 + len(target)))
+        return {
+            "executor": executor,
+            "current_target": target,
+            "current_config": current,
+            "env": create_target_environment(current, self.environment),
+            "components": self.components,
+            "dependencies": self.get_dependency_graph().dependencies[target],
+            "force": self.force,
+            "jobserver": self.jobserver,
+            "tracer": self.tracer,
+            "history": self.history
         }
-        for target in build_order:
-            self.executor.message("  {}".format(target))
-            self.executor.message("-" * (4 + len(target)))
-            current = self.components[target]
-            env = create_target_environment(current)
-
-            config_info["current_target"] = target
-            config_info["current_config"] = current
-            config_info["env"] = env
-            for task in self.tasks:
+
+    def _run_tasks(self, target, tasks, executor):
+        config_info = self._start_target(target, executor)
+        with self.tracer.span(target, target, category="target"):
+            for task in tasks:
                 task(config_info)
-            self.executor.message("")
+        config_info["executor"].message("")
+
+
+def _get_job_count(jobs):
+    if jobs < 1:
+        raise Exception("{} isn't a valid job count".format(jobs))
+    return jobs
+
+
+def _make_budget(parsed_args):
+    cpu = parsed_args.cpu_budget
+    memory = parsed_args.mem_budget
+    for value in (cpu, memory):
+        if (value is not None) and (value <= 0):
+            raise Exception("{} isn't a valid budget".format(value))
+    monitor = None
+    if parsed_args.watch_host:
+        monitor = devpipeline.resources.HostMonitor()
+        if cpu is None:
+            cpu = devpipeline.resources.default_cpu_budget()
+    if (cpu is None) and (memory is None):
+        return None
+    return devpipeline.resources.Budget(cpu, memory, monitor)
 
 
 def execute_tool(tool, args):
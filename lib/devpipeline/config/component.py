@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+"""Read-only snapshots of component configuration."""
+
+import collections.abc
+import configparser
+import re
+
+# env.NAME sets an environment variable; env_SUFFIX.NAME modifies it
+_ENV_OPTION = re.compile(R"^env(?:_(\w+))?\.(\w+)")
+
+
+def _environment_options(options):
+    ret = []
+    for option in options:
+        if option.startswith("env"):
+            matches = _ENV_OPTION.match(option)
+            if matches:
+                ret.append((matches.group(1), matches.group(2).upper(),
+                            option))
+    return tuple(ret)
+
+
+class Component(collections.abc.Mapping):
+
+    """
+    The fully interpolated options of a single component.
+
+    This acts like a read-only configparser section, but every value
+    (including those inherited from DEFAULT) is resolved once when the
+    snapshot is created, so reading an option is a plain dictionary lookup.
+    Option names are lowercase, matching configparser.
+
+    The environment attribute lists the options that modify a target's
+    environment, in order, as (suffix, variable, option) tuples.  suffix is
+    None for options that set a variable (env.NAME) and the suffix for
+    options that modify one (e.g., "append" for env_append.NAME).  It's
+    found once when the component is created so targets don't have to scan
+    every option.
+    """
+
+    __slots__ = ("name", "_values", "_errors", "environment")
+
+    def __init__(self, name, values, errors=None, environment=None):
+        """
+        Arguments
+        name -- the name of the component
+        values -- a dictionary of option names to their interpolated values
+        errors -- a dictionary of option names to the exception raised while
+                  interpolating them.  Reading one of these options raises
+                  the exception, just like a live configparser section.
+        environment -- the options that modify the environment (see the
+                       environment attribute).  If None, they're found by
+                       checking every option.
+        """
+        self.name = name
+        self._values = values
+        self._errors = errors or {}
+        if environment is None:
+            environment = _environment_options(self)
+        self.environment = environment
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            error = self._errors.get(key)
+            if error:
+                raise error
+            raise
+
+    def __contains__(self, key):
+        return (key in self._values) or (key in self._errors)
+
+    def __iter__(self):
+        yield from self._values
+        yield from self._errors
+
+    def __len__(self):
+        return len(self._values) + len(self._errors)
+
+    def get(self, key, fallback=None):
+        # pylint: disable=arguments-differ
+        """Get the value of key, or fallback if the option isn't set."""
+        try:
+            return self[key]
+        except KeyError:
+            return fallback
+
+
+class Components(collections.abc.Mapping):
+
+    """
+    A read-only collection of Component objects, indexed by name.
+
+    The invalidated attribute holds the names of components whose inputs
+    changed and haven't been reported yet (see
+    devpipeline.config.config.clear_invalidated), or None if that isn't
+    known.
+    """
+
+    __slots__ = ("_components", "invalidated")
+
+    def __init__(self, components):
+        self._components = components
+        self.invalidated = None
+
+    def __getitem__(self, key):
+        return self._components[key]
+
+    def __contains__(self, key):
+        return key in self._components
+
+    def __iter__(self):
+        return iter(self._components)
+
+    def __len__(self):
+        return len(self._components)
+
+    def sections(self):
+        """Get a list of every component name."""
+        return list(self._components)
+
+
+def make_component(config, section):
+    """
+    Create a Component from a section of a configparser object.
+
+    Arguments
+    config -- a parsed build configuration
+    section -- the name of the section to use
+    """
+    values = {}
+    errors = {}
+    for key, raw_value in config.items(section, raw=True):
+        if "$" in raw_value:
+            try:
+                values[key] = config.get(section, key)
+            except configparser.Error as failure:
+                errors[key] = failure
+        else:
+            # nothing to interpolate, so share the string with the parser
+            values[key] = raw_value
+    return Component(section, values, errors)
+
+
+def make_components(config):
+    """
+    Create a Components snapshot from a configparser object.
+
+    Arguments
+    config -- a parsed build configuration
+    """
+    return Components(collections.OrderedDict(
+        (section, make_component(config, section))
+        for section in config.sections()))
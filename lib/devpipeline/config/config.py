@@ -4,8 +4,14 @@
 
 import os.path
 import os
+import re
 
+import devpipeline.config.component
+import devpipeline.config.inputs
+import devpipeline.config.override
 import devpipeline.config.parser
+import devpipeline.config.paths
+import devpipeline.config.snapshot
 import devpipeline.version
 
 
@@ -92,11 +98,214 @@ def _create_cache(raw_path, cache_dir, cache_file):
         "{} doesn't look like a dev-pipeline folder".format(cache_dir))
 
 
+# ExtendedInterpolation lets a value refer to another section with
+# ${section:option}
+_SECTION_REFERENCE = re.compile(R"\$\{([^}:]+):")
+
+
+def _scan_sections(config):
+    """
+    Hash the raw values of every section and find references between
+    sections.
+
+    Returns a tuple of a dictionary mapping each section to its hash and a
+    dictionary mapping a section to the set of sections that refer to it.
+    """
+    hashes = {}
+    referenced_by = {}
+    for section in config.sections():
+        items = config.items(section, raw=True)
+        hashes[section] = devpipeline.config.inputs.hash_items(items)
+        for _, value in items:
+            for reference in _SECTION_REFERENCE.findall(value):
+                referenced_by.setdefault(reference, set()).add(section)
+    return (hashes, referenced_by)
+
+
+def _changed_sections(hashes, referenced_by, previous_hashes):
+    changed = set(section for section, section_hash in hashes.items()
+                  if previous_hashes.get(section) != section_hash)
+    # anything referring to a changed section may have changed as well
+    pending = list(changed)
+    while pending:
+        for section in referenced_by.get(pending.pop(), ()):
+            if section not in changed:
+                changed.add(section)
+                pending.append(section)
+    return changed
+
+
+def _modifier_targets(config):
+    """Find the targets that use profiles and the targets using each
+    override."""
+    profiled = []
+    overrides = {}
+    for section in config.sections():
+        if config.get(section, "dp.profile_name", fallback=None):
+            profiled.append(section)
+        override_list = config.get(section, "dp.overrides", fallback=None)
+        if override_list:
+            for override in split_list(override_list):
+                overrides.setdefault(override, []).append(section)
+    return (profiled, overrides)
+
+
+def _override_path(override_root, override, target):
+    return "{}/{}/{}.conf".format(override_root, override, target)
+
+
+def _list_override_files(override_root, override, targets):
+    return [name for name in devpipeline.config.override.list_overrides(
+        override_root, override) if name in targets]
+
+
+def _track_modifiers(profiled, overrides):
+    """
+    Record the profile and override files consulted by targets.
+
+    Arguments
+    profiled -- a list of targets that use profiles
+    overrides -- a dictionary mapping an override name to the list of targets
+                 using it
+    """
+    profile_path = devpipeline.config.paths.get_profile_path()
+    override_root = devpipeline.config.paths.get_overrides_root()
+    tracked_overrides = {}
+    for override, targets in overrides.items():
+        tracked_overrides[override] = {
+            "targets": targets,
+            "files": {
+                target: devpipeline.config.inputs.record(
+                    _override_path(override_root, override, target))
+                for target in _list_override_files(override_root, override,
+                                                   set(targets))
+            }
+        }
+    return {
+        "profile_path": profile_path,
+        "profile": devpipeline.config.inputs.record(profile_path)
+                   if profiled else None,
+        "profiled": profiled,
+        "override_root": override_root,
+        "overrides": tracked_overrides
+    }
+
+
+def _input_changed(records, key, path, refreshed):
+    """
+    Determine if a tracked file changed.  If it was only touched, its record
+    is updated in place and its path added to refreshed, so the new record
+    can be saved.
+
+    Arguments
+    records -- a dictionary holding the file's record
+    key -- the file's key in records
+    path -- the file to check
+    refreshed -- a list of files whose records were updated
+    """
+    previous = records.get(key)
+    is_changed, current = devpipeline.config.inputs.check(path, previous)
+    if current != previous:
+        records[key] = current
+        refreshed.append(path)
+    return is_changed
+
+
+def _modifier_invalidations(tracked, refreshed):
+    """Find the targets affected by changes to profile or override files
+    since they were tracked."""
+    invalidated = set()
+    if tracked["profiled"]:
+        profile_path = devpipeline.config.paths.get_profile_path()
+        if (profile_path != tracked["profile_path"]) or \
+                _input_changed(tracked, "profile", profile_path, refreshed):
+            invalidated.update(tracked["profiled"])
+
+    override_root = devpipeline.config.paths.get_overrides_root()
+    for override, info in tracked["overrides"].items():
+        if override_root != tracked["override_root"]:
+            invalidated.update(info["targets"])
+        else:
+            previous = info["files"]
+            current = _list_override_files(override_root, override,
+                                           set(info["targets"]))
+            for target in previous.keys() | set(current):
+                if _input_changed(
+                        previous, target,
+                        _override_path(override_root, override, target),
+                        refreshed):
+                    invalidated.add(target)
+    return invalidated
+
+
+def _write_snapshot(config, cache_path, known_inputs=None):
+    """
+    Write the snapshot for a build cache and return its components.
+
+    Sections that haven't changed since the previous snapshot are copied
+    from it instead of being interpolated again.  Targets affected by a
+    change are added to those the previous snapshot was still waiting to
+    report (see clear_invalidated).
+
+    Arguments
+    config -- the contents of the build cache
+    cache_path -- the build cache
+    known_inputs -- records (see devpipeline.config.inputs.record) of inputs
+                    that config is known to reflect.  Other inputs are
+                    recorded as they are now.
+    """
+    cache_path = os.path.abspath(cache_path)
+    path = devpipeline.config.snapshot.snapshot_path(cache_path)
+    previous = devpipeline.config.snapshot.read_snapshot(path)
+    hashes, referenced_by = _scan_sections(config)
+    if previous:
+        changed = _changed_sections(hashes, referenced_by,
+                                    previous.metadata["sections"])
+    else:
+        changed = hashes.keys()
+
+    def _get_blob(section):
+        if section in changed:
+            return devpipeline.config.snapshot.serialize_component(
+                devpipeline.config.component.make_component(config, section))
+        return previous.blob(section)
+
+    invalidated = set()
+    if previous:
+        invalidated.update(previous.metadata.get("invalidated", ()))
+        invalidated.update(changed)
+        invalidated.update(
+            _modifier_invalidations(previous.metadata["modifiers"], []))
+        invalidated.intersection_update(hashes)
+
+    profiled, overrides = _modifier_targets(config)
+    inputs = [config.get("DEFAULT", "dp.build_config"), cache_path]
+    devpipeline.config.snapshot.write_snapshot(
+        path,
+        [(section, _get_blob(section)) for section in config.sections()],
+        {
+            "inputs": {
+                input_path: (known_inputs or {}).get(input_path) or
+                devpipeline.config.inputs.record(input_path)
+                for input_path in inputs
+            },
+            "sections": hashes,
+            "modifiers": _track_modifiers(profiled, overrides),
+            "invalidated": sorted(invalidated)
+        })
+    components = devpipeline.config.snapshot.read_snapshot(path).components()
+    if previous:
+        components.invalidated = invalidated
+    return components
+
+
 def _write_config(config, cache_dir, cache_file):
     if not os.path.isdir(cache_dir):
         os.makedirs(cache_dir)
-    with open("{}/{}".format(cache_dir, cache_file), 'w') as output_file:
+    cache_path = "{}/{}".format(cache_dir, cache_file)
+    with open(cache_path, 'w') as output_file:
         config.write(output_file)
+    return _write_snapshot(config, cache_path)
 
 
 def _set_list(config, kwargs_key, config_key, **kwargs):
@@ -113,6 +322,14 @@ _CONFIG_MODIFIERS = [
 ]
 
 
+def _process_config(raw_path, cache_dir, cache_file, **kwargs):
+    devpipeline.config.override.reset_index()
+    config = _create_cache(raw_path, cache_dir, cache_file)
+    for modifier in _CONFIG_MODIFIERS:
+        modifier(config, **kwargs)
+    return (config, _write_config(config, cache_dir, cache_file))
+
+
 def process_config(raw_path, cache_dir, cache_file, **kwargs):
     """
     Read a build configuration and create it, storing the result in a build
@@ -125,11 +342,7 @@ def process_config(raw_path, cache_dir, cache_file, **kwargs):
                   cache_dir.
     **kwargs -- additional arguments used by some modifiers
     """
-    config = _create_cache(raw_path, cache_dir, cache_file)
-    for modifier in _CONFIG_MODIFIERS:
-        modifier(config, **kwargs)
-    _write_config(config, cache_dir, cache_file)
-    return config
+    return _process_config(raw_path, cache_dir, cache_file, **kwargs)[0]
 
 
 def find_config():
@@ -171,11 +384,59 @@ def _is_outdated(cache_file, cache_config):
     return False
 
 
-def update_cache(force=False,cache_file=None):
+def _changed_inputs(snapshot, refreshed):
+    """Get the inputs (the build configuration and the cache itself) that
+    changed since a snapshot was written."""
+    inputs = snapshot.metadata["inputs"]
+    return [input_path for input_path in list(inputs)
+            if _input_changed(inputs, input_path, input_path, refreshed)]
+
+
+def _load_snapshot(snapshot, cache_path, refreshed):
+    """
+    Get the components from an up-to-date snapshot, noting any targets
+    affected by changes to profiles or overrides.  The snapshot is rewritten
+    if anything it tracks changed or was touched.
+    """
+    metadata = snapshot.metadata
+    changed = _modifier_invalidations(metadata["modifiers"], refreshed)
+    invalidated = set(metadata.get("invalidated", ()))
+    if changed:
+        tracked = metadata["modifiers"]
+        metadata["modifiers"] = _track_modifiers(
+            tracked["profiled"],
+            {override: info["targets"]
+             for override, info in tracked["overrides"].items()})
+        invalidated.update(changed)
+        invalidated.intersection_update(snapshot.sections())
+        metadata["invalidated"] = sorted(invalidated)
+    if changed or refreshed:
+        devpipeline.config.snapshot.write_snapshot(
+            devpipeline.config.snapshot.snapshot_path(cache_path),
+            [(section, snapshot.blob(section))
+             for section in snapshot.sections()],
+            metadata)
+    components = snapshot.components()
+    components.invalidated = invalidated
+    return components
+
+
+def update_cache(force=False, cache_file=None):
     """
     Load a build cache, updating it if necessary.
 
-    A cache is considered outdated if any of its inputs have changed.
+    A cache is considered outdated if any of its inputs have changed.  The
+    result is a read-only snapshot of every component with all values
+    already interpolated.  If a binary snapshot of an up-to-date cache is
+    available it's used instead of parsing the cache, and components are
+    only decoded when they're accessed.
+
+    When a cache is regenerated, only sections whose inputs changed are
+    interpolated again.  The invalidated attribute of the result lists the
+    targets affected by changes to the build configuration, profiles, or
+    overrides.  Targets stay invalidated until clear_invalidated is called,
+    so loading the cache without reporting them (e.g., to print the build
+    order) doesn't lose them.
 
     Arguments
     force -- Consider a cache outdated regardless of whether its inputs have
@@ -183,13 +444,98 @@ def update_cache(force=False,cache_file=None):
     """
     if not cache_file:
         cache_file = find_config()
+    cache_path = os.path.abspath(cache_file)
+    # override files may have been added or removed since the last call
+    devpipeline.config.override.reset_index()
+    snapshot = None
+    changed = []
+    if not force:
+        # a long-running process (e.g., a daemon) keeps decoded components
+        # until the snapshot is replaced
+        snapshot = devpipeline.config.parser.read_cached(
+            devpipeline.config.snapshot.snapshot_path(cache_path),
+            devpipeline.config.snapshot.read_snapshot)
+        refreshed = []
+        if snapshot:
+            changed = _changed_inputs(snapshot, refreshed)
+            if not changed:
+                return _load_snapshot(snapshot, cache_path, refreshed)
     cache_config = devpipeline.config.parser.read_config(cache_file)
-    if force or _is_outdated(cache_file, cache_config):
-        return (process_config(
+    # The snapshot knows when the build configuration's contents changed,
+    # even if its modification time doesn't say so (e.g., a file restored
+    # with an older time).
+    if force or (cache_config.get("DEFAULT", "dp.build_config") in changed) \
+            or _is_outdated(cache_file, cache_config):
+        return _process_config(
             cache_config.get("DEFAULT", "dp.build_config"),
             os.path.dirname(cache_file), "build.cache",
             profiles=cache_config.get("DEFAULT", "dp.profile_name",
                                       fallback=None),
             overrides=cache_config.get("DEFAULT", "dp.overrides",
-                                       fallback=None)), True)
-    return cache_config
+                                       fallback=None))[1]
+    known_inputs = None
+    if snapshot:
+        # only the cache itself changed, so the build configuration's record
+        # still describes what the cache was generated from
+        known_inputs = {
+            input_path: record
+            for input_path, record in snapshot.metadata["inputs"].items()
+            if input_path not in changed
+        }
+    return _write_snapshot(cache_config, cache_path, known_inputs)
+
+
+def clear_invalidated(cache_file, targets):
+    """
+    Stop reporting targets as invalidated once they've been reported.
+    Targets invalidated since the cache was loaded aren't affected.
+
+    Arguments
+    cache_file -- the build cache
+    targets -- the targets that were reported
+    """
+    path = devpipeline.config.snapshot.snapshot_path(
+        os.path.abspath(cache_file))
+    snapshot = devpipeline.config.snapshot.read_snapshot(path)
+    if not snapshot:
+        return
+    invalidated = snapshot.metadata.get("invalidated", ())
+    remaining = [target for target in invalidated if target not in targets]
+    if len(remaining) != len(invalidated):
+        devpipeline.config.snapshot.write_snapshot(
+            path,
+            [(section, snapshot.blob(section))
+             for section in snapshot.sections()],
+            dict(snapshot.metadata, invalidated=remaining))
+
+
+def cache_inputs(cache_file):
+    """
+    Get the files and directories a build cache depends on: its build
+    configuration and every profile and override it uses.  Directories
+    holding overrides are included since adding a file to one can change
+    the cache.  Only paths that exist are returned.
+
+    This should be called after update_cache, since it relies on the cache's
+    snapshot being current.
+
+    Arguments
+    cache_file -- the build cache
+    """
+    cache_path = os.path.abspath(cache_file)
+    snapshot = devpipeline.config.parser.read_cached(
+        devpipeline.config.snapshot.snapshot_path(cache_path),
+        devpipeline.config.snapshot.read_snapshot)
+    if not snapshot:
+        return [cache_path]
+    ret = list(snapshot.metadata["inputs"])
+    tracked = snapshot.metadata["modifiers"]
+    if tracked["profile"]:
+        ret.append(tracked["profile_path"])
+    for override, info in tracked["overrides"].items():
+        override_dir = "{}/{}".format(tracked["override_root"], override)
+        if os.path.isdir(override_dir):
+            ret.append(override_dir)
+        ret.extend(_override_path(tracked["override_root"], override, target)
+                   for target in info["files"])
+    return [path for path in ret if os.path.exists(path)]
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+
+"""Detect changes to the files and values a build cache depends on."""
+
+import hashlib
+import os
+
+
+def fingerprint(path):
+    """
+    Get a cheap fingerprint of a file based on its metadata.  None is
+    returned if the file doesn't exist.
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def content_hash(path):
+    """Get a hash of a file's contents.  None is returned if the file can't
+    be read."""
+    try:
+        with open(path, "rb") as input_file:
+            return hashlib.sha1(input_file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def hash_items(items):
+    """Get a hash of a sequence of key/value string pairs."""
+    return hashlib.sha1("\0".join(
+        "{}\0{}".format(key, value) for key, value in items).encode(
+            "utf-8")).hexdigest()
+
+
+def record(path):
+    """
+    Record the state of a file so later changes can be detected.  None is
+    returned if the file doesn't exist.
+    """
+    file_fingerprint = fingerprint(path)
+    if file_fingerprint is None:
+        return None
+    return (file_fingerprint, content_hash(path))
+
+
+def check(path, previous):
+    """
+    Determine if a file has changed since previous was recorded.
+
+    A file whose metadata is unchanged is assumed to be unchanged; otherwise
+    its contents are compared, so touching a file doesn't count as a change.
+
+    Returns a tuple of whether the file changed and the record to keep for
+    it.  If the file was only touched, the record is updated so its contents
+    don't have to be compared again next time.
+
+    Arguments
+    path -- the file to check
+    previous -- the result of record() when the file was last used
+    """
+    file_fingerprint = fingerprint(path)
+    if (previous is None) or (file_fingerprint is None):
+        return (previous != file_fingerprint, previous)
+    if file_fingerprint == previous[0]:
+        return (False, previous)
+    file_hash = content_hash(path)
+    if file_hash != previous[1]:
+        return (True, previous)
+    return (False, (file_fingerprint, file_hash))
+
+
+def changed(path, previous):
+    """Determine if a file has changed since previous was recorded (see
+    check)."""
+    return check(path, previous)[0]
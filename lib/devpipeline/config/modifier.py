@@ -65,36 +65,34 @@ def modify(value, config, key, separator):
     return value
 
 
-def _apply_profiles(value, current_target, key, separator):
-    def _apply_values(profile_name, profile_config):
-        # pylint: disable=unused-argument
-        nonlocal value
-        value = modify(value, profile_config, key, separator)
-
+def _profile_sources(current_target, sources):
     devpipeline.config.profile.apply_profiles(
-        current_target["current_config"], _apply_values)
-    return value
-
+        current_target["current_config"],
+        lambda profile_name, profile_config: sources.append(profile_config))
 
-def _apply_overrides(value, current_target, key, separator):
-    def _apply_values(overrides, values):
-        # pylint: disable=unused-argument
-        nonlocal value
-        value = modify(value, values, key, separator)
 
+def _override_sources(current_target, sources):
     devpipeline.config.override.apply_overrides(
         current_target["current_config"],
         current_target["current_target"],
-        _apply_values)
-    return value
+        lambda overrides, values: sources.append(values))
 
 
-_MODIFY_FUNCTIONS = [
-    _apply_profiles,
-    _apply_overrides
+_SOURCE_FUNCTIONS = [
+    _profile_sources,
+    _override_sources
 ]
 
 
+def _get_sources(current_target):
+    """Get every configuration that can modify a target's values, in the
+    order modifications should be applied."""
+    sources = [current_target["current_config"]]
+    for source_fn in _SOURCE_FUNCTIONS:
+        source_fn(current_target, sources)
+    return sources
+
+
 def modify_everything(value, current_target, key, separator):
     """
     Modify a value using all possible modifiers.
@@ -107,7 +105,61 @@ def modify_everything(value, current_target, key, separator):
     key -- the option being modified
     separator -- a value to use for any alterations that require concatination
     """
-    value = modify(value, current_target["current_config"], key, separator)
-    for modifier in _MODIFY_FUNCTIONS:
-        value = modifier(value, current_target, key, separator)
+    for source in _get_sources(current_target):
+        value = modify(value, source, key, separator)
     return value
+
+
+def _index_options(config, prefix, keys):
+    """
+    Find the options config sets for keys.
+
+    Returns a dictionary mapping a key to the options present for it, indexed
+    by modifier name (None for the unmodified option).  Keys without any
+    options are not included.
+    """
+    start = "{}.".format(prefix)
+    ret = {}
+    for option in config:
+        if option.startswith(start):
+            name = option[len(start):]
+            if name in keys:
+                ret.setdefault(name, {})[None] = option
+            else:
+                key, _, modifier = name.rpartition(".")
+                if (modifier in _MODIFIERS) and (key in keys):
+                    ret.setdefault(key, {})[modifier] = option
+    return ret
+
+
+def modify_all(prefix, current_target, args_dict):
+    """
+    Modify every option in args_dict using all possible modifiers.
+
+    This produces the same values as calling modify_everything for each
+    option, but each configuration is only scanned once, so the cost depends
+    on the options that are actually set instead of every option that could
+    be.
+
+    Arguments
+    prefix -- the prefix for each option (e.g., "cmake")
+    current_target -- information about the currrent target being processed
+    args_dict -- a dictionary mapping option names (without prefix) to the
+                 separator used for concatination alterations
+
+    Returns a dictionary mapping every key in args_dict to its value.
+    """
+    values = dict.fromkeys(args_dict)
+    sources = _get_sources(current_target)
+    for position, source in enumerate(sources):
+        for key, options in _index_options(source, prefix, args_dict).items():
+            # only the target's own configuration provides initial values;
+            # everything else can only modify them
+            if (position == 0) and (None in options):
+                values[key] = source.get(options[None])
+            for modifier in _MODIFIER_ORDER:
+                mod_key = options.get(modifier)
+                if mod_key:
+                    values[key] = _MODIFIERS[modifier](
+                        args_dict[key], values[key], source.get(mod_key))
+    return values
@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 
-import os.path
+import os
 import sys
 
 import devpipeline.config.parser
@@ -20,25 +20,92 @@ _OVERRIDE_VALUES = {
 }
 
 
+def _read_override_values(path):
+    ret = {}
+    parser = devpipeline.config.parser.read_config(path)
+    for section in parser.sections():
+        suffix = _OVERRIDE_VALUES.get(section)
+        if suffix:
+            _add_override_values(parser[section], suffix, ret)
+        else:
+            print("Warning: override file {} has unknown section '{}'".
+                  format(path, section), file=sys.stderr)
+    return ret
+
+
 def read_override(path):
+    values = devpipeline.config.parser.read_cached(
+        path, _read_override_values)
+    if values is None:
+        return {}
+    return values
+
+
+# Override directory -> {package: values, or None until it's read}.  Most
+# targets don't have an override file, so each directory is listed once
+# instead of checking for every target's file.
+_INDEX = {}
+
+
+def _scan_overrides(override_dir):
+    try:
+        with os.scandir(override_dir) as entries:
+            names = [entry.name for entry in entries]
+    except OSError:
+        return {}
     ret = {}
-    if os.path.isfile(path):
-        parser = devpipeline.config.parser.read_config(path)
-        for section in parser.sections():
-            suffix = _OVERRIDE_VALUES.get(section)
-            if suffix:
-                _add_override_values(parser[section], suffix, ret)
-            else:
-                print("Warning: override file {} has unknown section '{}'".
-                      format(path, section), file=sys.stderr)
+    for name in names:
+        package, extension = os.path.splitext(name)
+        if extension == ".conf":
+            ret[package] = None
     return ret
 
 
+def _get_index(base_dir, override):
+    override_dir = "{}/{}".format(base_dir, override)
+    index = _INDEX.get(override_dir)
+    if index is None:
+        # scanning twice from different threads is harmless
+        index = _scan_overrides(override_dir)
+        _INDEX[override_dir] = index
+    return index
+
+
+def list_overrides(base_dir, override):
+    """
+    Get the packages with a file in an override directory.  The directory is
+    only listed the first time it's needed (see reset_index).
+
+    Arguments
+    base_dir -- the overrides root (see
+                devpipeline.config.paths.get_overrides_root)
+    override -- the name of the override
+    """
+    return list(_get_index(base_dir, override))
+
+
+def reset_index():
+    """Forget which override files exist and what they contain, so they're
+    checked again the next time they're needed."""
+    _INDEX.clear()
+
+
+def _get_override(base_dir, override, package):
+    index = _get_index(base_dir, override)
+    if package not in index:
+        return {}
+    values = index[package]
+    if values is None:
+        values = read_override("{}/{}/{}.conf".format(base_dir, override,
+                                                      package))
+        index[package] = values
+    return values
+
+
 def read_all_overrides(base_dir, override_list, package, found_fn):
     count = 0
     for override in override_list:
-        path = "{}/{}/{}.conf".format(base_dir, override, package)
-        values = read_override(path)
+        values = _get_override(base_dir, override, package)
         if values:
             found_fn(override, values)
             count += 1
@@ -3,6 +3,9 @@
 """Manage reading and writing configurations to disk."""
 
 import configparser
+import os
+import stat
+import threading
 
 
 def _make_parser():
@@ -22,6 +25,64 @@ def read_config(path):
     return parser
 
 
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _file_key(path):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def read_cached(path, read_fn=read_config):
+    """
+    Read a file, reusing the result of an earlier read if the file hasn't
+    changed since.
+
+    Results are shared by every caller, so they should be treated as
+    read-only.  None is returned if path isn't a regular file.
+
+    Arguments
+    path -- the location to deserialize
+    read_fn -- the function used to read path when there's no usable cached
+               result.  Results from different functions are cached
+               separately.
+    """
+    file_key = _file_key(path)
+    if not file_key:
+        return None
+    cache_key = (path, read_fn)
+    with _CACHE_LOCK:
+        entry = _CACHE.get(cache_key)
+    if entry and (entry[0] == file_key):
+        return entry[1]
+    value = read_fn(path)
+    with _CACHE_LOCK:
+        _CACHE[cache_key] = (file_key, value)
+    return value
+
+
+def invalidate_cache(path=None):
+    """
+    Discard cached results from read_cached.
+
+    Arguments
+    path -- the file to discard results for.  If None, everything is
+            discarded.
+    """
+    with _CACHE_LOCK:
+        if path is None:
+            _CACHE.clear()
+        else:
+            for cache_key in [key for key in _CACHE if key[0] == path]:
+                del _CACHE[cache_key]
+
+
 def write_config(config, path):
     """
     Write a configuration file.
@@ -2,8 +2,6 @@
 
 """Manage configuration related to profiles."""
 
-import os.path
-
 import devpipeline.config.parser
 import devpipeline.config.paths
 
@@ -18,8 +16,8 @@ def read_all_profiles(path, profile_list, found_fn):
     found_fn -- the function to call for every found profile
     """
     count = 0
-    if os.path.isfile(path):
-        parser = devpipeline.config.parser.read_config(path)
+    parser = devpipeline.config.parser.read_cached(path)
+    if parser:
         for profile in profile_list:
             if parser.has_section(profile):
                 found_fn(profile, parser[profile])
@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+
+"""
+Store resolved components in a compact binary file next to a build cache.
+
+Loading an ini build cache requires parsing and interpolating every section,
+which gets expensive as configurations grow.  A snapshot holds the already
+interpolated values of every component, serialized with marshal, along with
+an index so each component can be decoded independently.  Only the components
+a tool actually reads are ever decoded.
+
+Layout:
+    header -- magic, format version, marshal version, index length
+    index -- a marshalled dictionary with the section offsets and any
+             metadata the writer wants to keep (e.g., input fingerprints)
+    sections -- one marshalled (values, errors) tuple per component
+"""
+
+import configparser
+import marshal
+import mmap
+import os
+import struct
+
+import devpipeline.config.component
+import devpipeline.version
+
+_MAGIC = b"DPSNAP\0\0"
+_FORMAT_VERSION = 3
+_HEADER = struct.Struct("<8sHHI")
+
+
+def snapshot_path(cache_path):
+    """Get the path of the snapshot belonging to a build cache."""
+    return "{}.snapshot".format(cache_path)
+
+
+def serialize_component(component):
+    """Convert a Component to the representation stored in a snapshot."""
+    # pylint: disable=protected-access
+    errors = {key: str(failure) for key, failure in component._errors.items()}
+    return marshal.dumps((component._values, errors, component.environment))
+
+
+def write_snapshot(path, sections, metadata):
+    """
+    Write a snapshot.
+
+    Arguments
+    path -- the location to write the snapshot
+    sections -- an iterable of (name, data) pairs, where data is the result
+                of serialize_component
+    metadata -- a dictionary of marshal-compatible values to store alongside
+                the components
+    """
+    index_sections = []
+    blobs = []
+    offset = 0
+    for name, blob in sections:
+        index_sections.append((name, offset, len(blob)))
+        blobs.append(blob)
+        offset += len(blob)
+    index = marshal.dumps({
+        "version": devpipeline.version.ID,
+        "metadata": metadata,
+        "sections": index_sections
+    })
+
+    # Write to a temporary file first so a concurrent reader never sees a
+    # partial snapshot.
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as output_file:
+        output_file.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION,
+                                       marshal.version, len(index)))
+        output_file.write(index)
+        for blob in blobs:
+            output_file.write(blob)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+
+    """A snapshot read from disk."""
+
+    def __init__(self, data, base, index):
+        self._data = data
+        self._base = base
+        self._sections = {name: (offset, length)
+                          for name, offset, length in index["sections"]}
+        self.metadata = index["metadata"]
+        self._components = None
+
+    def sections(self):
+        """Get a list of every component name in the snapshot."""
+        return list(self._sections)
+
+    def blob(self, name):
+        """Get the serialized form of a component."""
+        offset, length = self._sections[name]
+        start = self._base + offset
+        return self._data[start:start + length]
+
+    def components(self):
+        """Get a LazyComponents backed by this snapshot.  The same collection
+        is returned every time, so components are only decoded once."""
+        if self._components is None:
+            self._components = LazyComponents(self)
+        return self._components
+
+
+class LazyComponents(devpipeline.config.component.Components):
+
+    """A Components collection that decodes each component on first use."""
+
+    __slots__ = ("_snapshot",)
+
+    def __init__(self, snapshot):
+        super().__init__({})
+        self._snapshot = snapshot
+
+    def __getitem__(self, key):
+        component = self._components.get(key)
+        if component is None:
+            values, errors, environment = marshal.loads(
+                self._snapshot.blob(key))
+            component = devpipeline.config.component.Component(
+                key, values,
+                {option: configparser.InterpolationError(option, key, message)
+                 for option, message in errors.items()},
+                environment)
+            self._components[key] = component
+        return component
+
+    def __contains__(self, key):
+        # pylint: disable=protected-access
+        return key in self._snapshot._sections
+
+    def __iter__(self):
+        # pylint: disable=protected-access
+        return iter(self._snapshot._sections)
+
+    def __len__(self):
+        # pylint: disable=protected-access
+        return len(self._snapshot._sections)
+
+    def sections(self):
+        return self._snapshot.sections()
+
+
+def _read_data(path):
+    with open(path, "rb") as input_file:
+        try:
+            return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return None
+
+
+def read_snapshot(path):
+    """
+    Read a snapshot.
+
+    None is returned if the snapshot doesn't exist or was written by a
+    different version of dev-pipeline.  Checking whether the snapshot is
+    still current is left to the caller.
+    """
+    try:
+        data = _read_data(path)
+    except OSError:
+        return None
+    if (data is None) or (len(data) < _HEADER.size):
+        return None
+    magic, format_version, marshal_version, index_length = \
+        _HEADER.unpack_from(data)
+    if (magic != _MAGIC) or (format_version != _FORMAT_VERSION) or \
+            (marshal_version != marshal.version):
+        return None
+    base = _HEADER.size + index_length
+    try:
+        index = marshal.loads(data[_HEADER.size:base])
+    except (EOFError, ValueError, TypeError):
+        return None
+    # a damaged index can decode to anything
+    if (not isinstance(index, dict)) or \
+            (index.get("version") != devpipeline.version.ID):
+        return None
+    try:
+        return Snapshot(data, base, index)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+
+"""
+Talk to a dev-pipeline daemon.
+
+A daemon (see devpipeline.exec.daemon) listens on a Unix socket next to a
+build cache and keeps configuration loaded between commands.  A client
+forwards its arguments, working directory, and environment, and passes its
+standard input, output, and error along with them, so everything the command
+prints (including the output of commands it runs) goes straight to the
+client's terminal.
+
+Protocol, one JSON document per line:
+    client -> daemon: {"argv": [...], "cwd": ..., "env": {...}}, with the
+                      client's stdin, stdout, and stderr attached
+    daemon -> client: {"pid": ...} once the command starts
+    daemon -> client: {"exit": ...} once the command finishes
+
+This module is imported on every invocation of dev-pipeline, so it
+deliberately avoids importing anything expensive.
+"""
+
+import json
+import os
+import signal
+import socket
+
+SOCKET_FILE = "build.cache.sock"
+
+# Set this to run commands locally even if a daemon is available
+DISABLE_VARIABLE = "DEV_PIPELINE_NO_DAEMON"
+
+
+def socket_path(cache_dir):
+    """Get the path of the socket a daemon for cache_dir listens on."""
+    return os.path.join(cache_dir, SOCKET_FILE)
+
+
+def find_socket():
+    """Find a daemon socket in the current directory or a parent, the same
+    way a build cache is found.  None is returned if there isn't one."""
+    previous = ""
+    current = os.getcwd()
+    while previous != current:
+        if os.path.isfile(os.path.join(current, "build.cache")):
+            path = socket_path(current)
+            if os.path.exists(path):
+                return path
+            return None
+        previous = current
+        current = os.path.dirname(current)
+    return None
+
+
+def read_message(connection, pending):
+    """
+    Read a single message.  Returns a tuple of the decoded message (None if
+    the connection closed first) and any data received after it.
+
+    Arguments
+    connection -- the socket to read from
+    pending -- data that was already received
+    """
+    while b"\n" not in pending:
+        data = connection.recv(65536)
+        if not data:
+            return (None, pending)
+        pending += data
+    line, _, pending = pending.partition(b"\n")
+    return (json.loads(line.decode("utf-8")), pending)
+
+
+def send_message(connection, message, fds=None):
+    """Send a single message, optionally with file descriptors."""
+    data = "{}\n".format(json.dumps(message)).encode("utf-8")
+    if fds:
+        sent = socket.send_fds(connection, [data], fds)
+        data = data[sent:]
+    connection.sendall(data)
+
+
+def _wait_for_exit(connection):
+    pid = None
+    pending = b""
+    try:
+        while True:
+            message, pending = read_message(connection, pending)
+            if message is None:
+                # the daemon went away without reporting a result
+                return 1
+            if "pid" in message:
+                pid = message["pid"]
+            elif "exit" in message:
+                return message["exit"]
+    except KeyboardInterrupt:
+        # let the command clean up the same way it would when run locally
+        if pid:
+            os.kill(pid, signal.SIGINT)
+        return 130
+
+
+def forward(argv):
+    """
+    Run a command through a daemon, if one is available.
+
+    Returns the command's exit status, or None if the command should be run
+    locally instead.
+
+    Arguments
+    argv -- the arguments to dev-pipeline (e.g., ["build", "foo"])
+    """
+    if os.environ.get(DISABLE_VARIABLE):
+        return None
+    path = find_socket()
+    if not path:
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            connection.connect(path)
+        except OSError:
+            # stale socket; the daemon isn't running
+            return None
+        send_message(connection, {
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ)
+        }, [0, 1, 2])
+        return _wait_for_exit(connection)
+    finally:
+        connection.close()
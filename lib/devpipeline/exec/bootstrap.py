@@ -8,9 +8,9 @@ import devpipeline.common
 def main(args=None):
     # pylint: disable=bad-continuation,missing-docstring
     builder = devpipeline.common.TargetTool([
-        devpipeline.scm.scm.scm_task,
         devpipeline.build.build.build_task
     ],
+        scm_tasks=[devpipeline.scm.scm.scm_task],
         prog="dev-pipeline bootstrap",
         description="Checkout and build packages")
     devpipeline.common.execute_tool(builder, args)
@@ -4,24 +4,33 @@
 import re
 
 import devpipeline.common
-import devpipeline.resolve
+import devpipeline.scheduler
 
 
-def _print_list(targets, components):
-    build_order = devpipeline.resolve.order_dependencies(targets, components)
-    print(build_order)
+def _print_list(graph, tool):
+    # pylint: disable=unused-argument
+    print(graph.order())
 
 
-def _print_dot(targets, components):
-    # pylint: disable=protected-access
-    rev_deps = devpipeline.resolve._build_dep_data(targets, components)[1]
+def _format_weight(weight):
+    return "{:.1f}".format(weight)
+
+
+def _print_dot(graph, tool):
 
     def remove_hyphen(string):
         """This function swaps '-' for '_'."""
         return re.sub("-", lambda m: "_", string)
 
     print("digraph dependencies {")
-    for pkg, deps in rev_deps.items():
+    if tool.weighted:
+        weights = tool.get_weights()
+        for pkg in graph.targets():
+            print("\t{} [label=\"{}\\n{}\"]".format(
+                remove_hyphen(pkg), pkg, _format_weight(weights[pkg])))
+    for pkg, deps in graph.reverse_deps.items():
+        if not deps:
+            continue
         stripped_pkg = remove_hyphen(pkg)
         print("\t{}".format(stripped_pkg))
         for dep in deps:
@@ -29,9 +38,43 @@ def _print_dot(targets, components):
     print("}")
 
 
+def _print_critical_path(graph, tool):
+    weights = tool.get_weights()
+    path = graph.critical_path(weights.get)
+    for pkg in path:
+        print("{}\t{}".format(pkg, _format_weight(weights[pkg])))
+    print("Total\t{}".format(_format_weight(
+        sum(weights[pkg] for pkg in path))))
+
+
+def _print_simulation(graph, tool):
+    weights = tool.get_weights()
+    priorities = graph.critical_paths(weights.get)
+    total, times = devpipeline.scheduler.simulate(
+        graph.order(), graph, weights, tool.jobs, priorities)
+    for pkg, (start, finish) in sorted(times.items(),
+                                       key=lambda item: item[1]):
+        print("{}\t{}\t{}".format(pkg, _format_weight(start),
+                                  _format_weight(finish)))
+
+    work = sum(weights.values())
+    path = graph.critical_path(weights.get)
+    print("Predicted time with {} jobs: {}".format(tool.jobs,
+                                                   _format_weight(total)))
+    if total:
+        print("Utilization: {:.0%}".format(work / (total * tool.jobs)))
+    # Nothing finishes sooner than the critical path, so those are the
+    # targets worth splitting or speeding up.
+    print("Critical path ({}): {}".format(
+        _format_weight(sum(weights[pkg] for pkg in path)),
+        " -> ".join(path)))
+
+
 _ORDER_OUTPUTS = {
     "list": _print_list,
-    "dot": _print_dot
+    "dot": _print_dot,
+    "critical-path": _print_critical_path,
+    "simulate": _print_simulation
 }
 
 
@@ -48,17 +91,34 @@ class BuildOrderer(devpipeline.common.TargetTool):
         self.add_argument("--method",
                           help="The method used to display build order.  Valid"
                                " options are list (an order to resolve "
-                               "specified targets) and dot (a dot graph).",
+                               "specified targets), dot (a dot graph), "
+                               "critical-path (the most expensive chain of "
+                               "dependencies), and simulate (predict how "
+                               "long a build with --jobs will take).",
                           default="list")
+        self.add_argument("--jobs", type=int,
+                          help="The number of targets to process at once "
+                               "when simulating a build.",
+                          default=1)
+        self.add_argument("--weighted", action="store_true",
+                          help="Include each target's expected cost in dot "
+                               "output.")
         self.helper_fn = None
+        self.jobs = 1
+        self.weighted = False
 
     def setup(self, arguments):
         self.helper_fn = _ORDER_OUTPUTS.get(arguments.method)
         if not self.helper_fn:
             raise Exception("Invalid method: {}".format(arguments.method))
+        if arguments.jobs < 1:
+            raise Exception("{} isn't a valid job count".format(
+                arguments.jobs))
+        self.jobs = arguments.jobs
+        self.weighted = arguments.weighted
 
     def process(self):
-        self.helper_fn(self.targets, self.components)
+        self.helper_fn(self.get_dependency_graph(), self)
 
 
 def main(args=None):
@@ -7,9 +7,9 @@ import devpipeline.common
 
 def main(args=None):
     # pylint: disable=missing-docstring
-    checkout = devpipeline.common.TargetTool([
-        devpipeline.scm.scm.scm_task
-    ], prog="dev-pipeline checkout", description="Checkout repositories")
+    checkout = devpipeline.common.TargetTool(
+        scm_tasks=[devpipeline.scm.scm.scm_task],
+        prog="dev-pipeline checkout", description="Checkout repositories")
     devpipeline.common.execute_tool(checkout, args)
 
 
@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+"""This module serves dev-pipeline commands from a long-running process."""
+
+import errno
+import os
+import signal
+import socket
+import sys
+import traceback
+
+import devpipeline.common
+import devpipeline.config.config
+import devpipeline.config.override
+import devpipeline.config.parser
+import devpipeline.config.snapshot
+import devpipeline.daemon
+import devpipeline.exec.driver
+
+# Unix socket paths are limited to about this many bytes
+_MAX_SOCKET_PATH = 100
+
+
+def _warm_modifiers(cache_path):
+    snapshot = devpipeline.config.parser.read_cached(
+        devpipeline.config.snapshot.snapshot_path(cache_path),
+        devpipeline.config.snapshot.read_snapshot)
+    if not snapshot:
+        return
+    tracked = snapshot.metadata["modifiers"]
+    if tracked["profile"]:
+        devpipeline.config.parser.read_cached(tracked["profile_path"])
+    for override, info in tracked["overrides"].items():
+        for target in info["files"]:
+            devpipeline.config.override.read_override("{}/{}/{}.conf".format(
+                tracked["override_root"], override, target))
+
+
+def _warm(cache_path):
+    """
+    Load everything commands are likely to need.  Caches are only refreshed
+    if their inputs changed, so this is cheap when nothing did.  Commands
+    run in processes forked from the daemon, so they start with whatever
+    was loaded here.
+    """
+    try:
+        devpipeline.config.config.update_cache(cache_file=cache_path)
+        _warm_modifiers(cache_path)
+    except Exception:  # pylint: disable=broad-except
+        # the command will report the problem when it loads the cache
+        pass
+
+
+def _reap_children():
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if not pid:
+            return
+
+
+def _run_command(request):
+    """Run a single command in the current process, returning its exit
+    status."""
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = ["dev-pipeline"] + request["argv"]
+    try:
+        # call the tool directly; the driver would forward to the daemon
+        # pylint: disable=protected-access
+        tool = devpipeline.exec.driver._load_tool(request["argv"][0])
+        if not tool:
+            print("{} isn't an available tool".format(request["argv"][0]),
+                  file=sys.stderr)
+            return 1
+        tool(request["argv"][1:])
+    except SystemExit as failure:
+        if failure.code is None:
+            return 0
+        if isinstance(failure.code, int):
+            return failure.code
+        print(failure.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _serve_child(server, connection, request, fds):
+    server.close()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # the daemon's reaper would steal the exit status of commands the
+    # request runs
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    code = 1
+    try:
+        for target, source in enumerate(fds):
+            os.dup2(source, target)
+            os.close(source)
+        devpipeline.daemon.send_message(connection, {"pid": os.getpid()})
+        code = _run_command(request)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            devpipeline.daemon.send_message(connection, {"exit": code})
+        except OSError:
+            # the client went away
+            pass
+        os._exit(code)  # pylint: disable=protected-access
+
+
+def _accept(server, cache_path):
+    connection, _ = server.accept()
+    try:
+        data, fds, _, _ = socket.recv_fds(connection, 65536, 3)
+        request, _ = devpipeline.daemon.read_message(connection, data)
+        if (request is None) or (len(fds) != 3):
+            return
+        _warm(cache_path)
+        if os.fork() == 0:
+            _serve_child(server, connection, request, fds)
+        for descriptor in fds:
+            os.close(descriptor)
+    except (OSError, ValueError) as failure:
+        print("Unable to serve request: {}".format(failure), file=sys.stderr)
+    finally:
+        connection.close()
+
+
+def _bind(path):
+    if len(os.fsencode(path)) > _MAX_SOCKET_PATH:
+        raise Exception("Socket path {} is too long".format(path))
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError as failure:
+        if failure.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+            raise
+        if failure.errno == errno.ECONNREFUSED:
+            # left behind by a daemon that didn't exit cleanly
+            os.unlink(path)
+    else:
+        raise Exception("A daemon is already serving {}".format(path))
+    finally:
+        probe.close()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    return server
+
+
+def serve(cache_path, idle_timeout=None):
+    """
+    Serve commands for a build directory until interrupted.
+
+    Arguments
+    cache_path -- the build cache to serve commands for
+    idle_timeout -- if set, stop after this many seconds without a command
+    """
+    path = devpipeline.daemon.socket_path(os.path.dirname(cache_path))
+    server = _bind(path)
+    server.settimeout(idle_timeout)
+    # pylint: disable=protected-access
+    for name in devpipeline.exec.driver._TOOLS:
+        devpipeline.exec.driver._load_tool(name)
+    _warm(cache_path)
+    print("Serving {}".format(path), file=sys.stderr)
+
+    def _stop(signum, frame):
+        # pylint: disable=unused-argument
+        raise KeyboardInterrupt()
+
+    def _reap(signum, frame):
+        # pylint: disable=unused-argument
+        _reap_children()
+
+    signal.signal(signal.SIGTERM, _stop)
+    # reap finished requests right away, even if the daemon stays idle
+    signal.signal(signal.SIGCHLD, _reap)
+    try:
+        while True:
+            _reap_children()
+            try:
+                _accept(server, cache_path)
+            except socket.timeout:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+class Daemon(devpipeline.common.GenericTool):
+
+    """This class serves commands for a build directory."""
+
+    def __init__(self):
+        super().__init__(prog="dev-pipeline daemon",
+                         description="Keep a build directory's configuration "
+                                     "loaded and serve commands from it")
+        self.add_argument("--idle-timeout", type=float,
+                          help="Stop after this many seconds without a "
+                               "command")
+        self.cache_path = None
+        self.idle_timeout = None
+
+    def setup(self, arguments):
+        self.cache_path = os.path.abspath(
+            devpipeline.config.config.find_config())
+        self.idle_timeout = arguments.idle_timeout
+
+    def process(self):
+        serve(self.cache_path, self.idle_timeout)
+
+
+def main(args=None):
+    # pylint: disable=missing-docstring
+    daemon = Daemon()
+    devpipeline.common.execute_tool(daemon, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,10 @@
 #!/usr/bin/python3
 """This module is the driver modules for the execution of various tools."""
 
+import importlib
 import sys
 
-import devpipeline.exec.bootstrap
-import devpipeline.exec.build
-import devpipeline.exec.build_order
-import devpipeline.exec.checkout
-import devpipeline.exec.configure
+import devpipeline.daemon
 
 
 def _do_help():
@@ -17,14 +14,29 @@ def _do_help():
     print("\t--list\tDisplay available tools")
 
 
+# Every tool is a module with a main function.  Tools are only imported when
+# they're run, so the cost of starting dev-pipeline doesn't depend on how many
+# tools (and their dependencies) are available.
 _TOOLS = {
-    "bootstrap": devpipeline.exec.bootstrap.main,
-    "build-order": devpipeline.exec.build_order.main,
-    "build": devpipeline.exec.build.main,
-    "checkout": devpipeline.exec.checkout.main,
-    "configure": devpipeline.exec.configure.main
+    "bootstrap": "devpipeline.exec.bootstrap",
+    "build-order": "devpipeline.exec.build_order",
+    "build": "devpipeline.exec.build",
+    "checkout": "devpipeline.exec.checkout",
+    "configure": "devpipeline.exec.configure",
+    "daemon": "devpipeline.exec.daemon",
+    "export-ninja": "devpipeline.exec.export_ninja"
 }
 
+# Tools that always run in the invoking process
+_LOCAL_TOOLS = {"daemon"}
+
+
+def _load_tool(name):
+    module = _TOOLS.get(name)
+    if module:
+        return importlib.import_module(module).main
+    return None
+
 
 def _do_list():
     for tool in _TOOLS:
@@ -40,7 +52,11 @@ _EX_TOOLS = {
 def main():
     # pylint: disable=missing-docstring
     if len(sys.argv) > 1:
-        tool = _TOOLS.get(sys.argv[1])
+        if (sys.argv[1] in _TOOLS) and (sys.argv[1] not in _LOCAL_TOOLS):
+            code = devpipeline.daemon.forward(sys.argv[1:])
+            if code is not None:
+                sys.exit(code)
+        tool = _load_tool(sys.argv[1])
         if tool:
             tool(sys.argv[2:])
         else:
@@ -0,0 +1,302 @@
+#!/usr/bin/python3
+"""This module writes a Ninja build file that builds a set of targets."""
+
+import os
+import shlex
+import sys
+
+import devpipeline.build.build
+import devpipeline.common
+import devpipeline.config.config
+import devpipeline.scm.scm
+
+_STAMP_DIR = ".dp-ninja"
+
+# Always out of date, so anything depending on it always runs
+_ALWAYS = "{}/always".format(_STAMP_DIR)
+
+_STEP_DESCRIPTIONS = {
+    "checkout": "Checking out",
+    "update": "Updating",
+    "configure": "Configuring",
+    "build": "Building",
+    "install": "Installing"
+}
+
+# Phony targets that cover every target; skipped if a target has the name
+_ALL = "all"
+_UPDATE = "update"
+
+
+def _escape(value):
+    if "\n" in value:
+        raise Exception("Can't write a newline to a Ninja file")
+    return value.replace("$", "$$")
+
+
+def _escape_path(path):
+    return _escape(path).replace(" ", "$ ").replace(":", "$:")
+
+
+def _stamp(target, step):
+    return "{}/{}.{}".format(_STAMP_DIR, target, step)
+
+
+def _environment_prefix(component):
+    """Get the arguments to env(1) that apply a component's environment
+    options, or an empty string if it doesn't have any."""
+    unset = []
+    changes = {}
+    for suffix, variable, option in component.environment:
+        value = component[option]
+        if suffix is None:
+            if value:
+                changes[variable] = shlex.quote(value)
+            else:
+                changes.pop(variable, None)
+                unset.append(variable)
+        elif suffix == "append":
+            if variable in changes:
+                changes[variable] += shlex.quote(
+                    "{}{}".format(os.pathsep, value))
+            elif variable in unset:
+                changes[variable] = shlex.quote(value)
+            else:
+                # append to the value at build time, if there is one
+                changes[variable] = '"${{{0}:+${{{0}}}{1}}}"{2}'.format(
+                    variable, os.pathsep, shlex.quote(value))
+    args = ["-u {}".format(variable) for variable in unset
+            if variable not in changes]
+    args.extend("{}={}".format(variable, value)
+                for variable, value in changes.items())
+    if args:
+        return "env {} ".format(" ".join(args))
+    return ""
+
+
+def _shell_command(target, step, cmd, prefix):
+    unsupported = set(cmd) - {"args", "cwd"}
+    if unsupported:
+        raise Exception("Can't export the {} step of {} (it uses {})".format(
+            step, target, ", ".join(sorted(unsupported))))
+    ret = "{}{}".format(prefix, " ".join(
+        shlex.quote(str(arg)) for arg in cmd["args"]))
+    cwd = cmd.get("cwd")
+    if cwd:
+        # a subshell, so later commands run from the same directory
+        ret = "(cd {} && {})".format(shlex.quote(cwd), ret)
+    return ret
+
+
+def _step_command(target, step, cmds, prefix):
+    commands = [_shell_command(target, step, cmd, prefix)
+                for cmd in cmds or []]
+    commands.append("touch {}".format(shlex.quote(_stamp(target, step))))
+    return " && ".join(commands)
+
+
+class _NinjaWriter:
+
+    """A minimal writer for Ninja's file format."""
+
+    def __init__(self, output_file):
+        self._output = output_file
+
+    def line(self, text=""):
+        # pylint: disable=missing-docstring
+        self._output.write("{}\n".format(text))
+
+    def variable(self, key, value, indent=0):
+        """Write a variable.  value isn't escaped, so it can refer to other
+        variables."""
+        self.line("{}{} = {}".format("  " * indent, key, value))
+
+    def build(self, outputs, rule, inputs=None, implicit=None,
+              order_only=None, variables=None):
+        # pylint: disable=missing-docstring,too-many-arguments
+        text = "build {}: {}".format(
+            " ".join(_escape_path(path) for path in outputs), rule)
+        for separator, paths in (("", inputs), ("| ", implicit),
+                                 ("|| ", order_only)):
+            if paths:
+                text += " {}{}".format(separator, " ".join(
+                    _escape_path(path) for path in paths))
+        self.line(text)
+        for key, value in (variables or []):
+            self.variable(key, _escape(str(value)), indent=1)
+
+
+def _write_header(writer, tool):
+    writer.line("# Generated by dev-pipeline export-ninja.  Changes will be "
+                "overwritten.")
+    writer.variable("ninja_required_version", "1.1")
+    writer.line()
+    writer.line("pool scm")
+    writer.variable("depth", tool.scm_jobs, indent=1)
+    writer.line()
+    writer.line("rule step")
+    writer.variable("command", "$cmd", indent=1)
+    writer.variable("description", "$desc", indent=1)
+    writer.line()
+    writer.line("rule regenerate")
+    writer.variable("command", "$cmd", indent=1)
+    writer.variable("description", "Regenerating $out", indent=1)
+    writer.variable("generator", 1, indent=1)
+    writer.line()
+    writer.build([_ALWAYS], "phony")
+    writer.build([os.path.basename(tool.output)], "regenerate",
+                 inputs=devpipeline.config.config.cache_inputs(
+                     tool.cache_path),
+                 variables=[("cmd", tool.regenerate_command())])
+    writer.line()
+
+
+class _Planner:
+
+    """Plan the steps for each target."""
+
+    def __init__(self, tool):
+        self._tool = tool
+
+    def plan(self, target):
+        """Get a list of (step, commands) pairs for target."""
+        current = self._tool.components[target]
+        current_target = {
+            "current_target": target,
+            "current_config": current,
+            "env": devpipeline.common.create_target_environment(
+                current, self._tool.environment),
+            "components": self._tool.components,
+            "dependencies":
+                self._tool.get_dependency_graph().dependencies[target],
+            # plan the complete steps, not shortcuts based on current state
+            "force": True
+        }
+        return devpipeline.scm.scm.scm_plan(current_target) + \
+            devpipeline.build.build.build_plan(current_target)
+
+
+def _write_target(writer, target, steps, tool):
+    """Write the edges for a target's steps, returning the stamp of the last
+    step and the update stamp (if there is one)."""
+    prefix = _environment_prefix(tool.components[target])
+    dependencies = [_stamp(dep, tool.final_steps[dep])
+                    for dep in tool.get_dependency_graph().dependencies[target]]
+    previous = None
+    update = None
+    for step, cmds in steps:
+        implicit = []
+        inputs = []
+        order_only = []
+        variables = [
+            ("cmd", _step_command(target, step, cmds, prefix)),
+            ("desc", "{} {}".format(_STEP_DESCRIPTIONS.get(step, step),
+                                    target))
+        ]
+        if step == "update":
+            # not part of a build; updates are run on request
+            writer.build([_stamp(target, step)], "step", inputs=[_ALWAYS],
+                         implicit=[_stamp(target, "checkout")],
+                         variables=variables + [("pool", "scm")])
+            update = _stamp(target, step)
+            continue
+        if step == "checkout":
+            variables.append(("pool", "scm"))
+        else:
+            order_only = dependencies
+        if previous:
+            implicit.append(previous)
+        if step in ("build", "install"):
+            # leave skipping work to the target's build system
+            inputs.append(_ALWAYS)
+        writer.build([_stamp(target, step)], "step", inputs=inputs,
+                     implicit=implicit, order_only=order_only,
+                     variables=variables)
+        previous = _stamp(target, step)
+    writer.build([target], "phony", inputs=[previous])
+    writer.line()
+    return (previous, update)
+
+
+class ExportNinja(devpipeline.common.TargetTool):
+
+    """This class writes a Ninja build file for a set of targets."""
+
+    def __init__(self):
+        super().__init__(executors=False,
+                         prog="dev-pipeline export-ninja",
+                         description="Write a Ninja build file that checks "
+                                     "out and builds targets")
+        self.add_argument("--output",
+                          help="The file to write.  If not specified, "
+                               "build.ninja in the build directory is "
+                               "used.")
+        self.add_argument("--scm-jobs", type=int,
+                          help="The maximum number of checkouts or updates "
+                               "to run at the same time.",
+                          default=4)
+        self.output = None
+        self.scm_jobs = 4
+        self.cache_path = None
+        self.arguments = None
+        self.final_steps = {}
+
+    def setup(self, arguments):
+        if arguments.scm_jobs < 1:
+            raise Exception("{} isn't a valid job count".format(
+                arguments.scm_jobs))
+        self.scm_jobs = arguments.scm_jobs
+        self.cache_path = os.path.abspath(
+            devpipeline.config.config.find_config())
+        if arguments.output:
+            self.output = os.path.abspath(arguments.output)
+        else:
+            self.output = os.path.join(os.path.dirname(self.cache_path),
+                                       "build.ninja")
+        self.arguments = arguments
+
+    def regenerate_command(self):
+        """Get the command that regenerates the output."""
+        args = [sys.executable, "-m", "devpipeline.exec.driver",
+                "export-ninja", "--output", self.output,
+                "--scm-jobs", str(self.scm_jobs)] + self.arguments.targets
+        return "cd {} && {}".format(
+            shlex.quote(os.path.dirname(self.cache_path)),
+            " ".join(shlex.quote(arg) for arg in args))
+
+    def process(self):
+        planner = _Planner(self)
+        build_order = self.get_dependency_graph().order()
+        plans = {}
+        for target in build_order:
+            plans[target] = planner.plan(target)
+            self.final_steps[target] = plans[target][-1][0]
+        finals = []
+        updates = []
+        temp_path = "{}.tmp".format(self.output)
+        with open(temp_path, "w") as output_file:
+            writer = _NinjaWriter(output_file)
+            _write_header(writer, self)
+            for target in build_order:
+                final, update = _write_target(writer, target, plans[target],
+                                              self)
+                finals.append(final)
+                if update:
+                    updates.append(update)
+            if _ALL not in plans:
+                writer.build([_ALL], "phony", inputs=finals)
+            if updates and (_UPDATE not in plans):
+                writer.build([_UPDATE], "phony", inputs=updates)
+            writer.line("default {}".format(" ".join(
+                _escape_path(target) for target in self.targets)))
+        os.replace(temp_path, self.output)
+
+
+def main(args=None):
+    # pylint: disable=missing-docstring
+    export = ExportNinja()
+    devpipeline.common.execute_tool(export, args)
+
+
+if __name__ == '__main__':
+    main()
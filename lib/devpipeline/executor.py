@@ -2,34 +2,163 @@
 """This modules includes various executor classes which determine how the
 build is executed - quiet, dry run, ..."""
 
+import collections
+import copy
 import os
 import subprocess
+import threading
+
+_OUTPUT_LOCK = threading.Lock()
 
 
 class _ExecutorBase:
-    # pylint: disable=R0201,missing-docstring
+    # When set, output is collected here instead of printed immediately
+    _buffer = None
+
+    def _print(self, msg):
+        if self._buffer is None:
+            print(msg)
+        else:
+            self._buffer.append(msg)
 
+    # pylint: disable=R0201,missing-docstring
     def message(self, msg):
-        print(msg)
+        self._print(msg)
 
     # pylint: disable=R0201,missing-docstring
     def error(self, msg):
-        print("ERROR: {}".format(msg))
+        self._print("ERROR: {}".format(msg))
 
     # pylint: disable=R0201,missing-docstring
     def warning(self, msg):
-        print("WARNING: {}".format(msg))
+        self._print("WARNING: {}".format(msg))
+
+    def _execute_buffered(self, environment, **kwargs):
+        if "stdout" in kwargs:
+            kwargs["stderr"] = subprocess.PIPE
+        else:
+            kwargs["stdout"] = subprocess.PIPE
+            kwargs["stderr"] = subprocess.STDOUT
+        result = subprocess.run(env=environment, **kwargs)
+        for output in (result.stdout, result.stderr):
+            if output:
+                self._buffer.append(
+                    output.decode("utf-8", errors="replace").rstrip("\n"))
+        result.check_returncode()
 
     def _execute_single(self, environment, **kwargs):
         # pylint: disable=broad-except
         try:
-            subprocess.check_call(env=environment, **kwargs)
+            if self._buffer is None:
+                subprocess.check_call(env=environment, **kwargs)
+            else:
+                self._execute_buffered(environment, **kwargs)
+            return True
+        except Exception as failure:
+            self.error(str(failure))
+            return False
+
+    async def _pump(self, stream):
+        # pass output along a line at a time without blocking other commands
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            self._buffer.append(
+                line.decode("utf-8", errors="replace").rstrip("\n"))
+
+    async def _execute_single_async(self, environment, **kwargs):
+        # pylint: disable=broad-except,import-outside-toplevel
+        import asyncio
+
+        args = kwargs.pop("args")
+        if self._buffer is not None:
+            if "stdout" in kwargs:
+                kwargs["stderr"] = subprocess.PIPE
+            else:
+                kwargs["stdout"] = subprocess.PIPE
+                kwargs["stderr"] = subprocess.STDOUT
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, env=environment, **kwargs)
+            await asyncio.gather(*[
+                self._pump(stream) for stream in (process.stdout,
+                                                  process.stderr)
+                if stream])
+            returncode = await process.wait()
+            if returncode:
+                raise subprocess.CalledProcessError(returncode, args)
+            return True
         except Exception as failure:
             self.error(str(failure))
+            return False
+
+    def _prepare_command(self, cmd):
+        """Adjust a command before it runs (e.g., to redirect its output).
+        Returns the arguments to pass to the subprocess module."""
+        return cmd
 
     def execute(self, environment, *args):
+        """
+        Run commands.  Returns True if every command succeeded, False if
+        any failed, or None if the commands weren't actually run (see
+        DryRunExecutor).  Failures are reported through error().
+
+        Arguments
+        environment -- the environment to run the commands in
+        args -- dictionaries of arguments to the subprocess module
+        """
+        # every command runs, even after a failure
+        results = [self._execute_single(environment,
+                                        **self._prepare_command(cmd))
+                   for cmd in args]
+        return all(results)
+
+    async def execute_async(self, environment, *args):
+        """
+        Run commands like execute(), but without blocking an event loop
+        while they run.  Output is read as it's produced, so many commands
+        (from different targets) can run at once.
+
+        Arguments
+        environment -- the environment to run the commands in
+        args -- dictionaries of arguments to the subprocess module
+        """
+        results = []
         for cmd in args:
-            self._execute_single(environment, **cmd)
+            results.append(await self._execute_single_async(
+                environment, **self._prepare_command(cmd)))
+        return all(results)
+
+    def buffered(self):
+        """
+        Create an executor that behaves like this one, but holds all output
+        (including output from commands) until flush() is called.  This lets
+        concurrent work print readable, unmixed output.
+        """
+        ret = copy.copy(self)
+        ret._buffer = []
+        return ret
+
+    def for_target(self, target, config):
+        """
+        Get an executor to use while processing a single target.  Most
+        executors don't care which target they're working on and return
+        themselves.
+
+        Arguments
+        target -- the name of the target
+        config -- the target's configuration
+        """
+        # pylint: disable=unused-argument
+        return self
+
+    def flush(self):
+        """Print any held output at once."""
+        if self._buffer:
+            with _OUTPUT_LOCK:
+                print("\n".join(self._buffer), flush=True)
+            self._buffer.clear()
 
 
 class QuietExecutor(_ExecutorBase):
@@ -47,23 +176,122 @@ class SilentExecutor(_ExecutorBase):
     def message(self, msg):
         pass
 
-    def execute(self, environment, *args):
-        # pylint: disable=invalid-name
-        with open(os.devnull, 'w') as FNULL:
-            for cmd in args:
-                cmd["stdout"] = FNULL
-                self._execute_single(environment, **cmd)
+    def _prepare_command(self, cmd):
+        cmd["stdout"] = subprocess.DEVNULL
+        return cmd
 
 
 class VerboseExecutor(_ExecutorBase):
 
     """This executor class logs verbosely."""
 
-    def execute(self, environment, *args):
-        for cmd in args:
-            cmd_args = cmd.get("args")
-            self.message("\tExecuting: {}".format(cmd_args))
-            self._execute_single(environment, **cmd)
+    def _prepare_command(self, cmd):
+        self.message("\tExecuting: {}".format(cmd.get("args")))
+        return cmd
+
+
+def _read_tail(log_file, start, lines):
+    log_file.seek(start)
+    return collections.deque(
+        (line.decode("utf-8", errors="replace").rstrip("\n")
+         for line in log_file),
+        maxlen=lines)
+
+
+class LogExecutor(_ExecutorBase):
+
+    """
+    This executor class writes everything to a log file per target, under
+    the build root.  Command output goes straight to the log, so it never
+    passes through dev-pipeline or the terminal.  When a command fails, only
+    the last few lines of its output are printed along with the error.
+    """
+
+    # The number of lines of output to print when a command fails
+    TAIL_LINES = 40
+
+    _log_path = None
+
+    def __init__(self):
+        # shared with every copy so each log is only truncated once per run
+        self._started = set()
+        self._started_lock = threading.Lock()
+
+    def for_target(self, target, config):
+        ret = copy.copy(self)
+        log_dir = os.path.join(config.get("dp.build_root"), "logs")
+        ret._log_path = os.path.join(log_dir, "{}.log".format(target))
+        with self._started_lock:
+            if ret._log_path not in self._started:
+                self._started.add(ret._log_path)
+                os.makedirs(log_dir, exist_ok=True)
+                with open(ret._log_path, "w"):
+                    pass
+        return ret
+
+    def _log(self, msg):
+        with open(self._log_path, "a") as log_file:
+            log_file.write("{}\n".format(msg))
+
+    def message(self, msg):
+        if self._log_path:
+            self._log(msg)
+
+    def error(self, msg):
+        if self._log_path:
+            self._log("ERROR: {}".format(msg))
+        super().error(msg)
+
+    def _execute_single(self, environment, **kwargs):
+        # pylint: disable=broad-except
+        if not self._log_path:
+            return super()._execute_single(environment, **kwargs)
+
+        self.message("Executing: {}".format(kwargs.get("args")))
+        with open(self._log_path, "a+b") as log_file:
+            start = log_file.tell()
+            if "stdout" not in kwargs:
+                kwargs["stdout"] = log_file
+                kwargs["stderr"] = subprocess.STDOUT
+            try:
+                subprocess.check_call(env=environment, **kwargs)
+                return True
+            except Exception as failure:
+                message = str(failure)
+                tail = _read_tail(log_file, start, self.TAIL_LINES)
+        return self._report_failure(message, tail)
+
+    async def _execute_single_async(self, environment, **kwargs):
+        # pylint: disable=broad-except,import-outside-toplevel
+        import asyncio
+
+        if not self._log_path:
+            return await super()._execute_single_async(environment, **kwargs)
+
+        self.message("Executing: {}".format(kwargs.get("args")))
+        args = kwargs.pop("args")
+        with open(self._log_path, "a+b") as log_file:
+            start = log_file.tell()
+            if "stdout" not in kwargs:
+                kwargs["stdout"] = log_file
+                kwargs["stderr"] = subprocess.STDOUT
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *args, env=environment, **kwargs)
+                returncode = await process.wait()
+                if returncode:
+                    raise subprocess.CalledProcessError(returncode, args)
+                return True
+            except Exception as failure:
+                message = str(failure)
+                tail = _read_tail(log_file, start, self.TAIL_LINES)
+        return self._report_failure(message, tail)
+
+    def _report_failure(self, message, tail):
+        for line in tail:
+            self._print(line)
+        self.error("{} (full output in {})".format(message, self._log_path))
+        return False
 
 
 class DryRunExecutor(_ExecutorBase):
@@ -75,3 +303,9 @@ class DryRunExecutor(_ExecutorBase):
         for cmd in args:
             cmd_args = cmd.get("args")
             self.message("\tExecuting: {}".format(cmd_args))
+        # nothing ran, so nothing can be considered up to date (but nothing
+        # failed either)
+        return None
+
+    async def execute_async(self, environment, *args):
+        return self.execute(environment, *args)
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+
+"""
+Remember how long each target's steps took in past runs.
+
+Durations are kept in a small SQLite database in the build root, keyed by
+build root and profile, so a debug and a release build of the same
+project don't share estimates.  Only the most recent runs of each step are
+kept.
+"""
+
+import os.path
+import threading
+import time
+
+HISTORY_FILE = "build.history"
+
+# The number of recent durations kept (and averaged) for each step
+_KEEP_RUNS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS durations (
+    build_root TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    target TEXT NOT NULL,
+    step TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    recorded REAL NOT NULL
+)
+"""
+
+_INDEX = """
+CREATE INDEX IF NOT EXISTS durations_key
+    ON durations (build_root, profile, target, step)
+"""
+
+_PRUNE = """
+DELETE FROM durations WHERE rowid IN (
+    SELECT rowid FROM (
+        SELECT rowid, ROW_NUMBER() OVER (
+            PARTITION BY build_root, profile, target, step
+            ORDER BY rowid DESC) AS age
+        FROM durations
+        WHERE build_root = ? AND profile = ?)
+    WHERE age > ?)
+"""
+
+
+class History:
+
+    """
+    Step durations for a single build root and profile.
+
+    Durations recorded during a run are held in memory (record() is safe to
+    call from several threads) and written by save().
+    """
+
+    def __init__(self, path, build_root, profile):
+        """
+        Arguments
+        path -- the location of the database
+        build_root -- the build root the durations belong to
+        profile -- the active profiles, or an empty string
+        """
+        self._path = path
+        self._key = (build_root, profile or "")
+        self._pending = []
+        self._lock = threading.Lock()
+        self._estimates = None
+
+    def _connect(self):
+        # pylint: disable=import-outside-toplevel
+        # sqlite3 is slow to import and most runs only touch the database
+        # once, if at all
+        import sqlite3
+
+        connection = sqlite3.connect(self._path, timeout=10)
+        connection.execute(_SCHEMA)
+        connection.execute(_INDEX)
+        return connection
+
+    def estimates(self):
+        """
+        Get a dictionary mapping targets to the expected duration (in
+        seconds) of all their steps.  Targets that have never completed a
+        step aren't included.
+        """
+        if self._estimates is None:
+            self._estimates = {}
+            if os.path.isfile(self._path):
+                # pylint: disable=import-outside-toplevel
+                import sqlite3
+
+                try:
+                    self._estimates = self._read_estimates()
+                except sqlite3.Error:
+                    pass
+        return self._estimates
+
+    def _read_estimates(self):
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT target, step, AVG(seconds) FROM durations "
+                "WHERE build_root = ? AND profile = ? GROUP BY target, step",
+                self._key).fetchall()
+        finally:
+            connection.close()
+        ret = {}
+        for target, _, seconds in rows:
+            ret[target] = ret.get(target, 0) + seconds
+        return ret
+
+    def record(self, target, step, seconds):
+        """
+        Record a step that completed.
+
+        Arguments
+        target -- the target the step belongs to
+        step -- the name of the step (e.g., build)
+        seconds -- how long the step took
+        """
+        with self._lock:
+            self._pending.append((target, step, seconds))
+
+    def save(self):
+        """
+        Write any recorded durations to the database.
+
+        Returns None if they were written (or there was nothing to write),
+        otherwise the error that prevented it.  History is only used for
+        estimates, so failing to save it never fails a build.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+        if not pending:
+            return None
+        # pylint: disable=import-outside-toplevel
+        import sqlite3
+
+        try:
+            self._write(pending)
+        except sqlite3.Error as error:
+            return error
+        return None
+
+    def _write(self, pending):
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO durations VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._key + (target, step, seconds, now)
+                     for target, step, seconds in pending])
+                connection.execute(_PRUNE, self._key + (_KEEP_RUNS,))
+        finally:
+            connection.close()
+
+
+def load_history(components):
+    """
+    Get the History for a configuration, or None if it has no components.
+
+    Arguments
+    components -- the components from the build cache
+    """
+    for name in components:
+        component = components[name]
+        build_root = component.get("dp.build_root")
+        return History(os.path.join(build_root, HISTORY_FILE), build_root,
+                       component.get("dp.profile_name"))
+    return None
+
+
+def target_weights(targets, components, estimates):
+    """
+    Get a dictionary of the expected cost of each target.
+
+    A target's dp.cost option takes precedence over its recorded history.
+    Targets with neither are assumed to cost the average of the known
+    targets (or 1 if nothing is known), so their dependents still count.
+
+    Arguments
+    targets -- the targets to get weights for
+    components -- the components from the build cache
+    estimates -- the result of History.estimates()
+    """
+    known = {}
+    for target in targets:
+        cost = components[target].get("dp.cost")
+        if cost is not None:
+            try:
+                known[target] = float(cost)
+            except ValueError:
+                raise Exception("Invalid dp.cost for {}: {}".format(
+                    target, cost))
+        elif target in estimates:
+            known[target] = estimates[target]
+    if known:
+        unknown = sum(known.values()) / len(known)
+    else:
+        unknown = 1
+    return {target: known.get(target, unknown) for target in targets}
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+"""
+Share a single pool of job slots between every build running at once.
+
+When several targets build concurrently, each build tool picks its own
+parallelism and the machine ends up either idle or oversubscribed.  A
+JobServer is a GNU make compatible jobserver: a pipe holding one token per
+job slot.  Build commands inherit the pipe and are told about it through
+MAKEFLAGS, so make (and other jobserver-aware tools) only start a new job
+after taking a token.  dev-pipeline takes a token for each command it starts
+to account for the job every client is allowed to run without one, so the
+total number of jobs never exceeds the size of the pool.
+"""
+
+import contextlib
+import os
+
+
+class JobServer:
+
+    """A pool of job slots shared by build commands."""
+
+    def __init__(self, jobs):
+        """
+        Arguments
+        jobs -- the total number of jobs that may run at once
+        """
+        if jobs < 1:
+            raise Exception("Invalid job count: {}".format(jobs))
+        self.jobs = jobs
+        self._read, self._write = os.pipe()
+        os.write(self._write, b"+" * jobs)
+
+    def environment(self, env):
+        """
+        Get a copy of env that directs make-compatible tools to the pool.
+
+        Arguments
+        env -- the environment commands would otherwise run with
+        """
+        ret = env.copy()
+        flags = "-j{} --jobserver-auth={},{}".format(self.jobs, self._read,
+                                                     self._write)
+        existing = ret.get("MAKEFLAGS")
+        if existing:
+            flags = "{} {}".format(flags, existing)
+        ret["MAKEFLAGS"] = " {}".format(flags)
+        # cmake turns this into -jN, which takes a build out of the pool
+        ret.pop("CMAKE_BUILD_PARALLEL_LEVEL", None)
+        return ret
+
+    def command(self, cmd):
+        """Get a copy of a command's arguments that lets it use the pool."""
+        ret = dict(cmd)
+        ret["pass_fds"] = tuple(ret.get("pass_fds", ())) + (self._read,
+                                                            self._write)
+        return ret
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Hold a single job slot, waiting until one is available."""
+        token = os.read(self._read, 1)
+        try:
+            yield
+        finally:
+            os.write(self._write, token)
+
+    def close(self):
+        """Release the pool.  Nothing can use it afterwards."""
+        os.close(self._read)
+        os.close(self._write)
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+"""
+Find builders, scms, and other pluggable tools on demand.
+
+Tools built into dev-pipeline are named by their module so they're only
+imported when a configuration uses them.  Anything else is discovered through
+package entry points, which lets other packages provide tools without
+modifying dev-pipeline.  For example, a package providing a builder named
+"meson" would declare:
+
+    entry_points={
+        "devpipeline.builders": [
+            "meson = mypackage.meson:make_meson"
+        ]
+    }
+
+Entry points are only scanned when a name isn't built in, and the scan
+happens at most once per registry.
+"""
+
+import importlib
+import threading
+
+
+def _load(spec):
+    if callable(spec):
+        return spec
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _find_entry_points(group):
+    # pylint: disable=import-outside-toplevel
+    import importlib.metadata
+
+    entry_points = importlib.metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=group)
+    # Python < 3.10
+    return entry_points.get(group, [])
+
+
+class PluginRegistry:
+
+    """
+    A lazily loaded collection of plugins, indexed by name.
+
+    This can be used anywhere a dictionary of names to functions was used
+    (e.g., with devpipeline.toolsupport.tool_builder).
+    """
+
+    def __init__(self, group, builtins):
+        """
+        Arguments
+        group -- the entry point group other packages use to add plugins
+        builtins -- a dictionary of names to either a function or a string of
+                    the form "module:attribute" naming one.  These take
+                    precedence over entry points.
+        """
+        self._group = group
+        self._builtins = builtins
+        self._entry_points = None
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        if self._entry_points is None:
+            self._entry_points = {}
+            for entry_point in _find_entry_points(self._group):
+                # the first package to claim a name wins
+                self._entry_points.setdefault(entry_point.name, entry_point)
+        return self._entry_points
+
+    def _load_plugin(self, name):
+        spec = self._builtins.get(name)
+        if spec is not None:
+            return _load(spec)
+        entry_point = self._discover().get(name)
+        if entry_point is None:
+            return None
+        try:
+            return entry_point.load()
+        except Exception as failure:
+            raise Exception("Unable to load {} '{}' ({}): {}".format(
+                self._group, name, entry_point.value, failure))
+
+    def get(self, name, fallback=None):
+        """Get the plugin called name, loading it if necessary."""
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = self._load_plugin(name)
+            ret = self._loaded[name]
+        if ret is None:
+            return fallback
+        return ret
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def names(self):
+        """Get a sorted list of every available plugin name.  This scans
+        entry points, so it's best kept out of common paths."""
+        with self._lock:
+            return sorted(set(self._builtins) | set(self._discover()))
@@ -1,54 +1,166 @@
 #!/usr/bin/python3
 """Resolve dependencies into an order build list"""
 
+import collections
 
-def _build_dep_data(targets, components):
+
+def _get_deps_from_component(component):
     """
-    Returns dependency data for a set of targets. An exception will be raised
-    if a target does not have component configuration available.
+    Given a component, return a list of dependencies. An empty list will
+    be returned for components with no dependencies.
     """
-    counts = {}
-    reverse_deps = {}
+    dependencies = component.get("depends")
+    if dependencies:
+        return list(x.strip() for x in dependencies.split(','))
+    return list()
+
 
-    def _add_reverse_deps(package, dependencies):
-        nonlocal reverse_deps
+def _find_cycle(remaining, dependencies):
+    """
+    Find a dependency cycle among the targets in remaining.
+
+    Every target in remaining has at least one dependency that's also in
+    remaining, so walking unvisited dependencies is guaranteed to revisit a
+    target eventually.
+    """
+    start = next(iter(remaining))
+    path = [start]
+    positions = {start: 0}
+    while True:
+        current = path[-1]
+        for dependency in dependencies[current]:
+            if dependency in remaining:
+                break
+        if dependency in positions:
+            cycle = path[positions[dependency]:]
+            cycle.append(dependency)
+            return cycle
+        positions[dependency] = len(path)
+        path.append(dependency)
+
+
+class DependencyGraph:
+
+    """
+    The dependency relationships between a set of targets.
+
+    The graph is indexed in both directions so it can be walked from a target
+    to its dependencies or its dependents in constant time per edge.  Tools
+    that need dependency information should build a graph once and share it
+    instead of resolving dependencies again.
+    """
 
+    def __init__(self):
+        # target -> list of targets it depends on
+        self.dependencies = collections.OrderedDict()
+        # target -> list of targets that depend on it
+        self.reverse_deps = collections.OrderedDict()
+
+    def add_target(self, target, dependencies):
+        """
+        Add a target to the graph.
+
+        Arguments
+        target -- the name of the target
+        dependencies -- a list of targets this target depends on
+        """
+        self.dependencies[target] = dependencies
+        self.reverse_deps.setdefault(target, [])
         for dependency in dependencies:
-            if dependency not in reverse_deps:
-                reverse_deps[dependency] = []
-            reverse_deps[dependency].append(package)
+            self.reverse_deps.setdefault(dependency, []).append(target)
+
+    def targets(self):
+        """Get a list of every target in the graph."""
+        return list(self.dependencies)
+
+    def counts(self):
+        """Get a dictionary mapping each target to its dependency count."""
+        return {target: len(deps) for target, deps in self.dependencies.items()}
+
+    def order(self):
+        """
+        Get a list of targets in build order.  Every target's dependencies are
+        included prior to that target.
 
-    def get_deps_from_component(component):
+        An exception will be raised if the graph contains a dependency cycle.
         """
-        Given a component, return a list of dependencies. An empty list will
-        be returned for components with no dependencies.
+        counts = self.counts()
+        ready = collections.deque(
+            target for target, count in counts.items() if count == 0)
+        build_order = []
+        while ready:
+            target = ready.popleft()
+            build_order.append(target)
+            for dependent in self.reverse_deps[target]:
+                counts[dependent] -= 1
+                if counts[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(build_order) != len(counts):
+            remaining = set(target for target, count in counts.items()
+                            if count)
+            raise Exception("Dependency cycle: {}".format(" -> ".join(
+                _find_cycle(remaining, self.dependencies))))
+        return build_order
+
+    def critical_paths(self, weights):
         """
-        dependencies = component.get("depends")
-        if dependencies:
-            return list(x.strip() for x in dependencies.split(','))
-        return list()
+        Get the cost of the most expensive chain of targets starting at each
+        target, following dependents.  A target with a large value holds up
+        a lot of work, so it should be started as early as possible.
 
-    # seed the initial dependencies
-    to_be_processed = list(targets)
-    processed_targets = list()
+        Arguments
+        weights -- a function that takes a target and returns its cost
+        """
+        ret = {}
+        for target in reversed(self.order()):
+            ret[target] = weights(target) + max(
+                (ret[dependent] for dependent in self.reverse_deps[target]),
+                default=0)
+        return ret
+
+    def critical_path(self, weights):
+        """
+        Get the most expensive chain of targets, in build order.  Nothing can
+        finish sooner than the total cost of this chain, no matter how many
+        targets are processed at once.
 
-    # populate reverse_deps with who depends on each target
+        Arguments
+        weights -- a function that takes a target and returns its cost
+        """
+        paths = self.critical_paths(weights)
+        ret = []
+        candidates = [target for target, deps in self.dependencies.items()
+                      if not deps]
+        while candidates:
+            target = max(candidates, key=lambda candidate: paths[candidate])
+            ret.append(target)
+            candidates = self.reverse_deps[target]
+        return ret
+
+
+def build_graph(targets, components):
+    """
+    Build a DependencyGraph containing targets and everything they depend on.
+    An exception will be raised if a target does not have component
+    configuration available.
+    """
+    graph = DependencyGraph()
+    to_be_processed = collections.deque(targets)
+    seen = set(to_be_processed)
     while to_be_processed:
-        current = to_be_processed.pop(0)
-        if not components[current]:
+        current = to_be_processed.popleft()
+        if current not in components:
             raise Exception(
                 "Missing configuration for target (target={})".format(current))
 
-        if current not in processed_targets:
-            component_deps = get_deps_from_component(components[current])
-            counts[current] = len(component_deps)
-            _add_reverse_deps(current, component_deps)
-
-            # process component dependencies as well
-            to_be_processed += component_deps
-            processed_targets.append(current)
-
-    return (counts, reverse_deps)
+        component_deps = _get_deps_from_component(components[current])
+        graph.add_target(current, component_deps)
+        for dependency in component_deps:
+            if dependency not in seen:
+                seen.add(dependency)
+                to_be_processed.append(dependency)
+    return graph
 
 
 def order_dependencies(targets, components):
@@ -59,39 +171,4 @@ def order_dependencies(targets, components):
 
     An exception will be thrown if dependencies can't be resolved.
     """
-    def get_resolved_targets(counts):
-        """Get a list of targets with a dependency count of 0."""
-        resolved_targets = list()
-        for target, count in counts.items():
-            if count == 0:
-                resolved_targets.append(target)
-
-        return resolved_targets
-
-    def remove_reverse_deps(target, reverse_deps, counts):
-        """
-        Remove a given target from the dependency list of all other targets.
-        """
-        for rev_deps in reverse_deps[target]:
-            counts[rev_deps] -= 1
-        del reverse_deps[target]
-
-    counts, reverse_deps = _build_dep_data(targets, components)
-    target_build_order = list()
-    while counts:
-        resolved_targets = get_resolved_targets(counts)
-
-        # Every pass must resolve at least one target. An exception is raised
-        # if no targets are resolved to avoid an infinte loop.
-        if not resolved_targets:
-            raise Exception("Resolve error")
-
-        target_build_order += resolved_targets
-
-        # cleanup resolved targets
-        for target in resolved_targets:
-            if target in reverse_deps:
-                remove_reverse_deps(target, reverse_deps, counts)
-            del counts[target]
-
-    return target_build_order
+    return build_graph(targets, components).order()
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+
+"""
+Decide whether there's room to start another target.
+
+Targets can describe how much of the host they use with dp.cpu_weight (in
+cores; 1 by default) and dp.mem_weight (in GiB; 0 by default).  A Budget
+admits targets while their combined weights fit, and can also watch the
+host's load and free memory so other work on the machine is taken into
+account.
+"""
+
+import os
+import threading
+import time
+
+_LOADAVG_PATH = "/proc/loadavg"
+_MEMINFO_PATH = "/proc/meminfo"
+
+# /proc/meminfo reports kB
+_KB_PER_GIB = 1024 * 1024
+
+
+def read_loadavg(path=_LOADAVG_PATH):
+    """Get the host's one-minute load average, or None if it isn't
+    available."""
+    try:
+        with open(path) as loadavg_file:
+            return float(loadavg_file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_available_memory(path=_MEMINFO_PATH):
+    """Get the memory available for new work in GiB, or None if it isn't
+    available."""
+    try:
+        with open(path) as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / _KB_PER_GIB
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class HostMonitor:
+
+    """
+    Report the host's load and available memory.
+
+    Readings are reused for interval seconds, so checking often is cheap.
+    """
+
+    def __init__(self, interval=1.0, load_fn=read_loadavg,
+                 memory_fn=read_available_memory):
+        """
+        Arguments
+        interval -- how long a reading is reused, in seconds
+        load_fn -- a function returning the current load
+        memory_fn -- a function returning the available memory in GiB
+        """
+        self.interval = interval
+        self._load_fn = load_fn
+        self._memory_fn = memory_fn
+        self._read_at = None
+        self._reading = (None, None)
+
+    def read(self):
+        """Get a (load, available memory) tuple.  Either may be None if the
+        host doesn't report it."""
+        now = time.monotonic()
+        if (self._read_at is None) or (now - self._read_at >= self.interval):
+            self._reading = (self._load_fn(), self._memory_fn())
+            self._read_at = now
+        return self._reading
+
+
+class Budget:
+
+    """
+    Track the CPU and memory reserved by running targets.
+
+    A target is admitted if its weights fit in what's left of each budget
+    and, when a monitor is provided, the host has room for it.  Load from
+    the host that isn't accounted for by running targets counts against the
+    CPU budget, and a target needing more memory than the host has available
+    waits.  If nothing is running, the next target is always admitted, so a
+    target larger than a budget still runs (alone).
+    """
+
+    def __init__(self, cpu=None, memory=None, monitor=None):
+        """
+        Arguments
+        cpu -- the number of cores targets can use at once, or None for no
+               limit
+        memory -- the GiB of memory targets can use at once, or None for no
+                  limit
+        monitor -- a HostMonitor used to back off when the host is busy
+        """
+        self.cpu = cpu
+        self.memory = memory
+        self.monitor = monitor
+        self._cpu_used = 0
+        self._memory_used = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def _host_admits(self, cpu, memory):
+        load, available = self.monitor.read()
+        if (load is not None) and (self.cpu is not None):
+            external = max(0, load - self._cpu_used)
+            if external + self._cpu_used + cpu > self.cpu:
+                return False
+        if (available is not None) and (memory > available):
+            return False
+        return True
+
+    def acquire(self, cpu, memory):
+        """
+        Reserve room for a target if it's available.  Returns True if the
+        target was admitted; it must be released once it finishes.
+
+        Arguments
+        cpu -- the target's dp.cpu_weight
+        memory -- the target's dp.mem_weight
+        """
+        with self._lock:
+            if self._running:
+                if (self.cpu is not None) and \
+                        (self._cpu_used + cpu > self.cpu):
+                    return False
+                if (self.memory is not None) and \
+                        (self._memory_used + memory > self.memory):
+                    return False
+                if self.monitor and not self._host_admits(cpu, memory):
+                    return False
+            self._cpu_used += cpu
+            self._memory_used += memory
+            self._running += 1
+            return True
+
+    def release(self, cpu, memory):
+        """Return the room reserved by acquire."""
+        with self._lock:
+            self._cpu_used -= cpu
+            self._memory_used -= memory
+            self._running -= 1
+
+
+def _read_weight(component, option, default):
+    value = component.get(option)
+    if value is None:
+        return default
+    try:
+        ret = float(value)
+    except ValueError:
+        raise Exception("Invalid {} for {}: {}".format(
+            option, component.name, value))
+    if ret < 0:
+        raise Exception("Invalid {} for {}: {}".format(
+            option, component.name, value))
+    return ret
+
+
+def target_requirements(targets, components):
+    """
+    Get a dictionary of each target's (cpu, memory) weights.
+
+    Arguments
+    targets -- the targets to get weights for
+    components -- the components from the build cache
+    """
+    return {
+        target: (_read_weight(components[target], "dp.cpu_weight", 1),
+                 _read_weight(components[target], "dp.mem_weight", 0))
+        for target in targets
+    }
+
+
+def default_cpu_budget():
+    """Get the number of cores available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
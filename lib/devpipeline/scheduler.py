@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""Process targets concurrently while respecting their dependencies."""
+
+import heapq
+
+
+class Scheduler:
+
+    """
+    Run a function for every target once all of its dependencies have
+    completed.
+
+    Targets are dispatched to a pool of worker threads as soon as they become
+    ready, so the total run time follows the longest chain of dependencies
+    instead of the sum of every target.  A target that fails prevents any
+    target depending on it (directly or indirectly) from running, but
+    independent targets are unaffected.
+    """
+
+    def __init__(self, build_order, graph, priorities=None):
+        """
+        Arguments
+        build_order -- a list of targets in a valid build order.  This is used
+                       to break ties between targets that are ready at the
+                       same time.
+        graph -- a devpipeline.resolve.DependencyGraph containing every
+                 target in build_order.
+        priorities -- an optional dictionary of targets to a number.  When
+                      several targets are ready, those with higher values
+                      start first (see DependencyGraph.critical_paths).
+        """
+        self._build_order = build_order
+        self._graph = graph
+        self._keys = {
+            target: (-(priorities or {}).get(target, 0), index)
+            for index, target in enumerate(build_order)
+        }
+        self.completed = []
+        self.failed = {}
+        self.skipped = []
+
+    def _push(self, ready, target):
+        heapq.heappush(ready, (self._keys[target], target))
+
+    def _initial_ready(self, remaining):
+        ready = []
+        for target in self._build_order:
+            if remaining[target] == 0:
+                self._push(ready, target)
+        return ready
+
+    def _finish(self, target, ready, remaining):
+        self.completed.append(target)
+        for dependent in self._graph.reverse_deps[target]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                self._push(ready, dependent)
+
+    def _admit(self, ready, running_count, jobs, budget, requirements):
+        """Pick the ready targets to start.  Targets that don't fit in the
+        budget are left in ready, and smaller targets behind them can start
+        instead.  Returns the targets to start and whether any were held
+        back."""
+        admitted = []
+        held = []
+        while ready and (running_count + len(admitted) < jobs):
+            entry = heapq.heappop(ready)
+            if (budget is None) or \
+                    budget.acquire(*requirements.get(entry[1], (1, 0))):
+                admitted.append(entry[1])
+            else:
+                held.append(entry)
+        for entry in held:
+            heapq.heappush(ready, entry)
+        return (admitted, bool(held))
+
+    def run(self, target_fn, jobs, budget=None, requirements=None):
+        """
+        Call target_fn for every target, running at most jobs at once.
+
+        Returns True if every target completed successfully.  Details about
+        failures are available in the failed and skipped attributes.
+
+        Arguments
+        target_fn -- a function that takes a single target name.  Any
+                     exception it raises marks that target as failed.
+        jobs -- the maximum number of targets to process concurrently.
+        budget -- an optional devpipeline.resources.Budget.  Targets only
+                  start once the budget has room for them.
+        requirements -- a dictionary of targets to the (cpu, memory) tuple
+                        they reserve from budget (see
+                        devpipeline.resources.target_requirements).  Targets
+                        that aren't present reserve a single core.
+        """
+        # pylint: disable=import-outside-toplevel
+        # only needed when targets actually run concurrently, and expensive
+        # to import
+        import concurrent.futures
+
+        if jobs < 1:
+            raise Exception("Invalid job count: {}".format(jobs))
+
+        requirements = requirements or {}
+        # with a host monitor, held targets may fit once the host is less
+        # busy, so check again periodically instead of only when a target
+        # finishes
+        poll = budget.monitor.interval if budget and budget.monitor else None
+        remaining = self._graph.counts()
+        ready = self._initial_ready(remaining)
+        running = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            while ready or running:
+                admitted, held = self._admit(ready, len(running), jobs,
+                                             budget, requirements)
+                for target in admitted:
+                    running[pool.submit(target_fn, target)] = target
+                done = concurrent.futures.wait(
+                    running, timeout=poll if held else None,
+                    return_when=concurrent.futures.FIRST_COMPLETED)[0]
+                for future in done:
+                    target = running.pop(future)
+                    if budget:
+                        budget.release(*requirements.get(target, (1, 0)))
+                    failure = future.exception()
+                    if failure:
+                        self.failed[target] = failure
+                    else:
+                        self._finish(target, ready, remaining)
+
+        finished = set(self.completed)
+        finished.update(self.failed)
+        self.skipped = [target for target in self._build_order
+                        if target not in finished]
+        return not self.failed
+
+
+def describe_failures(scheduler):
+    """Create a human-readable summary of targets that didn't complete."""
+    messages = ["{} ({})".format(target, failure)
+                for target, failure in scheduler.failed.items()]
+    ret = "Failed targets: {}".format(", ".join(messages))
+    if scheduler.skipped:
+        ret += "; skipped targets: {}".format(", ".join(scheduler.skipped))
+    return ret
+
+
+def simulate(build_order, graph, weights, jobs, priorities=None):
+    """
+    Predict how a Scheduler would process targets, assuming each target
+    takes exactly as long as its weight.
+
+    Returns a tuple of the predicted total time and a dictionary mapping each
+    target to a (start, finish) tuple.
+
+    Arguments
+    build_order -- a list of targets in a valid build order
+    graph -- a devpipeline.resolve.DependencyGraph containing every target in
+             build_order
+    weights -- a dictionary of targets to their expected cost
+    jobs -- the number of targets that can be processed at once
+    priorities -- the priorities the Scheduler would be given
+    """
+    if jobs < 1:
+        raise Exception("Invalid job count: {}".format(jobs))
+
+    # pylint: disable=protected-access
+    # Reuse the real scheduler's ordering rules so the prediction matches
+    scheduler = Scheduler(build_order, graph, priorities)
+    remaining = graph.counts()
+    ready = scheduler._initial_ready(remaining)
+    # (finish time, sequence, target); sequence keeps ties stable
+    running = []
+    times = {}
+    now = 0
+    sequence = 0
+    while ready or running:
+        while ready and (len(running) < jobs):
+            target = heapq.heappop(ready)[1]
+            finish = now + weights[target]
+            times[target] = (now, finish)
+            heapq.heappush(running, (finish, sequence, target))
+            sequence += 1
+        now, _, target = heapq.heappop(running)
+        scheduler._finish(target, ready, remaining)
+    return (now, times)
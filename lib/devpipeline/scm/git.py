@@ -6,9 +6,22 @@ import os.path
 import re
 import subprocess
 
+import devpipeline.scm.gitrefs
 import devpipeline.toolsupport
 
 
+def _make_merge(upstream, repo_dir):
+    return [{
+        "args": [
+            "git",
+            "merge",
+            "--ff-only",
+            upstream
+        ],
+        "cwd": repo_dir
+    }]
+
+
 def _merge_command(match, repo_dir):
     branch_pattern = re.compile(R"^{} ([\w/]+)".format(match.group(1)))
 
@@ -18,15 +31,7 @@ def _merge_command(match, repo_dir):
         # fast-forward merge.
         matches = branch_pattern.match(line)
         if matches:
-            return [{
-                "args": [
-                    "git",
-                    "merge",
-                    "--ff-only",
-                    matches.group(1)
-                ],
-                "cwd": repo_dir
-            }]
+            return _make_merge(matches.group(1), repo_dir)
         return None
 
     # This will give output similar to this:
@@ -60,12 +65,61 @@ def _ff_command(revision, repo_dir):
     return []
 
 
+def _short_ref(ref):
+    for prefix in ["refs/heads/", "refs/remotes/"]:
+        if ref.startswith(prefix):
+            return ref[len(prefix):]
+    return ref
+
+
+def _branch_update(git_dir, branch, head, repo_dir):
+    upstream = git_dir.upstream(branch)
+    if upstream == devpipeline.scm.gitrefs.NO_UPSTREAM:
+        # nothing to fast-forward to
+        return []
+    if upstream is None:
+        return None
+    upstream_head = git_dir.read_ref(upstream)
+    if not upstream_head:
+        return None
+    if upstream_head == head:
+        return []
+    return _make_merge(_short_ref(upstream), repo_dir)
+
+
+def _fast_update(revision, repo_dir):
+    """
+    Determine the commands needed to update repo_dir using only the contents
+    of its git directory.  This avoids spawning any processes when a
+    checkout is already at the requested revision.
+
+    Returns None if the answer can't be determined this way.
+    """
+    git_dir = devpipeline.scm.gitrefs.find_git_dir(repo_dir)
+    if not git_dir:
+        return None
+    branch, head = git_dir.head()
+    if (branch is None) and (head == revision):
+        return []
+    ref = git_dir.resolve(revision)
+    if not (head and ref):
+        return None
+    if ref.startswith("refs/heads/"):
+        if branch == ref[len("refs/heads/"):]:
+            return _branch_update(git_dir, branch, head, repo_dir)
+    elif (branch is None) and (git_dir.read_ref(ref, peel=True) == head):
+        # Anything other than a local branch leaves HEAD detached
+        return []
+    return None
+
+
 class Git:
 
     """This class is the core class to handle Git SCM operations."""
 
-    def __init__(self, args):
+    def __init__(self, args, force=False):
         self._args = args
+        self._force = force
 
     def checkout(self, repo_dir):
         """This function checks out code from a Git SCM server."""
@@ -90,6 +144,10 @@ class Git:
         """This function updates an existing checkout of source code."""
         rev = self._args.get("revision")
         if rev:
+            if not self._force:
+                commands = _fast_update(rev, repo_dir)
+                if commands is not None:
+                    return commands
             return [{
                 "args": [
                     'git',
@@ -100,6 +158,43 @@ class Git:
             }] + _ff_command(rev, repo_dir)
         return None
 
+    def update_commands(self, repo_dir):
+        """
+        This function builds commands that update a checkout to the latest
+        version of the configured revision, without inspecting the checkout
+        (e.g., so they can run later, after it's been cloned).
+        """
+        rev = self._args.get("revision")
+        if not rev:
+            return [{
+                "args": ['git', 'fetch'],
+                "cwd": repo_dir
+            }]
+        if _COMMIT_PATTERN.match(rev):
+            # a commit never moves
+            return [{
+                "args": ['git', 'fetch'],
+                "cwd": repo_dir
+            }, {
+                "args": ['git', 'checkout', rev],
+                "cwd": repo_dir
+            }]
+        # FETCH_HEAD is wherever rev is in the configured repository, which
+        # fast-forwards a branch and leaves a tag where it is
+        return [{
+            "args": ['git', 'fetch', self._args["uri"], rev],
+            "cwd": repo_dir
+        }, {
+            "args": ['git', 'checkout', rev],
+            "cwd": repo_dir
+        }, {
+            "args": ['git', 'merge', '--ff-only', 'FETCH_HEAD'],
+            "cwd": repo_dir
+        }]
+
+
+# Revisions that look like (possibly abbreviated) commit ids
+_COMMIT_PATTERN = re.compile(R"^[0-9a-f]{7,40}$")
 
 _GIT_ARGS = {
     "uri": None,
@@ -124,7 +219,8 @@ def make_git(current_target, common_wrapper):
     devpipeline.toolsupport.args_builder(
         "git", current_target, _GIT_ARGS, add_value)
     if git_args.get("uri"):
-        return common_wrapper(Git(git_args))
+        return common_wrapper(Git(git_args,
+                                  current_target.get("force", False)))
     else:
         raise Exception("No git uri ({})".format(
             current_target["current_target"]))
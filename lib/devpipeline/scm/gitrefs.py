@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+"""
+Read references straight from a Git repository.
+
+Spawning git to answer simple questions ("what's checked out?", "what's the
+upstream of this branch?") is expensive when it happens for every repository
+in a project.  This module reads HEAD, loose refs, packed-refs, and branch
+configuration directly from the repository's git directory.  Anything it
+can't answer with certainty is reported as unknown (None) so callers can fall
+back to running git.
+"""
+
+import os.path
+import re
+
+_SHA_PATTERN = re.compile(R"^[0-9a-f]{40}$")
+_SECTION_PATTERN = re.compile(
+    R'^\s*\[\s*([\w.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_VALUE_PATTERN = re.compile(R"^\s*([\w-]+)\s*(?:=\s*(.*?))?\s*$")
+
+# The places git looks when resolving a short revision name, in order
+_REF_PATTERNS = [
+    "{}",
+    "refs/{}",
+    "refs/tags/{}",
+    "refs/heads/{}",
+    "refs/remotes/{}",
+    "refs/remotes/{}/HEAD"
+]
+
+# Returned by GitDir.upstream for a branch that doesn't track anything
+NO_UPSTREAM = ""
+
+
+def _read_line(path):
+    try:
+        with open(path) as input_file:
+            return input_file.readline().strip()
+    except OSError:
+        return None
+
+
+def _read_config(path):
+    """
+    Read a git config file into a dictionary of (section, subsection) to a
+    dictionary of keys to a list of their values, in the order they appear.
+    Keys and section names are lowercase.
+    """
+    ret = {}
+    current = None
+    try:
+        with open(path) as input_file:
+            lines = input_file.readlines()
+    except OSError:
+        return ret
+    for line in lines:
+        line = line.split("#", 1)[0].split(";", 1)[0]
+        section = _SECTION_PATTERN.match(line)
+        if section:
+            current = ret.setdefault(
+                (section.group(1).lower(), section.group(2)), {})
+            continue
+        value = _VALUE_PATTERN.match(line)
+        if value and (current is not None):
+            current.setdefault(value.group(1).lower(), []).append(
+                (value.group(2) or "").strip('"'))
+    return ret
+
+
+def _last_value(section, key):
+    # the last value wins for single-valued keys, like git
+    values = section.get(key)
+    if values:
+        return values[-1]
+    return None
+
+
+def _map_refspec(refspec, ref):
+    """Map ref through a fetch refspec (e.g.,
+    +refs/heads/*:refs/remotes/origin/*)."""
+    source, _, destination = refspec.lstrip("+").partition(":")
+    if source.endswith("*") and destination.endswith("*"):
+        if ref.startswith(source[:-1]):
+            return destination[:-1] + ref[len(source) - 1:]
+    elif source == ref:
+        return destination
+    return None
+
+
+class GitDir:
+
+    """The references and configuration of a single repository."""
+
+    def __init__(self, git_dir, common_dir):
+        self._git_dir = git_dir
+        self._common_dir = common_dir
+        self._packed_refs = None
+        self._fully_peeled = False
+        self._config = None
+
+    def _get_packed_refs(self):
+        if self._packed_refs is None:
+            self._packed_refs = {}
+            previous = None
+            try:
+                with open(os.path.join(self._common_dir,
+                                       "packed-refs")) as input_file:
+                    for line in input_file:
+                        line = line.strip()
+                        if line.startswith("#"):
+                            # Without the fully-peeled trait, a tag without a
+                            # peeled line might still be annotated.
+                            self._fully_peeled = "fully-peeled" in line
+                        elif line.startswith("^") and previous:
+                            # peeled value of an annotated tag
+                            self._packed_refs[previous] = (
+                                self._packed_refs[previous][0], line[1:])
+                        elif line:
+                            sha, _, name = line.partition(" ")
+                            self._packed_refs[name] = (sha, None)
+                            previous = name
+            except OSError:
+                pass
+        return self._packed_refs
+
+    def _get_config(self):
+        if self._config is None:
+            self._config = _read_config(
+                os.path.join(self._common_dir, "config"))
+        return self._config
+
+    def _ref_dir(self, ref):
+        # HEAD and friends are per-worktree; everything else is shared
+        if "/" in ref:
+            return self._common_dir
+        return self._git_dir
+
+    def read_ref(self, ref, peel=False):
+        """
+        Get the commit a full reference name (e.g., refs/heads/master) points
+        to.  None is returned if the reference doesn't exist or can't be
+        resolved without reading objects (e.g., a loose annotated tag when
+        peel is set).
+
+        Arguments
+        ref -- the reference to read
+        peel -- whether the result should be the commit an annotated tag
+                points to
+        """
+        # symbolic references can chain, but not forever
+        for _ in range(8):
+            value = _read_line(os.path.join(self._ref_dir(ref), ref))
+            if value is None:
+                return self._read_packed_ref(ref, peel)
+            if value.startswith("ref: "):
+                ref = value[5:]
+            elif _SHA_PATTERN.match(value):
+                if peel and ref.startswith("refs/tags/"):
+                    # can't tell if this is an annotated tag
+                    return None
+                return value
+            else:
+                return None
+        return None
+
+    def _read_packed_ref(self, ref, peel):
+        packed = self._get_packed_refs().get(ref)
+        if not packed:
+            return None
+        sha, peeled = packed
+        if peel and ref.startswith("refs/tags/"):
+            if peeled:
+                return peeled
+            if not self._fully_peeled:
+                return None
+        return sha
+
+    def head(self):
+        """
+        Get the state of HEAD.  Returns a tuple of the branch name (None if
+        detached) and the commit HEAD points to (None if unknown).
+        """
+        value = _read_line(os.path.join(self._git_dir, "HEAD"))
+        if not value:
+            return (None, None)
+        if value.startswith("ref: refs/heads/"):
+            branch = value[len("ref: refs/heads/"):]
+            return (branch, self.read_ref("refs/heads/{}".format(branch)))
+        if _SHA_PATTERN.match(value):
+            return (None, value)
+        return (None, None)
+
+    def resolve(self, revision):
+        """
+        Find the full reference a short revision name refers to, the same
+        way git does.  None is returned if no reference matches.
+        """
+        for pattern in _REF_PATTERNS:
+            ref = pattern.format(revision)
+            if self.read_ref(ref) is not None:
+                return ref
+        return None
+
+    def upstream(self, branch):
+        """
+        Get the full reference of a branch's upstream (e.g.,
+        refs/remotes/origin/master).  NO_UPSTREAM is returned if the branch
+        doesn't track anything, and None if the upstream can't be determined
+        (e.g., none of the remote's fetch refspecs map it).
+        """
+        config = self._get_config()
+        branch_config = config.get(("branch", branch), {})
+        remote = _last_value(branch_config, "remote")
+        merge = _last_value(branch_config, "merge")
+        if not (remote or merge):
+            return NO_UPSTREAM
+        if not (remote and merge):
+            return None
+        if remote == ".":
+            return merge
+        for refspec in config.get(("remote", remote), {}).get("fetch", []):
+            if refspec.startswith("^"):
+                # negative refspecs only exclude refs
+                continue
+            ret = _map_refspec(refspec, merge)
+            if ret:
+                return ret
+        return None
+
+
+def find_git_dir(repo_dir):
+    """
+    Get a GitDir for a working tree, or None if one can't be found.
+
+    Arguments
+    repo_dir -- the top level of the working tree
+    """
+    git_dir = os.path.join(repo_dir, ".git")
+    if os.path.isfile(git_dir):
+        # a worktree or submodule; .git names the real git directory
+        value = _read_line(git_dir)
+        if not (value and value.startswith("gitdir: ")):
+            return None
+        git_dir = os.path.join(repo_dir, value[len("gitdir: "):])
+    elif not os.path.isdir(git_dir):
+        return None
+
+    common_dir = git_dir
+    common = _read_line(os.path.join(git_dir, "commondir"))
+    if common:
+        common_dir = os.path.join(git_dir, common)
+    return GitDir(git_dir, common_dir)
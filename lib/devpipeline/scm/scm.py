@@ -1,18 +1,20 @@
 #!/usr/bin/python3
 """This module implements some helper functions and a simple SCM tool."""
 
-import devpipeline.scm.git
+import devpipeline.plugins
+import devpipeline.scm
 import devpipeline.toolsupport
 
-# A dictionary of all supported scm tools.  Any supported tool should provide
-# an interface compatible with devpipeline.scm.Scm, but it's not required they
-# inherit from that class.  They keys in should match values in the "scm"
-# option in a build.config, and the value should be a function that creates an
-# Scm.
-_SCM_LOOKUP = {
-    "git": devpipeline.scm.git.make_git,
+# All supported scm tools.  Any supported tool should provide an interface
+# compatible with devpipeline.scm.Scm, but it's not required they inherit from
+# that class.  They keys in should match values in the "scm" option in a
+# build.config, and the value should be a function that creates an Scm.  Scm
+# tools from other packages are found through the devpipeline.scms entry point
+# group.
+_SCM_LOOKUP = devpipeline.plugins.PluginRegistry("devpipeline.scms", {
+    "git": "devpipeline.scm.git:make_git",
     "nothing": lambda c, cw: cw(devpipeline.scm.Scm())
-}
+})
 
 
 def _make_scm(current_target, common_wrapper):
@@ -43,6 +45,16 @@ class SimpleScm(devpipeline.toolsupport.SimpleTool):
         self._call_helper("Updating", self.real.update,
                           repo_dir)
 
+    async def checkout_async(self, repo_dir):
+        """Like checkout, but awaitable."""
+        await self._call_helper_async("Checking out", self.real.checkout,
+                                      repo_dir)
+
+    async def update_async(self, repo_dir):
+        """Like update, but awaitable."""
+        await self._call_helper_async("Updating", self.real.update,
+                                      repo_dir)
+
 
 def scm_task(current_target):
     """
@@ -56,3 +68,45 @@ def scm_task(current_target):
     src_dir = current_target["current_config"].get("dp.src_dir")
     scm.checkout(src_dir)
     scm.update(src_dir)
+
+
+async def scm_task_async(current_target):
+    """
+    Like scm_task, but awaitable.
+
+    Arguments
+    target - The target to operate on.
+    """
+    scm = _make_scm(current_target, lambda r: SimpleScm(r, current_target))
+
+    src_dir = current_target["current_config"].get("dp.src_dir")
+    await scm.checkout_async(src_dir)
+    await scm.update_async(src_dir)
+
+
+scm_task.asynchronous = scm_task_async
+
+
+def scm_plan(current_target):
+    """
+    Get the commands scm_task would run for a target, without running
+    anything.
+
+    Returns a list of (step, commands) pairs, in the order they run.
+    commands may be None or empty if a step has nothing to do.  If the scm
+    tool can provide update commands that don't depend on the checkout's
+    current state (update_commands), they're used for the update step, so
+    the plan stays valid after the checkout changes.
+
+    Arguments
+    current_target - The target to plan.
+    """
+    scm = _make_scm(current_target, lambda r: r)
+
+    src_dir = current_target["current_config"].get("dp.src_dir")
+    # scm tools don't have to inherit from Scm
+    update_fn = getattr(scm, "update_commands", scm.update)
+    return [
+        ("checkout", scm.checkout(src_dir)),
+        ("update", update_fn(src_dir))
+    ]
@@ -1,7 +1,18 @@
 #!/usr/bin/python3
 """This module has tool helper classes and functions."""
 
+import os.path
+import time
+
 import devpipeline.config.modifier
+import devpipeline.trace
+
+
+def _command_name(cmd):
+    args = cmd.get("args")
+    if args:
+        return os.path.basename(str(args[0]))
+    return "command"
 
 
 class SimpleTool():
@@ -16,20 +27,106 @@ class SimpleTool():
         self.env = current_target["env"]
         self.executor = current_target["executor"]
         self.name = current_target["current_target"]
+        self.tracer = current_target.get("tracer",
+                                         devpipeline.trace.NULL_TRACER)
+        self.history = current_target.get("history")
         self.real = real
+        self._step = None
 
     def _call_helper(self, step, helper_fn, *fn_args):
-        self.executor.message("{} {}".format(step, self.name))
-        cmds = helper_fn(*fn_args)
+        """Run a step, raising an exception if any of its commands fail.
+        Returns True if the step's commands ran, or None if the executor
+        didn't run them (e.g., a dry run)."""
+        self._step = helper_fn.__name__
+        with self.tracer.span(self.name, self._step):
+            self.executor.message("{} {}".format(step, self.name))
+            return self._check_step(
+                step, self._run_step(step, helper_fn(*fn_args)))
+
+    def _check_step(self, step, result):
+        if result is False:
+            raise Exception("{} {} failed".format(step, self.name))
+        return result
+
+    def _run_step(self, step, cmds):
+        """Run the commands for a step.  Subclasses can override this to
+        decide whether the commands need to run at all."""
+        # pylint: disable=unused-argument
+        return self._execute_commands(cmds)
+
+    def _execute_commands(self, cmds):
+        """Run the commands a helper returned, stopping at the first failure.
+        Returns True if everything that needed to run succeeded, False if
+        something failed, or None if the executor didn't run anything."""
         if cmds:
-            self.executor.execute(self.env, *cmds)
-        else:
-            self.executor.message("\t(Nothing to do)")
+            start = time.perf_counter()
+            results = []
+            for cmd in cmds:
+                with self._command_span(cmd):
+                    results.append(self.executor.execute(self.env, cmd))
+                if results[-1] is False:
+                    break
+            return self._commands_finished(results, start)
+        self.executor.message("\t(Nothing to do)")
+        return True
+
+    async def _call_helper_async(self, step, helper_fn, *fn_args):
+        """
+        Like _call_helper, but awaitable.  Commands run without blocking the
+        event loop, so steps for many targets can be in progress at once.
+        helper_fn runs in a worker thread, since some helpers inspect the
+        filesystem or run commands of their own to decide what to do.
+        """
+        # pylint: disable=import-outside-toplevel
+        import asyncio
+
+        self._step = helper_fn.__name__
+        with self.tracer.span(self.name, self._step):
+            self.executor.message("{} {}".format(step, self.name))
+            cmds = await asyncio.get_running_loop().run_in_executor(
+                None, helper_fn, *fn_args)
+            return self._check_step(
+                step, await self._run_step_async(step, cmds))
+
+    async def _run_step_async(self, step, cmds):
+        """Like _run_step, but awaitable."""
+        # pylint: disable=unused-argument
+        return await self._execute_commands_async(cmds)
+
+    async def _execute_commands_async(self, cmds):
+        """Like _execute_commands, but awaitable."""
+        if cmds:
+            start = time.perf_counter()
+            results = []
+            for cmd in cmds:
+                with self._command_span(cmd):
+                    results.append(
+                        await self.executor.execute_async(self.env, cmd))
+                if results[-1] is False:
+                    break
+            return self._commands_finished(results, start)
+        self.executor.message("\t(Nothing to do)")
+        return True
+
+    def _command_span(self, cmd):
+        return self.tracer.span(self.name, _command_name(cmd),
+                                category="command",
+                                args={"args": cmd.get("args")})
+
+    def _commands_finished(self, results, start):
+        if False in results:
+            return False
+        if None in results:
+            # nothing actually ran, so there's no duration to record
+            return None
+        if self.history and self._step:
+            self.history.record(self.name, self._step,
+                                time.perf_counter() - start)
+        return True
 
 
 def tool_builder(component, key, tool_map, *args):
     """This helper function initializes a tool with the given args."""
-    # pylint: disable=protected-access
     tool_name = component.get(key)
     if tool_name:
         tool_fn = tool_map.get(tool_name)
@@ -38,9 +135,9 @@ def tool_builder(component, key, tool_map, *args):
         else:
             raise Exception(
                 "Unknown {} '{}' for {}".format(
-                    key, tool_name, component._name))
+                    key, tool_name, component.name))
     else:
-        raise Exception("{} does not specify {}".format(component._name, key))
+        raise Exception("{} does not specify {}".format(component.name, key))
 
 
 def args_builder(prefix, current_target, args_dict, value_found_fn):
@@ -61,11 +158,10 @@ def args_builder(prefix, current_target, args_dict, value_found_fn):
                  value the option requires.
     value_found_fn -- A function to call when a match is found.
     """
-    for key, separator in args_dict.items():
-        option = "{}.{}".format(prefix, key)
-        value = devpipeline.config.modifier.modify_everything(
-            current_target["current_config"].get(option), current_target, option, separator)
-        value_found_fn(value, key)
+    values = devpipeline.config.modifier.modify_all(
+        prefix, current_target, args_dict)
+    for key in args_dict:
+        value_found_fn(values[key], key)
 
 
 def build_flex_args_keys(components):
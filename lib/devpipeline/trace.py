@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+"""
+Record how long work takes and export it as a Chrome trace.
+
+Spans are written in the Trace Event Format, which can be loaded by
+chrome://tracing, Perfetto, and similar viewers.  Every span belongs to a
+track (usually the target being processed), and each track is shown as its
+own row.
+"""
+
+import contextlib
+import json
+import threading
+import time
+
+# The track used for work that doesn't belong to a single target
+TOOL_TRACK = "dev-pipeline"
+
+
+def _now():
+    return time.perf_counter_ns()
+
+
+class Tracer:
+
+    """Collects timed spans in memory until they're written."""
+
+    def __init__(self):
+        self._start = _now()
+        self._events = []
+        self._tracks = {}
+        self._lock = threading.Lock()
+
+    def _track_id(self, track):
+        with self._lock:
+            track_id = self._tracks.get(track)
+            if track_id is None:
+                track_id = len(self._tracks)
+                self._tracks[track] = track_id
+            return track_id
+
+    @contextlib.contextmanager
+    def span(self, track, name, category="step", args=None):
+        """
+        Time the enclosed block.
+
+        Arguments
+        track -- the name of the track the span belongs to
+        name -- the name of the span
+        category -- the kind of work being done
+        args -- a dictionary of extra information to attach to the span
+        """
+        track_id = self._track_id(track)
+        start = _now()
+        try:
+            yield
+        finally:
+            end = _now()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "pid": 1,
+                "tid": track_id,
+                "ts": (start - self._start) / 1000,
+                "dur": (end - start) / 1000
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self._events.append(event)
+
+    def events(self):
+        """Get every recorded event, including track names."""
+        with self._lock:
+            ret = [{
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": track_id,
+                "args": {"name": track}
+            } for track, track_id in self._tracks.items()]
+            ret.extend(sorted(self._events, key=lambda event: event["ts"]))
+        return ret
+
+    def write(self, path):
+        """Write every recorded event to path as Chrome trace JSON."""
+        with open(path, "w") as output_file:
+            json.dump({
+                "traceEvents": self.events(),
+                "displayTimeUnit": "ms"
+            }, output_file)
+
+
+class NullTracer:
+
+    """A tracer that records nothing."""
+
+    # pylint: disable=too-few-public-methods,unused-argument,no-self-use
+    def span(self, track, name, category="step", args=None):
+        # pylint: disable=missing-docstring
+        return contextlib.nullcontext()
+
+
+NULL_TRACER = NullTracer()
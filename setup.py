@@ -9,6 +9,7 @@ setup(
         "": "lib"
     },
     packages=find_packages("lib"),
+    python_requires=">=3.9",
 
     entry_points={
         "console_scripts": [
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.build.cmake
+
+
+class TestCMakeReconfigure(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.build_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _configure(self, args, configured=False):
+        cmake = devpipeline.build.cmake.CMake({}, args)
+        ret = cmake.configure("/src", self.build_dir)
+        if configured:
+            with open(os.path.join(self.build_dir, "CMakeCache.txt"), "w"):
+                pass
+            cmake.configured("/src", self.build_dir)
+        return ret
+
+    def test_fresh(self):
+        cmds = self._configure(["-DA=1"])
+        self.assertEqual(["cmake", "/src", "-DA=1"], cmds[0]["args"])
+
+    def test_unchanged(self):
+        self._configure(["-DA=1"], configured=True)
+        self.assertIsNone(self._configure(["-DA=1"]))
+
+    def test_forced(self):
+        self._configure(["-DA=1"], configured=True)
+        cmake = devpipeline.build.cmake.CMake({}, ["-DA=1"], force=True)
+        self.assertIsNotNone(cmake.configure("/src", self.build_dir))
+
+    def test_changed(self):
+        self._configure(["-DA=1"], configured=True)
+        self.assertIsNotNone(self._configure(["-DA=2"]))
+
+    def test_missing_cache(self):
+        self._configure(["-DA=1"], configured=True)
+        os.remove(os.path.join(self.build_dir, "CMakeCache.txt"))
+        self.assertIsNotNone(self._configure(["-DA=1"]))
+
+    def test_failed_change(self):
+        self._configure(["-DA=1"], configured=True)
+        # -DA=2 fails, leaving a CMakeCache.txt from the attempt
+        self.assertIsNotNone(self._configure(["-DA=2"]))
+        self.assertIsNotNone(self._configure(["-DA=1"]))
+
+
+class TestCMakeParallel(unittest.TestCase):
+    def test_parallel(self):
+        cmake = devpipeline.build.cmake.CMake({"parallel": "4"}, [])
+        self.assertEqual(["cmake", "--build", "/build", "--parallel", "4"],
+                         cmake.build("/build")[0]["args"])
+        self.assertEqual(["cmake", "--build", "/build", "--parallel", "4",
+                          "--target", "install", "--", "DESTDIR=out"],
+                         cmake.install("/build", "out")[0]["args"])
+
+    def test_default(self):
+        cmake = devpipeline.build.cmake.CMake({}, [])
+        self.assertEqual(["cmake", "--build", "/build"],
+                         cmake.build("/build")[0]["args"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.build.build
+import devpipeline.build.cmake
+import devpipeline.build.stamp
+
+
+class _RecordingExecutor:
+    def __init__(self, succeed=True):
+        self.succeed = succeed
+        self.executed = []
+
+    def message(self, msg):
+        pass
+
+    def execute(self, environment, *args):
+        self.executed.extend(args)
+        return self.succeed
+
+
+class _Builder:
+    def __init__(self, flags="-O2"):
+        self.flags = flags
+
+    def configure(self, src_dir, build_dir):
+        return [{"args": ["configure", src_dir, self.flags],
+                 "cwd": build_dir}]
+
+    def build(self, build_dir):
+        return [{"args": ["build"], "cwd": build_dir}]
+
+    def install(self, build_dir, path):
+        return None
+
+
+def _write(path, contents):
+    with open(path, "w") as output_file:
+        output_file.write(contents)
+
+
+class TestSourceFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = self.tmp_dir.name
+        os.makedirs(os.path.join(self.src_dir, ".git"))
+        os.makedirs(os.path.join(self.src_dir, "build"))
+        _write(os.path.join(self.src_dir, "main.c"), "int main;")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _fingerprint(self, content=False):
+        return devpipeline.build.stamp.source_fingerprint(
+            self.src_dir, skip=[os.path.join(self.src_dir, "build")],
+            content=content)
+
+    def test_file_change(self):
+        before = self._fingerprint()
+        _write(os.path.join(self.src_dir, "main.c"), "int main();")
+        self.assertNotEqual(before, self._fingerprint())
+
+    def test_ignored_directories(self):
+        before = self._fingerprint()
+        _write(os.path.join(self.src_dir, ".git", "HEAD"), "ref")
+        _write(os.path.join(self.src_dir, "build", "out.o"), "obj")
+        self.assertEqual(before, self._fingerprint())
+
+    def test_content_ignores_touch(self):
+        path = os.path.join(self.src_dir, "main.c")
+        before = self._fingerprint(content=True)
+        info = os.stat(path)
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+        self.assertEqual(before, self._fingerprint(content=True))
+
+
+class TestStampedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.build_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _build(self, builder, inputs="inputs", succeed=True, force=False):
+        executor = _RecordingExecutor(succeed)
+        stamps = devpipeline.build.stamp.Stamps(self.build_dir, inputs, force)
+        simple = devpipeline.build.build.SimpleBuild(builder, {
+            "env": {},
+            "executor": executor,
+            "current_target": "foo"
+        }, stamps)
+        simple.configure("src", self.build_dir)
+        simple.build(self.build_dir)
+        simple.install(self.build_dir, "install")
+        return [cmd["args"][0] for cmd in executor.executed]
+
+    def test_first_build(self):
+        self.assertEqual(["configure", "build"], self._build(_Builder()))
+
+    def test_up_to_date(self):
+        self._build(_Builder())
+        self.assertEqual([], self._build(_Builder()))
+
+    def test_command_change(self):
+        self._build(_Builder())
+        self.assertEqual(["configure", "build"],
+                         self._build(_Builder("-O0")))
+
+    def test_input_change(self):
+        self._build(_Builder())
+        self.assertEqual(["configure", "build"],
+                         self._build(_Builder(), inputs="changed"))
+
+    def test_failure(self):
+        self.assertRaises(Exception, self._build, _Builder(), succeed=False)
+        self.assertEqual(["configure", "build"], self._build(_Builder()))
+
+    def test_configured_cmake(self):
+        # the second configure is skipped by CMake itself, which mustn't
+        # change the fingerprint of it or any later step
+        _write(os.path.join(self.build_dir, "CMakeCache.txt"), "")
+        self.assertEqual(["cmake", "cmake", "cmake"], self._build(
+            devpipeline.build.cmake.CMake({}, ["-DA=1"])))
+        self.assertEqual([], self._build(
+            devpipeline.build.cmake.CMake({}, ["-DA=1"])))
+        self.assertEqual([], self._build(
+            devpipeline.build.cmake.CMake({}, ["-DA=1"])))
+
+    def test_force(self):
+        self._build(_Builder())
+        self.assertEqual(["configure", "build"],
+                         self._build(_Builder(), force=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+
+import os
+import unittest
+
+import loader
+
+import devpipeline.common
+import devpipeline.config.component
+
+
+def _make_target(values):
+    return devpipeline.config.component.Component("foo", values)
+
+
+class TestTargetEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.base = {"PATH": "/bin", "HOME": "/home/foo"}
+
+    def test_unchanged_shares_base(self):
+        env = devpipeline.common.create_target_environment(
+            _make_target({"build": "cmake"}), self.base)
+        self.assertIs(self.base, env.materialize())
+        self.assertEqual(self.base, dict(env.items()))
+
+    def test_options(self):
+        env = devpipeline.common.create_target_environment(_make_target({
+            "env.cc": "clang",
+            "env_append.path": "/opt/bin",
+            "env.home": "",
+            "env_unknown.foo": "bar"
+        }), self.base)
+        self.assertEqual({
+            "PATH": "/bin{}/opt/bin".format(os.pathsep),
+            "CC": "clang"
+        }, dict(env.items()))
+        self.assertNotIn("HOME", env)
+        self.assertEqual({"PATH": "/bin", "HOME": "/home/foo"}, self.base)
+
+    def test_materialized_once(self):
+        env = devpipeline.common.create_target_environment(
+            _make_target({"env.cc": "clang"}), self.base)
+        materialized = env.materialize()
+        self.assertIs(materialized, env.materialize())
+        env["CXX"] = "clang++"
+        self.assertEqual("clang++", env.materialize()["CXX"])
+        self.assertNotIn("CXX", materialized)
+
+    def test_copy(self):
+        env = devpipeline.common.create_target_environment(
+            _make_target({"env.cc": "clang"}), self.base)
+        copy = env.copy()
+        copy["CC"] = "gcc"
+        del copy["PATH"]
+        self.assertEqual("clang", env["CC"])
+        self.assertEqual("/bin", env["PATH"])
+        self.assertNotIn("PATH", copy)
+        self.assertRaises(KeyError, copy.__delitem__, "PATH")
+
+
+if __name__ == "__main__":
+    unittest.main()
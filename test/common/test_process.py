@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.common
+import devpipeline.config.component
+import devpipeline.executor
+
+# d depends on b and c, which both depend on a
+_COMPONENTS = {
+    "a": {},
+    "b": {"depends": "a"},
+    "c": {"depends": "a"},
+    "d": {"depends": "b, c"}
+}
+
+
+def _make_tool(task, jobs, build_root):
+    tool = devpipeline.common.TargetTool([task])
+    tool.components = {
+        name: devpipeline.config.component.Component(
+            name, dict(values, **{"dp.build_root": build_root}))
+        for name, values in _COMPONENTS.items()
+    }
+    tool.targets = sorted(_COMPONENTS)
+    tool.environment = {}
+    tool.executor = devpipeline.executor.SilentExecutor()
+    tool.jobs = jobs
+    return tool
+
+
+class TestProcessTargets(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _check_failure(self, jobs):
+        processed = []
+
+        def _task(config_info):
+            target = config_info["current_target"]
+            if target == "b":
+                raise Exception("build b failed")
+            processed.append(target)
+
+        tool = _make_tool(_task, jobs, self.tmp_dir.name)
+        with self.assertRaises(Exception) as context:
+            tool.process()
+        # only b's dependents are skipped
+        self.assertEqual(["a", "c"], sorted(processed))
+        self.assertEqual(
+            "Failed targets: b (build b failed); skipped targets: d",
+            str(context.exception))
+
+    def test_serial_failure(self):
+        self._check_failure(1)
+
+    def test_parallel_failure(self):
+        self._check_failure(2)
+
+    def test_serial_order(self):
+        processed = []
+        tool = _make_tool(
+            lambda config_info: processed.append(
+                config_info["current_target"]), 1, self.tmp_dir.name)
+        tool.process()
+        self.assertEqual(["a", "b", "c", "d"], processed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import loader
+
+import devpipeline.config.config
+import devpipeline.config.inputs
+
+_BUILD_CONFIG = """
+[DEFAULT]
+build = nothing
+
+[foo]
+value = 1
+
+[bar]
+value = ${foo:value}
+
+[baz]
+value = 3
+"""
+
+
+class TestCacheUpdates(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_dir = "{}/dp".format(self.tmp_dir.name)
+        self.old_config_dir = os.environ.get("DEV_PIPELINE_CONFIG")
+        os.environ["DEV_PIPELINE_CONFIG"] = self.config_dir
+        self.raw_path = "{}/build.config".format(self.tmp_dir.name)
+        self.cache_dir = "{}/build".format(self.tmp_dir.name)
+        self.cache_file = "{}/build.cache".format(self.cache_dir)
+        self._write(self.raw_path, _BUILD_CONFIG)
+        devpipeline.config.config.process_config(
+            self.raw_path, self.cache_dir, "build.cache", overrides="local")
+
+    def tearDown(self):
+        if self.old_config_dir is None:
+            del os.environ["DEV_PIPELINE_CONFIG"]
+        else:
+            os.environ["DEV_PIPELINE_CONFIG"] = self.old_config_dir
+        self.tmp_dir.cleanup()
+
+    def _write(self, path, contents):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as output_file:
+            output_file.write(contents)
+        # make sure mtime-based checks notice the change
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+
+    def _load(self):
+        return devpipeline.config.config.update_cache(
+            cache_file=self.cache_file)
+
+    def _report(self):
+        invalidated = self._load().invalidated
+        devpipeline.config.config.clear_invalidated(self.cache_file,
+                                                    invalidated)
+        return invalidated
+
+    def test_unchanged(self):
+        components = self._load()
+        self.assertEqual(["foo", "bar", "baz"], components.sections())
+        self.assertEqual(set(), components.invalidated)
+        self.assertEqual("1", components["bar"].get("value"))
+
+    def test_section_change(self):
+        self._write(self.raw_path, _BUILD_CONFIG.replace("value = 1",
+                                                         "value = 2"))
+        components = self._load()
+        # bar refers to foo, so it's affected as well
+        self.assertEqual({"foo", "bar"}, components.invalidated)
+        self.assertEqual("2", components["bar"].get("value"))
+        # still invalidated until something reports it
+        self.assertEqual({"foo", "bar"}, self._load().invalidated)
+        self.assertEqual({"foo", "bar"}, self._report())
+        self.assertEqual(set(), self._load().invalidated)
+
+    def test_pending_change(self):
+        self._write(self.raw_path, _BUILD_CONFIG.replace("value = 1",
+                                                         "value = 2"))
+        self._load()
+        self._write(self.raw_path, _BUILD_CONFIG.replace("value = 3",
+                                                         "value = 4")
+                    .replace("value = 1", "value = 2"))
+        # baz is added to the targets that weren't reported
+        self.assertEqual({"foo", "bar", "baz"}, self._load().invalidated)
+        devpipeline.config.config.clear_invalidated(self.cache_file, {"baz"})
+        self.assertEqual({"foo", "bar"}, self._load().invalidated)
+
+    def test_old_mtime(self):
+        # e.g., restored with cp -p; only the contents show the change
+        self._load()
+        with open(self.raw_path, "w") as output_file:
+            output_file.write(_BUILD_CONFIG.replace("value = 1",
+                                                    "value = 2"))
+        os.utime(self.raw_path, (946684800, 946684800))
+        components = self._load()
+        self.assertEqual({"foo", "bar"}, components.invalidated)
+        self.assertEqual("2", components["bar"].get("value"))
+        self.assertEqual("2", self._load()["bar"].get("value"))
+
+    def test_touched(self):
+        # same contents, so nothing is invalidated, and the new metadata is
+        # saved so the contents aren't hashed again
+        self._write(self.raw_path, _BUILD_CONFIG)
+        self.assertEqual(set(), self._load().invalidated)
+        with unittest.mock.patch.object(devpipeline.config.inputs,
+                                        "content_hash") as hash_fn:
+            self.assertEqual(set(), self._load().invalidated)
+        hash_fn.assert_not_called()
+
+    def test_override_change(self):
+        override_path = "{}/overrides.d/local/baz.conf".format(
+            self.config_dir)
+        self._write(override_path, "[append]\nvalue = 4\n")
+        self.assertEqual({"baz"}, self._load().invalidated)
+        self.assertEqual({"baz"}, self._report())
+        self.assertEqual(set(), self._load().invalidated)
+        os.remove(override_path)
+        self.assertEqual({"baz"}, self._load().invalidated)
+
+
+if __name__ == "__main__":
+    unittest.main()
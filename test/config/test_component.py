@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+
+import unittest
+
+import loader
+
+import devpipeline.config.component
+import devpipeline.config.parser
+
+
+def _make_config():
+    config = devpipeline.config.parser._make_parser()
+    config.read_string("""
+[DEFAULT]
+root = /src
+build = cmake
+
+[foo]
+path = ${root}/foo
+cost = $$5
+
+[bar]
+build = nothing
+broken = ${missing}
+""")
+    return config
+
+
+class TestComponent(unittest.TestCase):
+    def setUp(self):
+        self.components = devpipeline.config.component.make_components(
+            _make_config())
+
+    def test_sections(self):
+        self.assertEqual(["foo", "bar"], self.components.sections())
+        self.assertIn("foo", self.components)
+        self.assertNotIn("DEFAULT", self.components)
+
+    def test_values(self):
+        foo = self.components["foo"]
+        self.assertEqual("foo", foo.name)
+        self.assertEqual("/src/foo", foo.get("path"))
+        self.assertEqual("$5", foo.get("cost"))
+        self.assertEqual("cmake", foo.get("build"))
+        self.assertEqual("nothing", self.components["bar"].get("build"))
+
+    def test_missing(self):
+        foo = self.components["foo"]
+        self.assertNotIn("missing", foo)
+        self.assertIsNone(foo.get("missing"))
+        self.assertEqual("default", foo.get("missing", "default"))
+
+    def test_matches_section(self):
+        config = _make_config()
+        foo = self.components["foo"]
+        self.assertEqual(dict(config["foo"].items()), dict(foo.items()))
+
+    def test_interpolation_error(self):
+        bar = self.components["bar"]
+        self.assertIn("broken", bar)
+        self.assertRaises(Exception, bar.get, "broken")
+        self.assertEqual("nothing", bar.get("build"))
+
+
+if __name__ == "__main__":
+    unittest.main()
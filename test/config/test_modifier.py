@@ -4,7 +4,7 @@ import unittest
 
 import loader
 
-from devpipeline.config.modifier import modify
+from devpipeline.config.modifier import modify, modify_all, modify_everything
 
 
 class TestConfigModifier(unittest.TestCase):
@@ -64,5 +64,46 @@ class TestConfigModifier(unittest.TestCase):
         self.assertEqual("foo----bar", modify("foo", config, "name", "----"))
 
 
+class TestConfigModifyAll(unittest.TestCase):
+    def _make_target(self, config):
+        return {
+            "current_config": config,
+            "current_target": "foo"
+        }
+
+    def test_matches_single(self):
+        config = {
+            "cmake.cflags": "-O2",
+            "cmake.cflags.append": "-g",
+            "cmake.cflags.debug.prepend": "-O0",
+            "cmake.cxx": "g++",
+            "cmake.cxx.erase": None,
+            "cmake.cc.override": "clang",
+            "cmake.unused.append": "nothing",
+            "git.uri": "somewhere"
+        }
+        args = {
+            "cflags": " ",
+            "cflags.debug": " ",
+            "cxx": None,
+            "cc": None,
+            "prefix": None
+        }
+        target = self._make_target(config)
+        values = modify_all("cmake", target, args)
+        self.assertEqual(len(args), len(values))
+        for key, separator in args.items():
+            option = "cmake.{}".format(key)
+            self.assertEqual(
+                modify_everything(config.get(option), target, option,
+                                  separator),
+                values[key])
+        self.assertEqual("-O2 -g", values["cflags"])
+        self.assertEqual("-O0", values["cflags.debug"])
+        self.assertEqual("clang", values["cc"])
+        self.assertEqual(None, values["cxx"])
+        self.assertEqual(None, values["prefix"])
+
+
 if __name__ == "__main__":
     unittest.main()
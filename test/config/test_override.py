@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 
 import os.path
+import tempfile
 import unittest
+import unittest.mock
 
 import loader
 
@@ -61,5 +63,46 @@ class TestConfigOverride(unittest.TestCase):
         self.assertEqual(2, count)
 
 
+class TestOverrideIndex(unittest.TestCase):
+    def setUp(self):
+        devpipeline.config.override.reset_index()
+        self.addCleanup(devpipeline.config.override.reset_index)
+
+    def test_list(self):
+        self.assertEqual(["foo"], devpipeline.config.override.list_overrides(
+            devpipeline.config.paths.get_overrides_root(_config_dir),
+            "simple"))
+
+    def test_missing_package(self):
+        root = devpipeline.config.paths.get_overrides_root(_config_dir)
+        # list the directories
+        devpipeline.config.override.read_all_overrides(
+            root, ["simple", "trivial", "missing"], "foo",
+            lambda override, vals: None)
+        with unittest.mock.patch("os.stat") as stat_fn:
+            count = devpipeline.config.override.read_all_overrides(
+                root, ["simple", "trivial", "missing"], "bar",
+                lambda override, vals: None)
+        self.assertEqual(0, count)
+        stat_fn.assert_not_called()
+
+    def test_reset(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.mkdir(os.path.join(root, "late"))
+            self.assertEqual(
+                [], devpipeline.config.override.list_overrides(root, "late"))
+            with open(os.path.join(root, "late", "foo.conf"), "w") as output:
+                output.write("[append]\nval = abc\n")
+            self.assertEqual(
+                [], devpipeline.config.override.list_overrides(root, "late"))
+            devpipeline.config.override.reset_index()
+            found = []
+            count = devpipeline.config.override.read_all_overrides(
+                root, ["late"], "foo",
+                lambda override, vals: found.append(vals))
+            self.assertEqual(1, count)
+            self.assertEqual([{"val.append": "abc"}], found)
+
+
 if __name__ == "__main__":
     unittest.main()
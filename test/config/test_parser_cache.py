@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+import os
+import os.path
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.config.parser
+
+
+class TestParserCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = "{}/profiles.conf".format(self.tmp_dir.name)
+        self._write("[debug]\nbuild_type = Debug\n")
+        self.reads = 0
+
+    def tearDown(self):
+        devpipeline.config.parser.invalidate_cache()
+        self.tmp_dir.cleanup()
+
+    def _write(self, contents, mtime=None):
+        with open(self.path, "w") as output_file:
+            output_file.write(contents)
+        if mtime:
+            os.utime(self.path, (mtime, mtime))
+
+    def _counting_read(self, path):
+        self.reads += 1
+        return devpipeline.config.parser.read_config(path)
+
+    def test_missing(self):
+        self.assertIsNone(devpipeline.config.parser.read_cached(
+            "{}/missing.conf".format(self.tmp_dir.name)))
+
+    def test_reuse(self):
+        first = devpipeline.config.parser.read_cached(
+            self.path, self._counting_read)
+        second = devpipeline.config.parser.read_cached(
+            self.path, self._counting_read)
+        self.assertIs(first, second)
+        self.assertEqual(1, self.reads)
+        self.assertEqual("Debug", first.get("debug", "build_type"))
+
+    def test_modified(self):
+        self._write("[debug]\nbuild_type = Debug\n", mtime=1000000)
+        devpipeline.config.parser.read_cached(self.path, self._counting_read)
+        self._write("[debug]\nbuild_type = Release\n", mtime=2000000)
+        config = devpipeline.config.parser.read_cached(
+            self.path, self._counting_read)
+        self.assertEqual(2, self.reads)
+        self.assertEqual("Release", config.get("debug", "build_type"))
+
+    def test_invalidate(self):
+        devpipeline.config.parser.read_cached(self.path, self._counting_read)
+        devpipeline.config.parser.invalidate_cache(self.path)
+        devpipeline.config.parser.read_cached(self.path, self._counting_read)
+        self.assertEqual(2, self.reads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+import marshal
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.config.component
+import devpipeline.config.parser
+import devpipeline.config.snapshot
+import devpipeline.version
+
+
+def _make_components():
+    config = devpipeline.config.parser._make_parser()
+    config.read_string("""
+[DEFAULT]
+root = /src
+
+[foo]
+path = ${root}/foo
+env.foo_root = ${path}
+
+[bar]
+depends = foo
+broken = ${missing}
+""")
+    return devpipeline.config.component.make_components(config)
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_path = "{}/build.config".format(self.tmp_dir.name)
+        self.path = devpipeline.config.snapshot.snapshot_path(
+            "{}/build.cache".format(self.tmp_dir.name))
+        components = _make_components()
+        devpipeline.config.snapshot.write_snapshot(
+            self.path,
+            [(name, devpipeline.config.snapshot.serialize_component(
+                components[name])) for name in components],
+            {"inputs": [self.input_path]})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _load(self):
+        return devpipeline.config.snapshot.read_snapshot(
+            self.path).components()
+
+    def test_roundtrip(self):
+        components = self._load()
+        self.assertEqual(["foo", "bar"], components.sections())
+        self.assertIn("bar", components)
+        self.assertNotIn("baz", components)
+        expected = _make_components()
+        self.assertEqual(dict(expected["foo"].items()),
+                         dict(components["foo"].items()))
+        self.assertEqual("foo", components["bar"].get("depends"))
+        self.assertEqual("/src", components["bar"].get("root"))
+
+    def test_environment(self):
+        components = self._load()
+        self.assertEqual(((None, "FOO_ROOT", "env.foo_root"),),
+                         components["foo"].environment)
+        self.assertEqual((), components["bar"].environment)
+
+    def test_lazy(self):
+        components = self._load()
+        components["foo"]
+        self.assertEqual(["foo"], list(components._components))
+        self.assertIs(components["foo"], components["foo"])
+
+    def test_errors(self):
+        components = self._load()
+        self.assertRaises(Exception, components["bar"].get, "broken")
+
+    def test_metadata(self):
+        snapshot = devpipeline.config.snapshot.read_snapshot(self.path)
+        self.assertEqual({"inputs": [self.input_path]}, snapshot.metadata)
+        self.assertEqual(["foo", "bar"], snapshot.sections())
+
+    def test_missing(self):
+        os.remove(self.path)
+        self.assertIsNone(
+            devpipeline.config.snapshot.read_snapshot(self.path))
+
+    def test_corrupt(self):
+        with open(self.path, "wb") as output_file:
+            output_file.write(b"garbage")
+        self.assertIsNone(
+            devpipeline.config.snapshot.read_snapshot(self.path))
+
+    def test_corrupt_index(self):
+        # a valid header followed by an index of the wrong shape
+        for index in [["not", "a", "dict"],
+                      {"version": devpipeline.version.ID}]:
+            encoded = marshal.dumps(index)
+            with open(self.path, "wb") as output_file:
+                # pylint: disable=protected-access
+                output_file.write(devpipeline.config.snapshot._HEADER.pack(
+                    devpipeline.config.snapshot._MAGIC,
+                    devpipeline.config.snapshot._FORMAT_VERSION,
+                    marshal.version, len(encoded)))
+                output_file.write(encoded)
+            self.assertIsNone(
+                devpipeline.config.snapshot.read_snapshot(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
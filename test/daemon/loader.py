@@ -0,0 +1,7 @@
+#!/usr/bin/python3
+
+import os.path
+import sys
+
+_lib_path = "{}/../../lib".format(os.path.dirname(__file__))
+sys.path.append(_lib_path)
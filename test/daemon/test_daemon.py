@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import loader
+
+import devpipeline.daemon
+
+_LIB_DIR = "{}/../../lib".format(os.path.dirname(os.path.abspath(__file__)))
+
+_CONFIG = """[DEFAULT]
+build = nothing
+scm = nothing
+
+[a]
+
+[b]
+depends = a
+"""
+
+
+class TestMessages(unittest.TestCase):
+    def test_round_trip(self):
+        left, right = socket.socketpair()
+        with left, right:
+            devpipeline.daemon.send_message(left, {"pid": 1})
+            devpipeline.daemon.send_message(left, {"exit": 2})
+            left.close()
+            first, pending = devpipeline.daemon.read_message(right, b"")
+            second, pending = devpipeline.daemon.read_message(right, pending)
+            last, _ = devpipeline.daemon.read_message(right, pending)
+        self.assertEqual({"pid": 1}, first)
+        self.assertEqual({"exit": 2}, second)
+        self.assertIsNone(last)
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        os.makedirs(os.path.join(root, "dp-config"))
+        with open(os.path.join(root, "build.config"), "w") as output_file:
+            output_file.write(_CONFIG)
+        self.env = os.environ.copy()
+        self.env["PYTHONPATH"] = _LIB_DIR
+        self.env["DEV_PIPELINE_CONFIG"] = os.path.join(root, "dp-config")
+        self.env.pop(devpipeline.daemon.DISABLE_VARIABLE, None)
+        self.build_dir = os.path.join(root, "build")
+        self._driver(["configure"], cwd=root)
+        self.socket_path = devpipeline.daemon.socket_path(self.build_dir)
+        self.daemon = subprocess.Popen(
+            self._command(["daemon", "--idle-timeout", "60"]),
+            cwd=self.build_dir, env=self.env, stderr=subprocess.DEVNULL)
+        for _ in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.05)
+
+    def tearDown(self):
+        self.daemon.terminate()
+        self.daemon.wait()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def _command(args):
+        return [sys.executable, "-m", "devpipeline.exec.driver"] + args
+
+    def _driver(self, args, cwd=None):
+        return subprocess.run(self._command(args), cwd=cwd or self.build_dir,
+                              env=self.env, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, check=False)
+
+    def test_forwarded(self):
+        result = self._driver(["build-order", "--method", "list"])
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(b"['a', 'b']\n", result.stdout)
+
+    def test_failure_status(self):
+        result = self._driver(["build-order", "nope"])
+        self.assertNotEqual(0, result.returncode)
+        self.assertIn(b"nope", result.stderr)
+
+    def _zombies(self):
+        ret = []
+        for entry in os.listdir("/proc"):
+            try:
+                with open("/proc/{}/stat".format(entry)) as stat_file:
+                    fields = stat_file.read().rpartition(")")[2].split()
+            except (OSError, ValueError):
+                continue
+            if (fields[0] == "Z") and (int(fields[1]) == self.daemon.pid):
+                ret.append(entry)
+        return ret
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "requires /proc")
+    def test_reaps_while_idle(self):
+        self.assertEqual(0, self._driver(["build-order"]).returncode)
+        for _ in range(100):
+            if not self._zombies():
+                break
+            time.sleep(0.02)
+        self.assertEqual([], self._zombies())
+
+    def test_stops_cleanly(self):
+        self.assertTrue(os.path.exists(self.socket_path))
+        self.daemon.terminate()
+        self.daemon.wait()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
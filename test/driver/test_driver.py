@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+
+import os
+import subprocess
+import sys
+import unittest
+
+import loader
+
+import devpipeline.exec.driver
+
+_LIB_DIR = "{}/../../lib".format(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _imported_modules(code):
+    # a fresh interpreter, so nothing imported by other tests interferes
+    env = os.environ.copy()
+    env["PYTHONPATH"] = _LIB_DIR
+    output = subprocess.check_output([
+        sys.executable, "-c",
+        "{}\nimport sys\nprint('\\n'.join(sys.modules))".format(code)
+    ], env=env)
+    return set(output.decode("utf-8").split())
+
+
+class TestDriver(unittest.TestCase):
+    def test_tools_resolve(self):
+        # pylint: disable=protected-access
+        for name in devpipeline.exec.driver._TOOLS:
+            self.assertTrue(callable(devpipeline.exec.driver._load_tool(name)))
+
+    def test_unknown_tool(self):
+        # pylint: disable=protected-access
+        self.assertIsNone(devpipeline.exec.driver._load_tool("nope"))
+
+    def test_lazy_imports(self):
+        modules = _imported_modules("import devpipeline.exec.driver")
+        self.assertNotIn("devpipeline.exec.build", modules)
+        self.assertNotIn("devpipeline.executor", modules)
+        self.assertNotIn("subprocess", modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import loader
+
+import devpipeline.aio
+import devpipeline.executor
+
+
+def _python(code):
+    return {
+        "args": [sys.executable, "-c", code]
+    }
+
+
+def _execute(executor, *cmds):
+    return asyncio.run(executor.execute_async(os.environ.copy(), *cmds))
+
+
+class TestAsyncExecutor(unittest.TestCase):
+    def test_buffered_output(self):
+        executor = devpipeline.executor.QuietExecutor().buffered()
+        self.assertTrue(_execute(executor, _python("print('hello')"),
+                                 _python("print('world')")))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            executor.flush()
+        self.assertEqual("hello\nworld\n", output.getvalue())
+
+    def test_failure(self):
+        executor = devpipeline.executor.QuietExecutor().buffered()
+        self.assertFalse(_execute(executor, _python("exit(3)"),
+                                  _python("print('still runs')")))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            executor.flush()
+        self.assertIn("non-zero exit status 3", output.getvalue())
+        self.assertIn("still runs", output.getvalue())
+
+    def test_dry_run(self):
+        executor = devpipeline.executor.DryRunExecutor().buffered()
+        self.assertIsNone(_execute(executor, _python("exit(1)")))
+        self.assertEqual(1, len(executor._buffer))
+
+    def test_log(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            executor = devpipeline.executor.LogExecutor().for_target(
+                "foo", {"dp.build_root": tmp_dir})
+            self.assertTrue(_execute(executor, _python("print('hello')")))
+            with open(os.path.join(tmp_dir, "logs", "foo.log")) as log_file:
+                self.assertIn("hello\n", log_file.read())
+
+    def test_overlap(self):
+        executor = devpipeline.executor.SilentExecutor()
+        cmd = _python("import time; time.sleep(0.5)")
+
+        async def _run_all():
+            return await asyncio.gather(*[
+                executor.execute_async(os.environ.copy(), dict(cmd))
+                for _ in range(4)])
+
+        start = time.perf_counter()
+        self.assertTrue(all(asyncio.run(_run_all())))
+        self.assertLess(time.perf_counter() - start, 1.5)
+
+
+class TestCoroutinePool(unittest.TestCase):
+    def test_limit(self):
+        running = []
+        peak = []
+
+        async def _work(value):
+            running.append(value)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(value)
+            return value * 2
+
+        pool = devpipeline.aio.CoroutinePool(2)
+        try:
+            futures = [pool.submit(_work, value) for value in range(6)]
+            self.assertEqual([0, 2, 4, 6, 8, 10],
+                             [future.result() for future in futures])
+        finally:
+            pool.shutdown()
+        self.assertEqual(2, max(peak))
+
+    def test_exception(self):
+        async def _fail():
+            raise Exception("nope")
+
+        pool = devpipeline.aio.CoroutinePool(1)
+        try:
+            future = pool.submit(_fail)
+            self.assertRaises(Exception, future.result)
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+import loader
+
+import devpipeline.executor
+
+
+def _python(code):
+    return {
+        "args": [sys.executable, "-c", code]
+    }
+
+
+class TestBufferedExecutor(unittest.TestCase):
+    def _run(self, executor, *cmds):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            buffered = executor.buffered()
+            buffered.message("start")
+            buffered.execute(os.environ.copy(), *cmds)
+            self.assertEqual("", output.getvalue())
+            buffered.flush()
+        return output.getvalue()
+
+    def test_output(self):
+        output = self._run(devpipeline.executor.VerboseExecutor(),
+                           _python("print('hello')"))
+        lines = output.splitlines()
+        self.assertEqual("start", lines[0])
+        self.assertEqual("hello", lines[-1])
+
+    def test_failure(self):
+        output = self._run(devpipeline.executor.QuietExecutor(),
+                           _python("import sys; print('oops'); sys.exit(3)"))
+        lines = output.splitlines()
+        self.assertEqual("oops", lines[0])
+        self.assertTrue(lines[1].startswith("ERROR: "))
+
+    def test_silent(self):
+        output = self._run(
+            devpipeline.executor.SilentExecutor(),
+            _python("import sys; print('out'); print('err', file=sys.stderr)"))
+        self.assertEqual("err\n", output)
+
+    def test_original_unchanged(self):
+        executor = devpipeline.executor.QuietExecutor()
+        executor.buffered()
+        self.assertIsNone(executor._buffer)
+
+
+if __name__ == "__main__":
+    unittest.main()
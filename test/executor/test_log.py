@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.executor
+
+
+def _python(code):
+    return {
+        "args": [sys.executable, "-c", code]
+    }
+
+
+class TestLogExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp_dir.name, "logs", "foo.log")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _run(self, *cmds):
+        output = io.StringIO()
+        executor = devpipeline.executor.LogExecutor().for_target(
+            "foo", {"dp.build_root": self.tmp_dir.name})
+        with contextlib.redirect_stdout(output):
+            executor.message("start")
+            result = executor.execute(os.environ.copy(), *cmds)
+        return (result, output.getvalue())
+
+    def _log(self):
+        with open(self.log_path) as log_file:
+            return log_file.read()
+
+    def test_success(self):
+        result, output = self._run(_python("print('hello')"))
+        self.assertTrue(result)
+        self.assertEqual("", output)
+        self.assertIn("start\n", self._log())
+        self.assertIn("hello\n", self._log())
+
+    def test_failure_tail(self):
+        result, output = self._run(_python(
+            "import sys\n"
+            "for i in range(1000): print(i)\n"
+            "sys.exit(2)"))
+        self.assertFalse(result)
+        lines = output.splitlines()
+        tail_lines = devpipeline.executor.LogExecutor.TAIL_LINES
+        self.assertEqual(tail_lines + 1, len(lines))
+        self.assertEqual(str(1000 - tail_lines), lines[0])
+        self.assertEqual("999", lines[-2])
+        self.assertTrue(lines[-1].startswith("ERROR: "))
+        self.assertIn("0\n1\n", self._log())
+
+
+if __name__ == "__main__":
+    unittest.main()
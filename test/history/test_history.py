@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.history
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "build.history")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _history(self, profile="debug"):
+        return devpipeline.history.History(self.path, self.tmp_dir.name,
+                                           profile)
+
+    def test_empty(self):
+        self.assertEqual({}, self._history().estimates())
+
+    def test_estimates(self):
+        history = self._history()
+        history.record("foo", "configure", 1)
+        history.record("foo", "build", 10)
+        history.save()
+        history = self._history()
+        history.record("foo", "build", 20)
+        history.save()
+        self.assertEqual({"foo": 16}, self._history().estimates())
+
+    def test_profiles(self):
+        history = self._history()
+        history.record("foo", "build", 10)
+        history.save()
+        self.assertEqual({}, self._history("release").estimates())
+
+    def test_prune(self):
+        history = self._history()
+        for seconds in range(20):
+            history.record("foo", "build", seconds)
+            history.save()
+        # only the most recent runs are kept
+        self.assertEqual({"foo": 17}, self._history().estimates())
+
+    def test_save_error(self):
+        # a directory can't be opened as a database
+        os.mkdir(self.path)
+        history = self._history()
+        history.record("foo", "build", 10)
+        self.assertIsNotNone(history.save())
+        self.assertEqual({}, self._history().estimates())
+
+
+class TestTargetWeights(unittest.TestCase):
+    def test_weights(self):
+        components = {
+            "a": {"dp.cost": "30"},
+            "b": {},
+            "c": {}
+        }
+        weights = devpipeline.history.target_weights(
+            ["a", "b", "c"], components, {"a": 100, "b": 10})
+        self.assertEqual({"a": 30, "b": 10, "c": 20}, weights)
+
+    def test_unknown(self):
+        weights = devpipeline.history.target_weights(["a"], {"a": {}}, {})
+        self.assertEqual({"a": 1}, weights)
+
+
+if __name__ == "__main__":
+    unittest.main()
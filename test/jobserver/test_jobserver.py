@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.jobserver
+
+
+class TestJobServer(unittest.TestCase):
+    def setUp(self):
+        self.jobserver = devpipeline.jobserver.JobServer(2)
+
+    def tearDown(self):
+        self.jobserver.close()
+
+    def test_environment(self):
+        env = self.jobserver.environment({
+            "MAKEFLAGS": "-k",
+            "CMAKE_BUILD_PARALLEL_LEVEL": "8"
+        })
+        self.assertRegex(env["MAKEFLAGS"],
+                         R"^ -j2 --jobserver-auth=\d+,\d+ -k$")
+        self.assertNotIn("CMAKE_BUILD_PARALLEL_LEVEL", env)
+
+    def test_slots(self):
+        # pylint: disable=protected-access
+        os.set_blocking(self.jobserver._read, False)
+        with self.jobserver.slot():
+            with self.jobserver.slot():
+                with self.assertRaises(BlockingIOError):
+                    with self.jobserver.slot():
+                        pass
+        with self.jobserver.slot():
+            pass
+
+    @unittest.skipUnless(shutil.which("make"), "make isn't available")
+    def test_make_client(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "Makefile"), "w") as makefile:
+                makefile.write("all: a b\na b:\n\t@touch $@\n")
+            cmd = self.jobserver.command({
+                "args": ["make"],
+                "cwd": tmp_dir,
+                "stderr": subprocess.PIPE
+            })
+            with self.jobserver.slot():
+                result = subprocess.run(
+                    env=self.jobserver.environment(os.environ), **cmd)
+            self.assertEqual(0, result.returncode)
+            self.assertNotIn(b"jobserver", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+import os
+import unittest
+
+import loader
+
+import devpipeline.config.component
+import devpipeline.exec.export_ninja
+import devpipeline.scm.git
+
+
+def _make_component(values):
+    return devpipeline.config.component.Component("foo", values)
+
+
+class TestEnvironment(unittest.TestCase):
+    def _prefix(self, values):
+        return devpipeline.exec.export_ninja._environment_prefix(
+            _make_component(values))
+
+    def test_none(self):
+        self.assertEqual("", self._prefix({"build": "cmake"}))
+
+    def test_set(self):
+        self.assertEqual("env CC=clang CFLAGS='-O2 -g' ", self._prefix({
+            "env.cc": "clang",
+            "env.cflags": "-O2 -g"
+        }))
+
+    def test_unset(self):
+        self.assertEqual("env -u HOME ", self._prefix({"env.home": ""}))
+
+    def test_append(self):
+        self.assertEqual(
+            'env PATH="${{PATH:+${{PATH}}{0}}}"/opt/bin '.format(os.pathsep),
+            self._prefix({"env_append.path": "/opt/bin"}))
+        self.assertEqual("env PATH=/bin{}/opt/bin ".format(os.pathsep),
+                         self._prefix({
+                             "env.path": "/bin",
+                             "env_append.path": "/opt/bin"
+                         }))
+
+
+class TestCommands(unittest.TestCase):
+    def test_step(self):
+        command = devpipeline.exec.export_ninja._step_command(
+            "foo", "configure", [
+                {"args": ["cmake", "/src/my foo"], "cwd": "/build/foo"},
+                {"args": ["echo", "done"]}
+            ], "")
+        self.assertEqual("(cd /build/foo && cmake '/src/my foo') && "
+                         "echo done && touch .dp-ninja/foo.configure",
+                         command)
+
+    def test_nothing_to_do(self):
+        self.assertEqual(
+            "touch .dp-ninja/foo.build",
+            devpipeline.exec.export_ninja._step_command("foo", "build", None,
+                                                        ""))
+
+    def test_unsupported(self):
+        self.assertRaises(
+            Exception, devpipeline.exec.export_ninja._step_command, "foo",
+            "build", [{"args": ["make"], "stdout": None}], "")
+
+    def test_update(self):
+        # fetches and fast-forwards, whatever state the checkout is in
+        git = devpipeline.scm.git.Git({"uri": "file:///repos/foo.git",
+                                       "revision": "master"})
+        self.assertEqual(
+            "(cd /src/foo && git fetch file:///repos/foo.git master) && "
+            "(cd /src/foo && git checkout master) && "
+            "(cd /src/foo && git merge --ff-only FETCH_HEAD) && "
+            "touch .dp-ninja/foo.update",
+            devpipeline.exec.export_ninja._step_command(
+                "foo", "update", git.update_commands("/src/foo"), ""))
+
+    def test_escape_path(self):
+        self.assertEqual("a$ b$:c$$d",
+                         devpipeline.exec.export_ninja._escape_path("a b:c$d"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+import importlib.metadata
+import unittest
+
+import loader
+
+import devpipeline.plugins
+
+
+class TestPluginRegistry(unittest.TestCase):
+    def setUp(self):
+        self.scans = 0
+        self.old_find = devpipeline.plugins._find_entry_points
+
+        def _find(group):
+            self.scans += 1
+            return [importlib.metadata.EntryPoint(
+                "joiner", "os.path:join", group)]
+
+        devpipeline.plugins._find_entry_points = _find
+        self.registry = devpipeline.plugins.PluginRegistry("test.plugins", {
+            "builtin": lambda: "builtin",
+            "lazy": "os.path:basename"
+        })
+
+    def tearDown(self):
+        devpipeline.plugins._find_entry_points = self.old_find
+
+    def test_builtin(self):
+        self.assertEqual("builtin", self.registry.get("builtin")())
+        self.assertEqual("c", self.registry.get("lazy")("/a/b/c"))
+        # built in names never need entry points
+        self.assertEqual(0, self.scans)
+
+    def test_entry_point(self):
+        self.assertEqual("a/b", self.registry.get("joiner")("a", "b"))
+        self.assertIn("joiner", self.registry)
+
+    def test_missing(self):
+        self.assertIsNone(self.registry.get("missing"))
+        self.assertNotIn("missing", self.registry)
+
+    def test_discovery_cached(self):
+        self.registry.get("joiner")
+        self.registry.get("missing")
+        self.registry.get("other")
+        self.assertEqual(1, self.scans)
+
+    def test_names(self):
+        self.assertEqual(["builtin", "joiner", "lazy"], self.registry.names())
+
+
+if __name__ == "__main__":
+    unittest.main()
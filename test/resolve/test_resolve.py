@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+import unittest
+
+import loader
+
+import devpipeline.resolve
+
+
+def _make_components(deps):
+    return {name: {"depends": value} if value else {}
+            for name, value in deps.items()}
+
+
+class TestResolve(unittest.TestCase):
+    def _check_order(self, components, order):
+        positions = {target: i for i, target in enumerate(order)}
+        self.assertEqual(len(positions), len(order))
+        for target in order:
+            for dep in devpipeline.resolve._get_deps_from_component(
+                    components[target]):
+                self.assertLess(positions[dep], positions[target])
+
+    def test_single(self):
+        components = _make_components({"a": None})
+        self.assertEqual(
+            ["a"], devpipeline.resolve.order_dependencies(["a"], components))
+
+    def test_diamond(self):
+        components = _make_components({
+            "a": None,
+            "b": "a",
+            "c": "a",
+            "d": "b, c"
+        })
+        order = devpipeline.resolve.order_dependencies(["d"], components)
+        self.assertEqual(4, len(order))
+        self._check_order(components, order)
+
+    def test_subset(self):
+        components = _make_components({
+            "a": None,
+            "b": "a",
+            "c": None
+        })
+        self.assertEqual(
+            ["a", "b"],
+            devpipeline.resolve.order_dependencies(["b"], components))
+
+    def test_missing(self):
+        components = _make_components({"a": "b"})
+        self.assertRaisesRegex(
+            Exception, "target=b", devpipeline.resolve.order_dependencies,
+            ["a"], components)
+
+    def test_cycle(self):
+        components = _make_components({
+            "a": None,
+            "b": "a, d",
+            "c": "b",
+            "d": "c"
+        })
+        with self.assertRaises(Exception) as context:
+            devpipeline.resolve.order_dependencies(["d"], components)
+        message = str(context.exception)
+        self.assertTrue(message.startswith("Dependency cycle: "))
+        cycle = message[len("Dependency cycle: "):].split(" -> ")
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual({"b", "c", "d"}, set(cycle))
+
+    def test_self_cycle(self):
+        components = _make_components({"a": "a"})
+        self.assertRaisesRegex(
+            Exception, "a -> a", devpipeline.resolve.order_dependencies,
+            ["a"], components)
+
+    def test_graph_reverse_deps(self):
+        components = _make_components({
+            "a": None,
+            "b": "a",
+            "c": "a"
+        })
+        graph = devpipeline.resolve.build_graph(["b", "c"], components)
+        self.assertEqual(["b", "c"], graph.reverse_deps["a"])
+        self.assertEqual([], graph.reverse_deps["b"])
+        self.assertEqual({"a": 0, "b": 1, "c": 1}, graph.counts())
+
+    def test_critical_paths(self):
+        components = _make_components({
+            "a": None,
+            "b": "a",
+            "c": "a",
+            "d": "b, c"
+        })
+        graph = devpipeline.resolve.build_graph(["d"], components)
+        weights = {"a": 1, "b": 5, "c": 2, "d": 1}
+        self.assertEqual({"a": 7, "b": 6, "c": 3, "d": 1},
+                         graph.critical_paths(weights.get))
+        self.assertEqual(["a", "b", "d"], graph.critical_path(weights.get))
+
+
+if __name__ == "__main__":
+    unittest.main()
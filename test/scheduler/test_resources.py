@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.resources
+
+_MEMINFO = """MemTotal:       16384000 kB
+MemFree:         1024000 kB
+MemAvailable:    8388608 kB
+"""
+
+
+class _Component(dict):
+    def __init__(self, name, values):
+        super().__init__(values)
+        self.name = name
+
+
+class TestHost(unittest.TestCase):
+    def _write(self, text):
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, "w") as output:
+            output.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_loadavg(self):
+        path = self._write("2.50 1.75 1.00 3/412 12345\n")
+        self.assertEqual(2.5, devpipeline.resources.read_loadavg(path))
+
+    def test_available_memory(self):
+        path = self._write(_MEMINFO)
+        self.assertEqual(
+            8.0, devpipeline.resources.read_available_memory(path))
+
+    def test_missing(self):
+        self.assertIsNone(
+            devpipeline.resources.read_loadavg("/nonexistent/loadavg"))
+        self.assertIsNone(devpipeline.resources.read_available_memory(
+            "/nonexistent/meminfo"))
+
+    def test_low_memory(self):
+        monitor = devpipeline.resources.HostMonitor(
+            load_fn=lambda: None, memory_fn=lambda: 2.0)
+        budget = devpipeline.resources.Budget(monitor=monitor)
+        self.assertTrue(budget.acquire(1, 1))
+        self.assertFalse(budget.acquire(1, 4))
+        self.assertTrue(budget.acquire(1, 1))
+
+
+class TestRequirements(unittest.TestCase):
+    def test_weights(self):
+        components = {
+            "a": _Component("a", {}),
+            "b": _Component("b", {"dp.cpu_weight": "4",
+                                  "dp.mem_weight": "30"})
+        }
+        self.assertEqual(
+            {"a": (1, 0), "b": (4.0, 30.0)},
+            devpipeline.resources.target_requirements(["a", "b"],
+                                                      components))
+
+    def test_invalid(self):
+        components = {"a": _Component("a", {"dp.mem_weight": "lots"})}
+        self.assertRaises(Exception,
+                          devpipeline.resources.target_requirements,
+                          ["a"], components)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+
+import sys
+import threading
+import time
+import unittest
+
+import loader
+
+import devpipeline.executor
+import devpipeline.resolve
+import devpipeline.resources
+import devpipeline.scheduler
+import devpipeline.toolsupport
+
+# d depends on b and c, which both depend on a
+_BUILD_ORDER = ["a", "b", "c", "d"]
+
+
+def _make_scheduler():
+    graph = devpipeline.resolve.DependencyGraph()
+    graph.add_target("a", [])
+    graph.add_target("b", ["a"])
+    graph.add_target("c", ["a"])
+    graph.add_target("d", ["b", "c"])
+    return devpipeline.scheduler.Scheduler(_BUILD_ORDER, graph)
+
+
+class TestScheduler(unittest.TestCase):
+    def _check_order(self, order):
+        self.assertLess(order.index("a"), order.index("b"))
+        self.assertLess(order.index("a"), order.index("c"))
+        self.assertLess(order.index("b"), order.index("d"))
+        self.assertLess(order.index("c"), order.index("d"))
+
+    def test_serial(self):
+        scheduler = _make_scheduler()
+        order = []
+        self.assertTrue(scheduler.run(order.append, 1))
+        self.assertEqual(_BUILD_ORDER, order)
+
+    def test_parallel(self):
+        scheduler = _make_scheduler()
+        order = []
+        lock = threading.Lock()
+
+        def _record(target):
+            with lock:
+                order.append(target)
+
+        self.assertTrue(scheduler.run(_record, 4))
+        self.assertEqual(4, len(order))
+        self._check_order(order)
+
+    def test_concurrent_siblings(self):
+        # b and c must be in flight at the same time or this deadlocks
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _wait(target):
+            if target in ("b", "c"):
+                barrier.wait()
+
+        scheduler = _make_scheduler()
+        self.assertTrue(scheduler.run(_wait, 2))
+
+    def test_failure(self):
+        def _fail(target):
+            if target == "b":
+                raise Exception("broken")
+
+        scheduler = _make_scheduler()
+        self.assertFalse(scheduler.run(_fail, 2))
+        self.assertEqual(["b"], list(scheduler.failed))
+        self.assertEqual(["d"], scheduler.skipped)
+        self.assertIn("c", scheduler.completed)
+
+    def test_failed_command(self):
+        # b's command exits non-zero, which must fail b and skip d
+        def _run(target):
+            code = 3 if target == "b" else 0
+            tool = devpipeline.toolsupport.SimpleTool({
+                "env": None,
+                "executor": devpipeline.executor.SilentExecutor(),
+                "current_target": target
+            }, None)
+
+            def build():
+                return [{"args": [sys.executable, "-c",
+                                  "exit({})".format(code)]}]
+
+            # pylint: disable=protected-access
+            tool._call_helper("Building", build)
+
+        scheduler = _make_scheduler()
+        self.assertFalse(scheduler.run(_run, 2))
+        self.assertEqual(["b"], list(scheduler.failed))
+        self.assertEqual(["d"], scheduler.skipped)
+        self.assertEqual(["a", "c"], sorted(scheduler.completed))
+
+    def test_priorities(self):
+        graph = devpipeline.resolve.DependencyGraph()
+        for target in ["a", "b", "c"]:
+            graph.add_target(target, [])
+        scheduler = devpipeline.scheduler.Scheduler(
+            ["a", "b", "c"], graph, {"a": 1, "b": 2, "c": 10})
+        order = []
+        self.assertTrue(scheduler.run(order.append, 2))
+        self.assertEqual(["c", "b"], order[:2])
+
+    def test_invalid_jobs(self):
+        scheduler = _make_scheduler()
+        self.assertRaises(Exception, scheduler.run, lambda t: None, 0)
+
+
+def _independent(targets):
+    graph = devpipeline.resolve.DependencyGraph()
+    for target in targets:
+        graph.add_target(target, [])
+    return devpipeline.scheduler.Scheduler(targets, graph)
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = set()
+        self.overlaps = []
+
+    def __call__(self, target):
+        with self._lock:
+            self._running.add(target)
+            self.overlaps.append(frozenset(self._running))
+        time.sleep(0.02)
+        with self._lock:
+            self._running.remove(target)
+
+
+class TestBudget(unittest.TestCase):
+    def test_memory_budget(self):
+        # big needs most of the memory, so it never overlaps the others
+        scheduler = _independent(["big", "x", "y"])
+        recorder = _Recorder()
+        budget = devpipeline.resources.Budget(memory=10)
+        self.assertTrue(scheduler.run(
+            recorder, 3, budget,
+            {"big": (1, 8), "x": (1, 4), "y": (1, 4)}))
+        for running in recorder.overlaps:
+            if "big" in running:
+                self.assertEqual({"big"}, running)
+        self.assertIn(frozenset(["x", "y"]), recorder.overlaps)
+
+    def test_oversized_target(self):
+        # larger than the whole budget, but still runs on its own
+        scheduler = _independent(["huge"])
+        budget = devpipeline.resources.Budget(cpu=2, memory=4)
+        self.assertTrue(scheduler.run(lambda target: None, 2, budget,
+                                      {"huge": (8, 30)}))
+        self.assertEqual(["huge"], scheduler.completed)
+
+    def test_backfill(self):
+        # b doesn't fit next to a, but c does
+        graph = devpipeline.resolve.DependencyGraph()
+        for target in ["a", "b", "c"]:
+            graph.add_target(target, [])
+        scheduler = devpipeline.scheduler.Scheduler(
+            ["a", "b", "c"], graph, {"a": 3, "b": 2, "c": 1})
+        recorder = _Recorder()
+        budget = devpipeline.resources.Budget(cpu=3)
+        self.assertTrue(scheduler.run(recorder, 3, budget,
+                                      {"a": (2, 0), "b": (2, 0)}))
+        self.assertEqual(frozenset(["a", "c"]), recorder.overlaps[1])
+
+    def test_busy_host(self):
+        # the host is fully loaded by something else, so only one target
+        # runs at a time
+        monitor = devpipeline.resources.HostMonitor(
+            interval=0.01, load_fn=lambda: 4.0, memory_fn=lambda: None)
+        budget = devpipeline.resources.Budget(cpu=4, monitor=monitor)
+        scheduler = _independent(["x", "y"])
+        recorder = _Recorder()
+        self.assertTrue(scheduler.run(recorder, 2, budget))
+        self.assertEqual([frozenset(["x"]), frozenset(["y"])],
+                         recorder.overlaps)
+
+    def test_release(self):
+        budget = devpipeline.resources.Budget(cpu=2)
+        self.assertTrue(budget.acquire(2, 0))
+        self.assertFalse(budget.acquire(1, 0))
+        budget.release(2, 0)
+        self.assertTrue(budget.acquire(1, 0))
+
+
+class TestSimulate(unittest.TestCase):
+    def _simulate(self, jobs):
+        graph = _make_scheduler()._graph
+        weights = {"a": 1, "b": 5, "c": 2, "d": 1}
+        return devpipeline.scheduler.simulate(
+            _BUILD_ORDER, graph, weights, jobs,
+            graph.critical_paths(weights.get))
+
+    def test_serial(self):
+        total, times = self._simulate(1)
+        self.assertEqual(9, total)
+        self.assertEqual((1, 6), times["b"])
+
+    def test_parallel(self):
+        total, times = self._simulate(2)
+        self.assertEqual(7, total)
+        self.assertEqual((1, 3), times["c"])
+        self.assertEqual((6, 7), times["d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import loader
+
+_LIB_DIR = "{}/../../lib".format(os.path.dirname(os.path.abspath(__file__)))
+
+_GIT_ENV = dict(os.environ,
+                GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                GIT_COMMITTER_NAME="test",
+                GIT_COMMITTER_EMAIL="test@example.com")
+
+_REPOS = ["one", "two", "three"]
+
+
+def _git(cwd, *args):
+    subprocess.check_call(["git"] + list(args), cwd=cwd, env=_GIT_ENV,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+
+
+def _make_bare(root, name):
+    bare = os.path.join(root, "{}.git".format(name))
+    work = os.path.join(root, "work", name)
+    os.makedirs(work)
+    _git(root, "init", "--bare", "-b", "master", bare)
+    _git(work, "init", "-b", "master")
+    _git(work, "commit", "--allow-empty", "-m", name)
+    _git(work, "push", bare, "master")
+    return "file://{}".format(bare)
+
+
+def _blocks(output):
+    """Split checkout output into {target: lines} using each target's
+    header."""
+    ret = {}
+    current = None
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        following = lines[index + 1] if index + 1 < len(lines) else ""
+        if line.startswith("  ") and following.startswith("---"):
+            current = line.strip()
+            if current in ret:
+                raise Exception("{} printed twice".format(current))
+            ret[current] = []
+        elif current:
+            ret[current].append(line)
+    return ret
+
+
+class TestParallelCheckout(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        config = "[DEFAULT]\nscm = git\nbuild = nothing\n" \
+                 "git.revision = master\n"
+        for name in _REPOS:
+            config += "[{}]\ngit.uri = {}\n".format(name,
+                                                  _make_bare(root, name))
+        config += "[broken]\ngit.uri = file://{}/missing.git\n".format(root)
+        with open(os.path.join(root, "build.config"), "w") as output_file:
+            output_file.write(config)
+        os.makedirs(os.path.join(root, "dp-config"))
+        self.env = dict(_GIT_ENV, PYTHONPATH=_LIB_DIR,
+                        DEV_PIPELINE_CONFIG=os.path.join(root, "dp-config"),
+                        DEV_PIPELINE_NO_DAEMON="1")
+        self._driver(["configure"], root)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _driver(self, args, cwd):
+        return subprocess.run(
+            [sys.executable, "-m", "devpipeline.exec.driver"] + args,
+            cwd=cwd, env=self.env, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, check=False, universal_newlines=True)
+
+    def test_checkout(self):
+        result = self._driver(["checkout", "--scm-jobs", "2", "--executor",
+                               "verbose"],
+                              os.path.join(self.tmp_dir.name, "build"))
+        self.assertNotEqual(0, result.returncode)
+        self.assertIn("Checking out broken failed", result.stderr)
+        blocks = _blocks(result.stdout)
+        for name in _REPOS + ["broken"]:
+            # everything about a target is printed together
+            self.assertIn("Checking out {}".format(name), blocks[name])
+            for other in blocks:
+                if other != name:
+                    self.assertFalse([line for line in blocks[name]
+                                      if "/{}".format(other) in line])
+        for name in _REPOS:
+            self.assertIn("Updating {}".format(name), blocks[name])
+            self.assertTrue(os.path.isdir(
+                os.path.join(self.tmp_dir.name, name, ".git")))
+        self.assertTrue([line for line in blocks["broken"]
+                         if line.startswith("ERROR:")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.scm.git
+
+_GIT_ENV = dict(os.environ,
+                GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+                GIT_COMMITTER_NAME="test",
+                GIT_COMMITTER_EMAIL="test@example.com")
+
+
+def _git(cwd, *args):
+    return subprocess.check_output(["git"] + list(args), cwd=cwd,
+                                   env=_GIT_ENV, stderr=subprocess.DEVNULL
+                                   ).decode("utf-8").strip()
+
+
+class TestGitFastUpdate(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.upstream = "{}/upstream".format(self.tmp_dir.name)
+        self.checkout = "{}/checkout".format(self.tmp_dir.name)
+        os.makedirs(self.upstream)
+        _git(self.upstream, "init", "-b", "master")
+        _git(self.upstream, "commit", "--allow-empty", "-m", "first")
+        _git(self.upstream, "tag", "-a", "v1", "-m", "v1")
+        _git(self.upstream, "tag", "light")
+        _git(self.tmp_dir.name, "clone", self.upstream, self.checkout)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _update(self, revision):
+        return devpipeline.scm.git._fast_update(revision, self.checkout)
+
+    def test_up_to_date(self):
+        self.assertEqual([], self._update("master"))
+
+    def test_packed_refs(self):
+        _git(self.checkout, "pack-refs", "--all")
+        self.assertEqual([], self._update("master"))
+
+    def test_behind(self):
+        _git(self.upstream, "commit", "--allow-empty", "-m", "second")
+        _git(self.checkout, "fetch")
+        commands = self._update("master")
+        self.assertEqual(1, len(commands))
+        self.assertEqual(["git", "merge", "--ff-only", "origin/master"],
+                         commands[0]["args"])
+
+    def test_other_branch(self):
+        _git(self.checkout, "checkout", "-b", "feature")
+        self.assertIsNone(self._update("master"))
+
+    def test_multiple_fetch_refspecs(self):
+        # origin/master comes from the first refspec; the second (added
+        # last) doesn't map it
+        _git(self.checkout, "config", "--add", "remote.origin.fetch",
+             "+refs/tags/*:refs/tags/*")
+        _git(self.upstream, "commit", "--allow-empty", "-m", "second")
+        _git(self.checkout, "fetch")
+        self.assertEqual(["git", "merge", "--ff-only", "origin/master"],
+                         self._update("master")[0]["args"])
+
+    def test_unknown_upstream(self):
+        # the remote's refspecs don't map the branch, so fall back to git
+        _git(self.checkout, "config", "--unset-all", "remote.origin.fetch")
+        _git(self.checkout, "config", "--add", "remote.origin.fetch",
+             "+refs/tags/*:refs/tags/*")
+        self.assertIsNone(self._update("master"))
+
+    def test_no_upstream(self):
+        _git(self.checkout, "checkout", "-b", "local")
+        self.assertEqual([], self._update("local"))
+
+    def test_detached(self):
+        _git(self.checkout, "checkout", "light")
+        self.assertEqual([], self._update("light"))
+        head = _git(self.checkout, "rev-parse", "HEAD")
+        self.assertEqual([], self._update(head))
+        self.assertIsNone(self._update("master"))
+
+    def test_annotated_tag(self):
+        # clone packs tags along with the commits they point to
+        _git(self.checkout, "checkout", "v1")
+        self.assertEqual([], self._update("v1"))
+
+    def test_loose_annotated_tag(self):
+        _git(self.checkout, "tag", "-a", "v2", "-m", "v2")
+        _git(self.checkout, "checkout", "v2")
+        # can't be peeled without reading objects
+        self.assertIsNone(self._update("v2"))
+
+    def _run(self, commands):
+        for command in commands:
+            subprocess.check_call(command["args"], cwd=command["cwd"],
+                                  env=_GIT_ENV, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+
+    def test_update_commands(self):
+        git = devpipeline.scm.git.Git({
+            "uri": "file://{}".format(self.upstream),
+            "revision": "master"
+        })
+        _git(self.upstream, "commit", "--allow-empty", "-m", "second")
+        self._run(git.update_commands(self.checkout))
+        self.assertEqual(_git(self.upstream, "rev-parse", "HEAD"),
+                         _git(self.checkout, "rev-parse", "HEAD"))
+
+    def test_update_commands_tag(self):
+        git = devpipeline.scm.git.Git({
+            "uri": "file://{}".format(self.upstream),
+            "revision": "light"
+        })
+        tagged = _git(self.upstream, "rev-parse", "light")
+        _git(self.upstream, "commit", "--allow-empty", "-m", "second")
+        self._run(git.update_commands(self.checkout))
+        self.assertEqual(tagged, _git(self.checkout, "rev-parse", "HEAD"))
+
+    def test_missing(self):
+        self.assertIsNone(devpipeline.scm.git._fast_update(
+            "master", "{}/missing".format(self.tmp_dir.name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+
+import json
+import os
+import tempfile
+import unittest
+
+import loader
+
+import devpipeline.toolsupport
+import devpipeline.trace
+
+
+class _Executor:
+    def message(self, msg):
+        pass
+
+    def execute(self, environment, *args):
+        return True
+
+
+class _Scm:
+    def checkout(self, repo_dir):
+        return [{"args": ["/usr/bin/git", "clone"]}]
+
+
+class TestTracer(unittest.TestCase):
+    def test_tracks(self):
+        tracer = devpipeline.trace.Tracer()
+        with tracer.span("foo", "build"):
+            pass
+        with tracer.span("bar", "build"):
+            pass
+        events = tracer.events()
+        names = {event["tid"]: event["args"]["name"]
+                 for event in events if event["ph"] == "M"}
+        self.assertEqual({0: "foo", 1: "bar"}, names)
+        spans = [event for event in events if event["ph"] == "X"]
+        self.assertEqual([0, 1], [span["tid"] for span in spans])
+        self.assertTrue(all(span["dur"] >= 0 for span in spans))
+
+    def test_write(self):
+        tracer = devpipeline.trace.Tracer()
+        with tracer.span("foo", "build"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "trace.json")
+            tracer.write(path)
+            with open(path) as trace_file:
+                self.assertEqual(2, len(json.load(trace_file)["traceEvents"]))
+
+    def test_simple_tool(self):
+        tracer = devpipeline.trace.Tracer()
+        tool = devpipeline.toolsupport.SimpleTool({
+            "env": {},
+            "executor": _Executor(),
+            "current_target": "foo",
+            "tracer": tracer
+        }, _Scm())
+        # pylint: disable=protected-access
+        tool._call_helper("Checking out", tool.real.checkout, "src")
+        spans = [(event["name"], event["cat"]) for event in tracer.events()
+                 if event["ph"] == "X"]
+        self.assertEqual([("checkout", "step"), ("git", "command")], spans)
+
+
+if __name__ == "__main__":
+    unittest.main()